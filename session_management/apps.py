@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class SessionManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'session_management'
+
+    def ready(self):
+        from session_management.retention import start_scheduler
+        # Importing registers the error-log retention job, the cache-invalidation and
+        # connection-metrics receivers.
+        import session_management.errors  # noqa: F401
+        import session_management.signals  # noqa: F401
+
+        request_started.connect(start_scheduler, dispatch_uid='session_management.retention')
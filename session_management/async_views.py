@@ -0,0 +1,460 @@
+"""
+Async versions of the session_management views.
+
+Served by an ASGI server (e.g. `uvicorn student_portal.asgi:application`) with
+settings.ASYNC_VIEWS = True, each request is a coroutine: Student lookups use
+the async ORM, SMS goes out through aenqueue_sms(), and password hashing awaits
+the bounded pool in hashing.py, so a request waiting on any of them costs no
+thread. Request/response shapes and status codes match views.py exactly.
+
+DRF's APIView only dispatches to sync handlers; AsyncAPIView runs the sync
+parts of DRF (authentication, permissions, throttling) in a thread and awaits
+the handler.
+"""
+import asyncio
+import random
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from student_portal.utils import log_exception
+from .authentication import issue_tokens
+from .blacklist import FilteredRefreshToken
+from .errors import top_errors
+from .hashing import HashingBusy, ahash_password, acheck_user_password
+from .models import Student, SMSDelivery
+from .otp_store import get_otp_store, acheck_otp, OTPRejected
+from .profile_cache import aget_profile, profile_etag
+from .queries import aget_student, astudent_exists, aget_profile_version, asave_profile_changes, OTP_FIELDS, TOKEN_FIELDS, PROFILE_FIELDS, EDITABLE_FIELDS
+from .serializers import RegisterNumberSerializer, OTPVerifySerializer, SetPasswordSerializer, LoginSerializer, ForgotPasswordSerializer, StudentProfileUpdateSerializer
+from .sms import aenqueue_sms
+from .throttling import LoginThrottle, OTPRequestThrottle, OTPVerifyThrottle
+from .views import IsStaffOrDeliveryOwner, busy_response
+
+alog_exception = sync_to_async(log_exception)
+aissue_tokens = sync_to_async(issue_tokens)
+
+
+def international_number(phone_number):
+    phone_number = phone_number.strip().replace(' ', '')
+    if not phone_number.startswith('+91'):
+        phone_number = '+91' + phone_number.lstrip('0')
+    return phone_number
+
+
+class AsyncAPIView(APIView):
+    """APIView whose handlers are coroutines."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication may hit the database, so it runs off the event loop.
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class RegisterCheckView(AsyncAPIView):
+    throttle_classes = [OTPRequestThrottle]
+
+    async def post(self, request):
+        serializer = RegisterNumberSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        reg_no = serializer.validated_data['register_number'].upper()
+
+        try:
+            student = await aget_student(reg_no, OTP_FIELDS)
+
+            if student.password:
+                return Response({"message": "Please enter your password."}, status=200)
+
+            otp = str(random.randint(100000, 999999))
+            if not await get_otp_store().aissue(student.register_number, otp):
+                return Response({"error": "Please wait before requesting a new OTP."}, status=429)
+
+            phone_number = international_number(student.phone_number)
+            delivery = await aenqueue_sms(phone_number, f"Your OTP is {otp}")
+
+            return Response({
+                "message": "OTP sent successfully",
+                "phone_number": phone_number,
+                "delivery_id": str(delivery.id)
+            }, status=200)
+
+        except Student.DoesNotExist:
+            return Response({"error": "Register number not found"}, status=404)
+        except Exception as e:
+            await alog_exception(e)
+            return Response({"error": str(e)}, status=500)
+
+
+class OTPVerifyView(AsyncAPIView):
+    throttle_classes = [OTPVerifyThrottle]
+
+    async def post(self, request):
+        serializer = OTPVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reg_no = serializer.validated_data['register_number'].upper()
+        otp_input = serializer.validated_data['otp']
+
+        try:
+            if not await astudent_exists(reg_no):
+                return Response({"error": "Register number not found"}, status=404)
+
+            await acheck_otp(reg_no, otp_input, consume=False)
+            return Response({"message": "OTP verified"}, status=200)
+        except OTPRejected as e:
+            await alog_exception(Exception(f"OTP check failed for {reg_no}: {e.result}"))
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            await alog_exception(e)
+            return Response({"error": str(e)}, status=500)
+
+
+class SetPasswordView(AsyncAPIView):
+    async def post(self, request):
+        serializer = SetPasswordSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        reg_no = serializer.validated_data['register_number'].upper()
+        password = serializer.validated_data['password']
+
+        try:
+            student = await aget_student(reg_no, TOKEN_FIELDS)
+
+            student.password = await ahash_password(password)
+            await student.asave(update_fields=['password', 'updated_at'])
+
+            refresh = await aissue_tokens(student)
+
+            return Response({
+                "access": str(refresh.access_token),
+                "refresh": str(refresh),
+                "name": student.name,
+                "register_number": student.register_number,
+            }, status=status.HTTP_200_OK)
+
+        except Student.DoesNotExist:
+            return Response(
+                {"error": "Student not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except HashingBusy:
+            return busy_response()
+        except Exception as e:
+            await alog_exception(e)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class LoginView(AsyncAPIView):
+    throttle_classes = [LoginThrottle]
+
+    async def post(self, request):
+        serializer = LoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        reg_no = serializer.validated_data['register_number'].upper()
+        password = serializer.validated_data['password']
+
+        try:
+            student = await aget_student(reg_no, TOKEN_FIELDS)
+
+            if not await acheck_user_password(student, password):
+                return Response(
+                    {"error": "Incorrect password"},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+
+            refresh = await aissue_tokens(student)
+
+            return Response({
+                "access": str(refresh.access_token),
+                "refresh": str(refresh),
+                "name": student.name,
+                "register_number": student.register_number,
+                "phone_number": student.phone_number,
+                "email": student.email or ""
+            }, status=status.HTTP_200_OK)
+
+        except Student.DoesNotExist:
+            return Response(
+                {"error": "Register number not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except HashingBusy:
+            return busy_response()
+        except Exception as e:
+            await alog_exception(e)
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class RefreshTokenView(AsyncAPIView):
+    async def post(self, request, *args, **kwargs):
+        refresh_token = request.data.get("refresh")
+
+        if not refresh_token:
+            return Response(
+                {"message": "Refresh token is required!"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            refresh = await sync_to_async(FilteredRefreshToken)(refresh_token)
+            try:
+                student = await aget_student(refresh[api_settings.USER_ID_CLAIM], ('register_number', 'is_active'))
+            except (KeyError, Student.DoesNotExist):
+                raise TokenError("No active account found for the given token.")
+            if not student.is_active:
+                raise TokenError("No active account found for the given token.")
+
+            await sync_to_async(refresh.rotate)(student)
+
+            return Response(
+                {
+                    "access": str(refresh.access_token),
+                    "refresh": str(refresh)
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        except TokenError:
+            return Response(
+                {"message": "Invalid or expired refresh token."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        except Exception as e:
+            await alog_exception(e)
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class StudentView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        reg_no = request.GET.get('register_number', '').upper()
+
+        updated_at = await aget_profile_version(reg_no)
+        if updated_at is None:
+            return Response({"error": "Student not found"}, status=404)
+
+        etag = profile_etag(reg_no, updated_at)
+        last_modified = updated_at.timestamp()
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        try:
+            data = await aget_profile(reg_no, updated_at, lambda: aget_student(reg_no, PROFILE_FIELDS))
+        except Student.DoesNotExist:
+            return Response({"error": "Student not found"}, status=404)
+
+        response = Response(data, status=200)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    async def post(self, request):
+        try:
+            data = request.data
+            reg_no = data.get("register_number", "").upper()
+            otp = data.get("otp", "").strip()
+
+            student = await aget_student(reg_no, PROFILE_FIELDS)
+            phone_number = international_number(student.phone_number)
+
+            if not otp:
+                generated_otp = str(random.randint(100000, 999999))
+                await get_otp_store().aissue(student.register_number, generated_otp, cooldown=False)
+
+                delivery = await aenqueue_sms(phone_number, f"Your OTP is {generated_otp}")
+
+                return Response({
+                    "message": "OTP sent to registered mobile number",
+                    "delivery_id": str(delivery.id)
+                }, status=200)
+
+            await acheck_otp(student.register_number, otp)
+
+            changes = {
+                field: parse_date(data[field]) if field == 'dob' else data[field]
+                for field in EDITABLE_FIELDS if data.get(field)
+            }
+            await asave_profile_changes(student, changes)
+            return Response({"message": "Student data updated successfully"}, status=200)
+
+        except OTPRejected as e:
+            return Response({"error": str(e)}, status=400)
+        except Student.DoesNotExist:
+            return Response({"error": "Student not found"}, status=404)
+        except Exception as e:
+            await alog_exception(e)
+            return Response({"error": str(e)}, status=500)
+
+    async def patch(self, request):
+        serializer = StudentProfileUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        otp = changes.pop('otp')
+        if not changes:
+            return Response({"error": "No profile fields to update"}, status=400)
+
+        reg_no = request.user.pk
+        try:
+            await acheck_otp(reg_no, otp)
+            student = await aget_student(reg_no, PROFILE_FIELDS)
+            updated = await asave_profile_changes(student, changes)
+            return Response({"message": "Student data updated successfully", "updated_fields": updated}, status=200)
+        except OTPRejected as e:
+            return Response({"error": str(e)}, status=400)
+        except Student.DoesNotExist:
+            return Response({"error": "Student not found"}, status=404)
+        except Exception as e:
+            await alog_exception(e)
+            return Response({"error": str(e)}, status=500)
+
+
+class ForgotPasswordView(AsyncAPIView):
+    throttle_classes = [OTPRequestThrottle]
+
+    async def post(self, request):
+        serializer = ForgotPasswordSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reg_no = serializer.validated_data['register_number'].upper()
+        otp = serializer.validated_data.get('otp', '').strip()
+        new_password = serializer.validated_data.get('new_password', '')
+
+        try:
+            student = await aget_student(reg_no, TOKEN_FIELDS)
+
+            if not student.password:
+                return Response(
+                    {"error": "No password set for this account. Use registration process."},
+                    status=400
+                )
+
+            phone_number = international_number(student.phone_number)
+
+            if not otp and not new_password:
+                generated_otp = str(random.randint(100000, 999999))
+                if not await get_otp_store().aissue(student.register_number, generated_otp):
+                    return Response(
+                        {"error": "Please wait before requesting a new OTP."},
+                        status=429
+                    )
+
+                delivery = await aenqueue_sms(phone_number, f"Your password reset OTP is {generated_otp}")
+
+                return Response({
+                    "message": "Password reset OTP sent successfully",
+                    "phone_number": phone_number,
+                    "delivery_id": str(delivery.id)
+                }, status=200)
+
+            if otp and new_password:
+                try:
+                    await acheck_otp(student.register_number, otp)
+                except OTPRejected as e:
+                    await alog_exception(Exception(f"OTP check failed for {reg_no}: {e.result}"))
+                    return Response({"error": str(e)}, status=400)
+
+                student.password = await ahash_password(new_password)
+                await student.asave(update_fields=['password', 'updated_at'])
+
+                refresh = await aissue_tokens(student)
+
+                return Response({
+                    "message": "Password reset successfully",
+                    "access": str(refresh.access_token),
+                    "refresh": str(refresh),
+                    "name": student.name,
+                    "register_number": student.register_number,
+                    "phone_number": student.phone_number,
+                    "email": student.email if student.email else ""
+                }, status=200)
+
+            return Response(
+                {"error": "Both OTP and new password are required to reset password"},
+                status=400
+            )
+
+        except Student.DoesNotExist:
+            return Response({"error": "Register number not found"}, status=404)
+        except HashingBusy:
+            return busy_response()
+        except Exception as e:
+            await alog_exception(e)
+            return Response({"error": str(e)}, status=500)
+
+
+class SMSStatusView(AsyncAPIView):
+    permission_classes = [IsAuthenticated, IsStaffOrDeliveryOwner]
+
+    async def get(self, request, delivery_id):
+        try:
+            delivery = await SMSDelivery.objects.only('to', 'status', 'attempts', 'updated_at').aget(pk=delivery_id)
+        except SMSDelivery.DoesNotExist:
+            return Response({"error": "Delivery not found"}, status=404)
+        # May look the student's phone number up.
+        await sync_to_async(self.check_object_permissions)(request, delivery)
+
+        return Response({
+            "delivery_id": str(delivery_id),
+            "status": delivery.status,
+            "attempts": delivery.attempts,
+            "updated_at": delivery.updated_at.isoformat()
+        }, status=200)
+
+
+class TopErrorsView(AsyncAPIView):
+    permission_classes = [IsAdminUser]
+
+    async def get(self, request):
+        until = parse_datetime(request.GET.get('until', '')) or timezone.now()
+        since = parse_datetime(request.GET.get('since', '')) or until - timedelta(hours=24)
+        try:
+            limit = min(int(request.GET.get('limit', 20)), 100)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+
+        return Response({
+            "since": since.isoformat(),
+            "until": until.isoformat(),
+            "errors": await sync_to_async(top_errors)(since, until, limit=limit)
+        }, status=200)
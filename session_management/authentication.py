@@ -0,0 +1,99 @@
+"""
+JWT authentication without a Student query per request.
+
+CachedJWTAuthentication resolves the token's register_number through a bounded
+per-process LRU cache whose entries expire after JWT_USER_CACHE_TTL seconds and
+are dropped whenever the Student row is saved or deleted in this process (see
+signals.py). With JWT_STATELESS_USER the user is built from the token claims
+alone and the database is never touched.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from session_management.blacklist import FilteredRefreshToken
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = LRUCache(settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if settings.JWT_STATELESS_USER:
+            return JWTStatelessUserAuthentication.get_user(self, validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        else:
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+            if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False) and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # Views get their own copy so nothing they do leaks into the shared cache.
+        return copy.copy(user)
+
+
+def issue_tokens(student):
+    """
+    Refresh token for `student` carrying the claims stateless authentication needs.
+    The access token derived from it inherits the same claims.
+    """
+    refresh = FilteredRefreshToken.for_user(student)
+    refresh['name'] = student.name
+    refresh['is_staff'] = student.is_staff
+    return refresh
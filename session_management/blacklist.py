@@ -0,0 +1,202 @@
+"""
+Refresh-token blacklist: membership filter, rotation and expiry.
+
+Every refresh token is recorded as an OutstandingToken and every rotated or
+logged-out one as a BlacklistedToken (rest_framework_simplejwt.token_blacklist).
+Three pieces keep that cheap at scale:
+
+* blacklist_filter is a per-process Bloom filter over blacklisted jtis. It is
+  topped up with rows whose id is above the last one seen, at most once every
+  TOKEN_BLACKLIST_FILTER_MAX_AGE seconds, and rebuilt from scratch every
+  TOKEN_BLACKLIST_FILTER_REBUILD_SECONDS (or when it outgrows its capacity).
+  A "no" from the filter skips the blacklist query; a "maybe" falls back to it.
+* FilteredRefreshToken.rotate() blacklists the presented token with
+  get_or_create inside a transaction, so of two requests racing with the same
+  token exactly one gets a new pair, even if this process's filter is stale.
+* prune_tokens() deletes expired OutstandingToken rows (their BlacklistedToken
+  rows cascade) in batches; it is registered with the retention scheduler and
+  run by `manage.py prune_tokens`.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenBlacklistSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+from session_management import metrics
+from session_management.instrumentation import timed
+from session_management.retention import delete_in_batches, estimate_rows, scheduler
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` items at `error_rate` false positives."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """Incrementally refreshed Bloom filter over BlacklistedToken jtis."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop everything; the next lookup reloads the filter from the database."""
+        with self._lock:
+            self._bloom = None
+            self._last_id = 0
+            self._synced_at = 0.0
+            self._built_at = 0.0
+
+    def add(self, jti):
+        """Record a jti blacklisted by this process without waiting for the next sync."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def might_contain(self, jti):
+        self._sync()
+        return jti in self._bloom
+
+    def _sync(self):
+        now = time.monotonic()
+        if self._bloom is not None and now - self._synced_at < settings.TOKEN_BLACKLIST_FILTER_MAX_AGE:
+            return
+        with self._lock:
+            if self._bloom is not None and now - self._synced_at < settings.TOKEN_BLACKLIST_FILTER_MAX_AGE:
+                return
+            bloom, last_id = self._bloom, self._last_id
+            if bloom is None or now - self._built_at >= settings.TOKEN_BLACKLIST_FILTER_REBUILD_SECONDS:
+                # Rebuilding also forgets tokens pruned since the last build.
+                bloom, last_id = None, 0
+            rows = list(
+                BlacklistedToken.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'token__jti')
+            )
+            if bloom is None or bloom.count + len(rows) > bloom.capacity:
+                if bloom is not None:
+                    rows = list(BlacklistedToken.objects.order_by('id').values_list('id', 'token__jti'))
+                capacity = max(settings.TOKEN_BLACKLIST_FILTER_CAPACITY, 2 * len(rows))
+                bloom = BloomFilter(capacity, settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE)
+                self._built_at = now
+            for row_id, jti in rows:
+                bloom.add(jti)
+                last_id = row_id
+            self._bloom, self._last_id, self._synced_at = bloom, last_id, now
+            metrics.set_gauge('token_blacklist_filter_items', bloom.count)
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class TimedAccessToken(AccessToken):
+    def __str__(self):
+        with timed('jwt'):
+            return super().__str__()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check consults blacklist_filter before the database."""
+    access_token_class = TimedAccessToken
+
+    def __str__(self):
+        with timed('jwt'):
+            return super().__str__()
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if settings.TOKEN_BLACKLIST_FILTER and not blacklist_filter.might_contain(jti):
+            metrics.incr('token_blacklist_checks_total', result='filtered')
+            return
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            metrics.incr('token_blacklist_checks_total', result='blacklisted')
+            raise TokenError(_("Token is blacklisted"))
+        metrics.incr('token_blacklist_checks_total', result='false_positive')
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+    def rotate(self, user):
+        """
+        Blacklist this token and turn it into a fresh one for `user` in place.
+        Raises TokenError if the token was already blacklisted, which is how a
+        concurrent or replayed refresh of the same token is rejected.
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        with transaction.atomic():
+            outstanding, _created = OutstandingToken.objects.get_or_create(
+                jti=jti,
+                defaults={
+                    'user': user,
+                    'created_at': self.current_time,
+                    'token': str(self),
+                    'expires_at': datetime_from_epoch(self.payload['exp']),
+                },
+            )
+            _blacklisted, created = BlacklistedToken.objects.get_or_create(token=outstanding)
+            if not created:
+                raise TokenError(_("Token is blacklisted"))
+
+            self.set_jti()
+            self.set_exp()
+            self.set_iat()
+            OutstandingToken.objects.create(
+                user=user,
+                jti=self.payload[api_settings.JTI_CLAIM],
+                token=str(self),
+                created_at=self.current_time,
+                expires_at=datetime_from_epoch(self.payload['exp']),
+            )
+        blacklist_filter.add(jti)
+
+
+class FilteredTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = FilteredRefreshToken
+
+
+def prune_tokens(batch_size=None, dry_run=False):
+    """Delete expired outstanding tokens; their blacklist entries go with them."""
+    deleted = delete_in_batches(
+        OutstandingToken.objects.filter(expires_at__lte=aware_utcnow()),
+        batch_size=batch_size or settings.RETENTION_BATCH_SIZE,
+        pause=settings.RETENTION_BATCH_PAUSE,
+        dry_run=dry_run,
+    )
+    if not dry_run:
+        metrics.incr('retention_rows_pruned_total', deleted, table=OutstandingToken._meta.db_table)
+    for model in (OutstandingToken, BlacklistedToken):
+        metrics.set_gauge('retention_table_rows', estimate_rows(model), table=model._meta.db_table)
+    return deleted
+
+
+scheduler.register('tokens', prune_tokens)
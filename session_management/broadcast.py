@@ -0,0 +1,288 @@
+"""
+SMS broadcasts to a cohort of students, e.g. every Y22CSE student about a drive.
+
+create_broadcast() records the message and its audience (a register-number
+prefix and/or explicit register numbers, active students only unless
+include_inactive). run_broadcast() then works through it in two phases, both
+checkpointed in the database, so a broadcast interrupted at any point carries
+on from where it stopped when it is run again:
+
+* resolve: matching students are read in register_number order, `chunk_size`
+  at a time, and stored as BroadcastRecipient rows; Broadcast.resolved_through
+  advances in the same transaction.
+* send: due pending recipients are taken a chunk at a time and sent by a pool
+  of BROADCAST_WORKERS threads through the SMS dispatcher, which applies the
+  backend's rate limit shared with OTP traffic. Each chunk's outcomes are
+  written back with one bulk_update; transient failures are retried with the
+  SMS backoff policy up to SMS_MAX_RETRIES. While every provider's circuit
+  breaker is open nothing is sent, and recipients wait for the next trial
+  send without using up a retry.
+
+Only the chunk in flight can be lost to a crash, and its recipients are sent
+again on resume. While a broadcast runs, a heartbeat thread touches its
+updated_at every third of BROADCAST_STALE_SECONDS, however long a chunk takes
+to send; one left RUNNING for BROADCAST_STALE_SECONDS has lost its runner and
+can be claimed by `manage.py run_broadcasts`. start_broadcast() runs one on a
+background thread of the web process.
+
+Set SMS_BACKEND to session_management.sms.StubBackend to try a broadcast
+without a provider account.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from session_management import metrics
+from session_management.importer import normalize_phone
+from session_management.models import Broadcast, BroadcastRecipient, Student
+from session_management.sms import SMSUnavailable, dispatcher, retry_delay
+
+logger = logging.getLogger(__name__)
+
+AUDIENCE_KEYS = ('prefix', 'register_numbers', 'include_inactive')
+
+
+def clean_audience(audience):
+    """
+    Validate an audience and return it in the stored form.
+
+    Raises:
+        ValueError: for unknown keys or an audience without a prefix or register numbers
+    """
+    unknown = sorted(set(audience) - set(AUDIENCE_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown audience filters: {', '.join(unknown)}")
+    cleaned = {}
+    prefix = str(audience.get('prefix') or '').strip().upper()
+    if prefix:
+        cleaned['prefix'] = prefix
+    numbers = [str(number).strip().upper() for number in audience.get('register_numbers') or [] if str(number).strip()]
+    if numbers:
+        cleaned['register_numbers'] = sorted(set(numbers))
+    if not cleaned:
+        raise ValueError("Choose an audience: a register number prefix or a list of register numbers")
+    if audience.get('include_inactive'):
+        cleaned['include_inactive'] = True
+    return cleaned
+
+
+def audience_queryset(audience):
+    """Students an audience covers, in register_number order. Staff accounts are never included."""
+    queryset = Student.objects.filter(is_staff=False)
+    if not audience.get('include_inactive'):
+        queryset = queryset.filter(is_active=True)
+    if audience.get('prefix'):
+        queryset = queryset.filter(register_number__startswith=audience['prefix'])
+    if audience.get('register_numbers'):
+        queryset = queryset.filter(register_number__in=audience['register_numbers'])
+    return queryset.order_by('register_number')
+
+
+def create_broadcast(body, audience, created_by_id=None):
+    return Broadcast.objects.create(body=body, audience=clean_audience(audience), created_by_id=created_by_id)
+
+
+def broadcast_summary(broadcast):
+    return {
+        'id': broadcast.pk,
+        'status': broadcast.status,
+        'audience': broadcast.audience,
+        'recipients': broadcast.recipients,
+        'resolved': broadcast.resolved,
+        'sent': broadcast.sent,
+        'failed': broadcast.failed,
+        'pending': broadcast.recipients - broadcast.sent - broadcast.failed,
+        'created_at': broadcast.created_at.isoformat(),
+        'finished_at': broadcast.finished_at.isoformat() if broadcast.finished_at else None,
+    }
+
+
+def claim_broadcast(broadcast_id):
+    """
+    Mark a broadcast RUNNING for this caller. Returns False if it is finished
+    or another runner has touched it within BROADCAST_STALE_SECONDS.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.BROADCAST_STALE_SECONDS)
+    return Broadcast.objects.filter(
+        Q(status=Broadcast.QUEUED) | Q(status=Broadcast.RUNNING, updated_at__lt=stale),
+        pk=broadcast_id,
+    ).update(status=Broadcast.RUNNING, updated_at=now) == 1
+
+
+def resolve_recipients(broadcast, chunk_size):
+    """Add the next unresolved students of the audience as recipients, one chunk per transaction."""
+    queryset = audience_queryset(broadcast.audience)
+    while not broadcast.resolved:
+        page = queryset
+        if broadcast.resolved_through:
+            page = page.filter(register_number__gt=broadcast.resolved_through)
+        rows = list(page.values_list('register_number', 'phone_number')[:chunk_size])
+        with transaction.atomic():
+            if rows:
+                BroadcastRecipient.objects.bulk_create(
+                    [
+                        BroadcastRecipient(broadcast=broadcast, register_number=reg_no, to=normalize_phone(phone))
+                        for reg_no, phone in rows
+                    ],
+                    ignore_conflicts=True,
+                )
+                broadcast.resolved_through = rows[-1][0]
+                broadcast.recipients += len(rows)
+            broadcast.resolved = len(rows) < chunk_size
+            broadcast.save(update_fields=['resolved_through', 'resolved', 'recipients', 'updated_at'])
+
+
+def _send(recipient, body):
+    try:
+        return recipient, dispatcher.send(recipient.to, body), None
+    except Exception as e:
+        return recipient, None, e
+
+
+def _record_chunk(broadcast, results):
+    """Write one chunk's outcomes back and add them to the broadcast's counters."""
+    now = timezone.now()
+    sent = failed = 0
+    recipients = []
+    for recipient, message_id, error in results:
+        recipient.updated_at = now
+        recipients.append(recipient)
+        if isinstance(error, SMSUnavailable):
+            # Every breaker is open and nothing was sent: wait for a trial send, without using up a retry.
+            recipient.last_error = str(error)
+            recipient.next_attempt_at = now + timedelta(seconds=error.retry_after)
+            continue
+        recipient.attempts += 1
+        if error is None:
+            recipient.status = BroadcastRecipient.SENT
+            recipient.provider_message_id = message_id or ''
+            recipient.last_error = ''
+            sent += 1
+        else:
+            recipient.last_error = str(error)
+            delay = retry_delay(error, recipient.attempts)
+            if delay is None:
+                recipient.status = BroadcastRecipient.FAILED
+                failed += 1
+            else:
+                recipient.next_attempt_at = now + timedelta(seconds=delay)
+
+    with transaction.atomic():
+        BroadcastRecipient.objects.bulk_update(
+            recipients,
+            ['status', 'attempts', 'next_attempt_at', 'provider_message_id', 'last_error', 'updated_at'],
+        )
+        Broadcast.objects.filter(pk=broadcast.pk).update(
+            sent=F('sent') + sent, failed=F('failed') + failed, updated_at=now,
+        )
+    metrics.incr('broadcast_messages_total', sent, status='sent')
+    metrics.incr('broadcast_messages_total', failed, status='failed')
+    metrics.incr('broadcast_messages_total', len(recipients) - sent - failed, status='retry')
+
+
+def send_recipients(broadcast, chunk_size, workers, progress=None):
+    """Send to every pending recipient, waiting out retry backoffs, until none are left or it is cancelled."""
+    pending = BroadcastRecipient.objects.filter(broadcast=broadcast, status=BroadcastRecipient.PENDING)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='broadcast') as pool:
+        while True:
+            broadcast.refresh_from_db(fields=['status', 'sent', 'failed'])
+            if broadcast.status == Broadcast.CANCELLED:
+                return
+
+            chunk = list(pending.filter(next_attempt_at__lte=timezone.now()).order_by('next_attempt_at', 'id')[:chunk_size])
+            if not chunk:
+                next_due = pending.order_by('next_attempt_at').values_list('next_attempt_at', flat=True).first()
+                if next_due is None:
+                    return
+                time.sleep(max(0.0, (next_due - timezone.now()).total_seconds()))
+                continue
+
+            _record_chunk(broadcast, list(pool.map(lambda recipient: _send(recipient, broadcast.body), chunk)))
+            if progress:
+                broadcast.refresh_from_db(fields=['sent', 'failed'])
+                progress(broadcast)
+
+
+@contextmanager
+def heartbeat(broadcast_id, interval):
+    """
+    Touch a running broadcast's updated_at every `interval` seconds on a
+    background thread for as long as the block runs, so claim_broadcast()
+    does not hand it to another runner in the middle of a slow chunk.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    Broadcast.objects.filter(pk=broadcast_id, status=Broadcast.RUNNING).update(
+                        updated_at=timezone.now(),
+                    )
+                except Exception:
+                    logger.exception("Heartbeat for broadcast %s failed", broadcast_id)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"broadcast-{broadcast_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_broadcast(broadcast, chunk_size=None, workers=None, progress=None):
+    """
+    Resolve and send a claimed broadcast (see claim_broadcast()) to completion.
+    Safe to call again on a broadcast that was interrupted.
+    """
+    chunk_size = chunk_size or settings.BROADCAST_CHUNK_SIZE
+    workers = workers or settings.BROADCAST_WORKERS
+
+    with heartbeat(broadcast.pk, settings.BROADCAST_STALE_SECONDS / 3):
+        resolve_recipients(broadcast, chunk_size)
+        send_recipients(broadcast, chunk_size, workers, progress=progress)
+
+    Broadcast.objects.filter(pk=broadcast.pk, status=Broadcast.RUNNING).update(
+        status=Broadcast.COMPLETED, finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+    broadcast.refresh_from_db()
+    return broadcast
+
+
+def cancel_broadcast(broadcast_id):
+    """Stop a broadcast after its current chunk. Returns False if it had already finished."""
+    return Broadcast.objects.filter(
+        pk=broadcast_id, status__in=[Broadcast.QUEUED, Broadcast.RUNNING],
+    ).update(status=Broadcast.CANCELLED, finished_at=timezone.now(), updated_at=timezone.now()) == 1
+
+
+def _run_in_background(broadcast_id):
+    try:
+        if claim_broadcast(broadcast_id):
+            run_broadcast(Broadcast.objects.get(pk=broadcast_id))
+    except Exception:
+        logger.exception("Broadcast %s stopped", broadcast_id)
+    finally:
+        close_old_connections()
+
+
+def start_broadcast(broadcast):
+    """Run a broadcast on a daemon thread once the current transaction commits."""
+    def start():
+        threading.Thread(
+            target=_run_in_background, args=(broadcast.pk,), name=f"broadcast-{broadcast.pk}", daemon=True,
+        ).start()
+
+    transaction.on_commit(start)
@@ -0,0 +1,189 @@
+"""
+Placement-drive eligibility, evaluated for the whole roster at once.
+
+A drive has one or more EligibilityCriteria rule sets; a student is eligible if
+their AcademicRecord satisfies any of them. Each rule set is evaluated in bulk:
+
+* the simple conditions (branches, batch years, minimum scores, backlog limits,
+  lateral entry) become one SQL WHERE clause, served by the
+  (batch_year, branch, cgpa) index;
+* a compound `expression` such as "cgpa >= 8 or (cgpa >= 7 and
+  twelfth_percentage >= 85)" is then evaluated with pandas over the rows that
+  passed the SQL filter, one vectorized pass instead of a check per student.
+
+Results are materialized as DriveEligibility rows. refresh_eligibility()
+rebuilds them from scratch the first time (and whenever a drive's criteria
+change, see signals.py); after that it re-evaluates only students whose
+Student or AcademicRecord row changed since the drive's evaluated_at.
+"""
+import ast
+import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from session_management.importer import iter_batches
+from session_management.models import AcademicRecord, DriveEligibility, PlacementDrive, Student
+
+# Columns a criteria expression may refer to.
+EXPRESSION_COLUMNS = (
+    'branch', 'batch_year', 'lateral_entry', 'cgpa', 'tenth_percentage', 'twelfth_percentage',
+    'active_backlogs', 'total_backlogs',
+)
+DECIMAL_COLUMNS = ('cgpa', 'tenth_percentage', 'twelfth_percentage')
+EXPRESSION_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.Compare,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple,
+)
+# Register numbers per query when re-evaluating only changed students.
+CHUNK_SIZE = 1000
+
+
+def validate_expression(expression):
+    """
+    Check that `expression` is a condition (a comparison, or conditions
+    combined with and/or/not) that only compares and does arithmetic on
+    EXPRESSION_COLUMNS and literals.
+
+    Raises:
+        ValueError: describing the first thing that is not allowed
+    """
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+    for node in ast.walk(tree):
+        if not isinstance(node, EXPRESSION_NODES):
+            raise ValueError(f"Expressions may not use {type(node).__name__}")
+        if isinstance(node, ast.Name) and node.id not in EXPRESSION_COLUMNS:
+            raise ValueError(f"Unknown column in expression: {node.id}")
+    if not _is_condition(tree.body):
+        raise ValueError("Expression must be a condition, e.g. cgpa >= 7.5")
+
+
+def _is_condition(node):
+    """Whether `node` evaluates to true or false rather than a number or column."""
+    if isinstance(node, ast.Compare):
+        return True
+    if isinstance(node, ast.BoolOp):
+        return all(_is_condition(value) for value in node.values)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return _is_condition(node.operand)
+    return False
+
+
+def criteria_filter(criteria):
+    """The SQL part of a rule set, as a Q over AcademicRecord."""
+    conditions = Q(student__is_active=True)
+    if criteria.branches:
+        conditions &= Q(branch__in=criteria.branches)
+    if criteria.batch_years:
+        conditions &= Q(batch_year__in=criteria.batch_years)
+    if criteria.min_cgpa is not None:
+        conditions &= Q(cgpa__gte=criteria.min_cgpa)
+    if criteria.min_tenth_percentage is not None:
+        conditions &= Q(tenth_percentage__gte=criteria.min_tenth_percentage)
+    if criteria.min_twelfth_percentage is not None:
+        conditions &= Q(twelfth_percentage__gte=criteria.min_twelfth_percentage)
+    if criteria.max_active_backlogs is not None:
+        conditions &= Q(active_backlogs__lte=criteria.max_active_backlogs)
+    if criteria.max_total_backlogs is not None:
+        conditions &= Q(total_backlogs__lte=criteria.max_total_backlogs)
+    if not criteria.allow_lateral_entry:
+        conditions &= Q(lateral_entry=False)
+    return conditions
+
+
+def evaluate_expression(queryset, expression):
+    """Register numbers of the AcademicRecords in `queryset` for which `expression` holds."""
+    import pandas as pd
+
+    validate_expression(expression)
+    rows = list(queryset.values_list('student_id', *EXPRESSION_COLUMNS))
+    if not rows:
+        return []
+    frame = pd.DataFrame.from_records(rows, columns=['register_number', *EXPRESSION_COLUMNS])
+    for column in DECIMAL_COLUMNS:
+        # Decimals arrive as objects; missing scores become NaN and fail every comparison.
+        frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    mask = frame.eval(expression)
+    if getattr(mask, 'dtype', None) != bool:
+        raise ValueError("Expression must evaluate to true or false for each student")
+    return frame.loc[mask, 'register_number'].tolist()
+
+
+def eligible_students(drive, register_numbers=None):
+    """
+    Register numbers eligible for `drive`, optionally only among
+    `register_numbers`.
+    """
+    eligible = set()
+    for criteria in drive.criteria.all():
+        queryset = AcademicRecord.objects.filter(criteria_filter(criteria))
+        if register_numbers is not None:
+            queryset = queryset.filter(student_id__in=register_numbers)
+        if criteria.expression:
+            eligible.update(evaluate_expression(queryset, criteria.expression))
+        else:
+            eligible.update(queryset.values_list('student_id', flat=True))
+    return eligible
+
+
+def changed_students(since):
+    """Register numbers whose Student or AcademicRecord row changed after `since`."""
+    changed = set(AcademicRecord.objects.filter(updated_at__gt=since).values_list('student_id', flat=True))
+    changed.update(Student.objects.filter(updated_at__gt=since).values_list('register_number', flat=True))
+    return sorted(changed)
+
+
+def refresh_eligibility(drive, full=False):
+    """
+    Bring the drive's DriveEligibility rows up to date and return a summary.
+    Only students changed since the last refresh are re-evaluated unless
+    `full` is set or the drive has never been (or must be re-) evaluated.
+
+    Refreshes of the same drive are serialized on its row, so a second caller
+    waits and then only picks up what changed in the meantime.
+    """
+    started = time.monotonic()
+    with transaction.atomic():
+        previous = PlacementDrive.objects.select_for_update().values_list('evaluated_at', flat=True).get(pk=drive.pk)
+        evaluated_at = timezone.now()
+        full = full or previous is None
+
+        if full:
+            evaluated = None
+            eligible = eligible_students(drive)
+            existing = set(DriveEligibility.objects.filter(drive=drive).values_list('student_id', flat=True))
+        else:
+            candidates = changed_students(previous)
+            evaluated = len(candidates)
+            eligible, existing = set(), set()
+            for chunk in iter_batches(candidates, CHUNK_SIZE):
+                eligible |= eligible_students(drive, chunk)
+                existing.update(
+                    DriveEligibility.objects.filter(drive=drive, student_id__in=chunk).values_list('student_id', flat=True)
+                )
+
+        added, removed = eligible - existing, existing - eligible
+        DriveEligibility.objects.bulk_create(
+            [DriveEligibility(drive=drive, student_id=reg_no, evaluated_at=evaluated_at) for reg_no in sorted(added)],
+            batch_size=CHUNK_SIZE,
+            ignore_conflicts=True,
+        )
+        for chunk in iter_batches(sorted(removed), CHUNK_SIZE):
+            DriveEligibility.objects.filter(drive=drive, student_id__in=chunk).delete()
+        PlacementDrive.objects.filter(pk=drive.pk).update(evaluated_at=evaluated_at)
+    drive.evaluated_at = evaluated_at
+
+    return {
+        'drive': drive.pk,
+        'full': full,
+        'evaluated': evaluated,
+        'added': len(added),
+        'removed': len(removed),
+        'eligible': DriveEligibility.objects.filter(drive=drive).count(),
+        'seconds': round(time.monotonic() - started, 3),
+    }
@@ -0,0 +1,188 @@
+"""
+Error fingerprinting and rollups.
+
+Each logged error gets a fingerprint built from its exception type and its
+traceback frames with line numbers stripped (or, for exceptions that were never
+raised, a normalized message). record_errors() writes the raw ErrorLogs rows and
+folds the same batch into ErrorFingerprint (totals, first/last seen, a few
+sample traces) and hourly ErrorOccurrenceBucket counts. Raw rows expire after
+ERROR_LOG_RETENTION_DAYS; the rollups are what staff query.
+"""
+import hashlib
+import os
+import re
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from session_management import metrics
+from session_management.models import ErrorLogs, ErrorFingerprint, ErrorOccurrenceBucket
+from session_management.retention import delete_in_batches, scheduler
+
+MAX_SAMPLES = 5
+_VOLATILE = re.compile(r"0x[0-9a-fA-F]+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|\d+")
+
+
+def normalize_message(message):
+    """Replace numbers, ids and addresses so one failure mode maps to one message."""
+    return _VOLATILE.sub('<n>', str(message))[:500]
+
+
+def fingerprint_exception(e=None, message=''):
+    """Return (fingerprint, exception_type, normalized_message) for an error."""
+    exception_type = type(e).__qualname__ if e is not None else 'Error'
+    normalized = normalize_message(e if e is not None else message)
+    frames = []
+    if e is not None and e.__traceback__ is not None:
+        frames = [
+            f"{os.path.basename(frame.filename)}:{frame.name}"
+            for frame in traceback.extract_tb(e.__traceback__)
+        ]
+    parts = [exception_type] + (frames or [normalized])
+    fingerprint = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    return fingerprint, exception_type, normalized
+
+
+def _bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_errors(records):
+    """
+    Persist a batch of log_exception records: raw rows in one bulk_create, then
+    one upsert per distinct fingerprint and per (fingerprint, hour). The
+    fingerprint rows stay locked until the batch commits, so concurrent
+    batches do not drop each other's samples.
+    """
+    ErrorLogs.objects.bulk_create([
+        ErrorLogs(error=record, fingerprint=record.get('fingerprint', '')) for record in records
+    ])
+
+    groups = defaultdict(list)
+    for record in records:
+        if record.get('fingerprint'):
+            groups[record['fingerprint']].append(record)
+    if not groups:
+        return
+
+    with transaction.atomic():
+        now = timezone.now()
+        ErrorFingerprint.objects.bulk_create(
+            [
+                ErrorFingerprint(
+                    fingerprint=fingerprint,
+                    exception_type=group[0].get('exception_type', ''),
+                    message=group[0].get('message', ''),
+                    first_seen=_occurred_at(group[0], now),
+                    last_seen=_occurred_at(group[0], now),
+                )
+                for fingerprint, group in groups.items()
+            ],
+            ignore_conflicts=True,
+        )
+        # Lock the rollups (in pk order, so concurrent writers cannot deadlock) for the samples read-modify-write.
+        rollups = {
+            rollup.fingerprint: rollup
+            for rollup in ErrorFingerprint.objects.select_for_update()
+            .filter(fingerprint__in=list(groups)).order_by('pk')
+        }
+
+        bucket_counts = defaultdict(int)
+        for fingerprint, group in groups.items():
+            rollup = rollups[fingerprint]
+            last_seen = max(_occurred_at(record, now) for record in group)
+            ErrorFingerprint.objects.filter(pk=rollup.pk).update(
+                count=F('count') + len(group),
+                last_seen=Greatest(F('last_seen'), last_seen),
+            )
+            samples = rollup.samples + [
+                {
+                    'error': record.get('error'),
+                    'error_trace': record.get('error_trace'),
+                    'occurred_at': record.get('occurred_at'),
+                }
+                for record in group[-MAX_SAMPLES:]
+            ]
+            rollup.samples = samples[-MAX_SAMPLES:]
+            for record in group:
+                bucket_counts[(rollup.pk, _bucket(_occurred_at(record, now)))] += 1
+
+        ErrorFingerprint.objects.bulk_update(rollups.values(), ['samples'])
+
+        ErrorOccurrenceBucket.objects.bulk_create(
+            [
+                ErrorOccurrenceBucket(fingerprint_id=fingerprint_id, bucket_start=bucket_start)
+                for fingerprint_id, bucket_start in bucket_counts
+            ],
+            ignore_conflicts=True,
+        )
+        for (fingerprint_id, bucket_start), count in bucket_counts.items():
+            ErrorOccurrenceBucket.objects.filter(
+                fingerprint_id=fingerprint_id, bucket_start=bucket_start
+            ).update(count=F('count') + count)
+
+
+def _occurred_at(record, default):
+    occurred_at = parse_datetime(record.get('occurred_at') or '')
+    return occurred_at or default
+
+
+def top_errors(since, until, limit=20):
+    """Fingerprints with the most occurrences in the hourly buckets covering [since, until)."""
+    rows = (
+        ErrorOccurrenceBucket.objects
+        .filter(bucket_start__gte=_bucket(since), bucket_start__lt=until)
+        .values('fingerprint_id')
+        .annotate(occurrences=Sum('count'))
+        .order_by('-occurrences')[:limit]
+    )
+    rows = list(rows)
+    rollups = ErrorFingerprint.objects.in_bulk([row['fingerprint_id'] for row in rows])
+
+    results = []
+    for row in rows:
+        rollup = rollups[row['fingerprint_id']]
+        results.append({
+            'fingerprint': rollup.fingerprint,
+            'exception_type': rollup.exception_type,
+            'message': rollup.message,
+            'occurrences': row['occurrences'],
+            'total': rollup.count,
+            'first_seen': rollup.first_seen.isoformat(),
+            'last_seen': rollup.last_seen.isoformat(),
+            'samples': rollup.samples,
+        })
+    return results
+
+
+def prune_error_logs(batch_size=None, dry_run=False):
+    """Expire raw ErrorLogs rows and old hourly buckets; fingerprint totals are kept."""
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    now = timezone.now()
+    deleted = delete_in_batches(
+        ErrorLogs.objects.filter(updated_at__lt=now - timedelta(days=settings.ERROR_LOG_RETENTION_DAYS)),
+        batch_size=batch_size,
+        pause=settings.RETENTION_BATCH_PAUSE,
+        dry_run=dry_run,
+    )
+    deleted += delete_in_batches(
+        ErrorOccurrenceBucket.objects.filter(
+            bucket_start__lt=now - timedelta(days=settings.ERROR_ROLLUP_RETENTION_DAYS)
+        ),
+        batch_size=batch_size,
+        pause=settings.RETENTION_BATCH_PAUSE,
+        dry_run=dry_run,
+    )
+    if not dry_run:
+        metrics.incr('retention_rows_pruned_total', deleted, table=ErrorLogs._meta.db_table)
+    return deleted
+
+
+scheduler.register('error_logs', prune_error_logs)
@@ -0,0 +1,137 @@
+"""
+Streaming export of the Student table to CSV or XLSX.
+
+Rows are read with QuerySet.iterator(), which uses a server-side cursor on
+PostgreSQL, so only one chunk of students is in memory at a time. CSV is
+produced row by row and the first bytes go out as soon as the first chunk is
+fetched. XLSX is a zip archive whose index is written last, so it cannot be
+sent before the final row: openpyxl's write-only mode builds it in a temporary
+file (memory stays flat) and the file is then streamed out in blocks.
+
+The register number, name and phone columns use the roster headings that
+StudentImporter reads, so an export can be imported again.
+"""
+import csv
+import datetime
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from session_management.importer import REGISTER_COLUMN, NAME_COLUMN, PHONE_COLUMN
+from session_management.models import Student
+
+DEFAULT_CHUNK_SIZE = 2000
+# Bytes gathered before a CSV chunk is handed to the response.
+BUFFER_SIZE = 64 * 1024
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+HEADINGS = {
+    'register_number': REGISTER_COLUMN,
+    'name': NAME_COLUMN,
+    'phone_number': PHONE_COLUMN,
+}
+
+
+def headings(fields):
+    return [HEADINGS.get(field, field) for field in fields]
+
+
+def iter_students(fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield value tuples for `fields` for every student, ordered by register number."""
+    return Student.objects.order_by('register_number').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _xlsx_cell(value):
+    # Excel has no notion of time zones; write the local wall-clock time.
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+class _Buffer:
+    """File-like sink for csv.writer that keeps what was written until drained."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, value):
+        self.parts.append(value)
+        self.size += len(value)
+
+    def drain(self):
+        data = ''.join(self.parts).encode('utf-8')
+        self.parts, self.size = [], 0
+        return data
+
+
+def iter_csv(fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the CSV export as byte chunks of roughly BUFFER_SIZE."""
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    # A BOM so Excel opens the UTF-8 file with the right encoding.
+    buffer.write('\ufeff')
+    writer.writerow(headings(fields))
+    for row in iter_students(fields, chunk_size):
+        writer.writerow([_cell(value) for value in row])
+        if buffer.size >= BUFFER_SIZE:
+            yield buffer.drain()
+    if buffer.size:
+        yield buffer.drain()
+
+
+def write_xlsx(handle, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the XLSX export to the binary file object `handle`; returns the row count."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Students')
+    sheet.append(headings(fields))
+    count = 0
+    for row in iter_students(fields, chunk_size):
+        sheet.append([_xlsx_cell(value) for value in row])
+        count += 1
+    workbook.save(handle)
+    return count
+
+
+def iter_xlsx(fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the XLSX export in blocks, built in a temporary file first."""
+    with tempfile.TemporaryFile() as handle:
+        write_xlsx(handle, fields, chunk_size)
+        handle.seek(0)
+        while block := handle.read(BUFFER_SIZE):
+            yield block
+
+
+def iter_export(export_format, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    if export_format == 'xlsx':
+        return iter_xlsx(fields, chunk_size)
+    return iter_csv(fields, chunk_size)
+
+
+async def aiter_export(export_format, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    iter_export() for ASGI responses. Django would otherwise read a sync
+    iterator to the end before sending anything; here each chunk is produced in
+    the same worker thread (so the database cursor stays on one connection) and
+    sent as soon as it is ready.
+    """
+    chunks = iter_export(export_format, fields, chunk_size)
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk()) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
@@ -0,0 +1,29 @@
+"""
+Password hashers whose work factors come from settings, so each deployment can
+tune them to its hardware (see `manage.py benchmark_hashers`). They keep the
+stock algorithm names, so existing hashes still verify and are transparently
+re-hashed on the next successful login when the configured factor changes.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS or hashers.PBKDF2PasswordHasher.iterations
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR or hashers.ScryptPasswordHasher.work_factor
+
+    @property
+    def maxmem(self):
+        # scrypt needs ~128 * r * N bytes; OpenSSL's 32 MiB default is too small past N=2**14.
+        return scrypt_maxmem(self.work_factor, self.block_size)
+
+
+def scrypt_maxmem(work_factor, block_size):
+    return 2 * 128 * block_size * work_factor
@@ -0,0 +1,108 @@
+"""
+Bounded executor for password hashing.
+
+PBKDF2 and scrypt dominate the CPU cost of login and password changes. Running
+them through a fixed pool caps how many hashes a worker process computes at
+once (hashlib releases the GIL, so the pool threads run truly in parallel), and
+requests beyond the pool plus PASSWORD_HASH_QUEUE_SIZE waiting slots are shed
+with HashingBusy instead of piling up behind each other. The a-prefixed
+functions are for async views: they await the same pool without blocking the
+event loop.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from session_management import metrics
+from session_management.instrumentation import timed
+
+
+class HashingBusy(Exception):
+    """Every hashing slot is taken; the caller should answer 503 and let the client retry."""
+
+
+class HashingPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                self._slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE_SIZE)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hasher')
+
+    def run(self, fn, *args):
+        if self._executor is None:
+            self._start()
+        if not self._slots.acquire(blocking=False):
+            metrics.incr('password_hash_rejected_total')
+            raise HashingBusy("Too many password operations in progress")
+        try:
+            with timed('hash'):
+                return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    async def arun(self, fn, *args):
+        if self._executor is None:
+            self._start()
+        if not self._slots.acquire(blocking=False):
+            metrics.incr('password_hash_rejected_total')
+            raise HashingBusy("Too many password operations in progress")
+        try:
+            with timed('hash'):
+                return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            self._slots.release()
+
+
+pool = HashingPool()
+
+
+def _check(password, encoded):
+    must_update = []
+    is_correct = check_password(password, encoded, setter=lambda raw: must_update.append(True))
+    return is_correct, bool(must_update)
+
+
+def hash_password(password):
+    return pool.run(make_password, password)
+
+
+def verify_password(password, encoded):
+    """Return (is_correct, must_update) without blocking more than the pool allows."""
+    return pool.run(_check, password, encoded)
+
+
+def check_user_password(user, password):
+    """
+    Check `password` against `user`, re-hashing it with the preferred hasher and
+    work factor when the stored hash is out of date.
+    """
+    is_correct, must_update = verify_password(password, user.password)
+    if is_correct and must_update:
+        user.password = hash_password(password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+async def ahash_password(password):
+    return await pool.arun(make_password, password)
+
+
+async def averify_password(password, encoded):
+    return await pool.arun(_check, password, encoded)
+
+
+async def acheck_user_password(user, password):
+    is_correct, must_update = await averify_password(password, user.password)
+    if is_correct and must_update:
+        user.password = await ahash_password(password)
+        await user.asave(update_fields=['password'])
+    return is_correct
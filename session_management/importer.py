@@ -0,0 +1,590 @@
+import csv
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from session_management.authentication import user_cache
+from session_management.models import AcademicRecord, Student
+from session_management.profile_cache import invalidate_profile
+
+REGISTER_COLUMN = 'Reg.No'
+NAME_COLUMN = 'Name of the Student'
+PHONE_COLUMN = 'Student No'
+
+DEFAULT_BATCH_SIZE = 1000
+UPSERT_FIELDS = ['name', 'phone_number', 'roster_hash', 'updated_at']
+# Student fields owned by the roster; a change to any of them changes roster_hash.
+ROSTER_FIELDS = ('register_number', 'name', 'phone_number')
+# roster_hash of a student RosterSync deactivated because they left the roster.
+REMOVED_HASH = 'removed'
+
+# Academic record columns (import_academics).
+CGPA_COLUMN = 'CGPA'
+TENTH_COLUMN = '10th %'
+TWELFTH_COLUMN = '12th %'
+ACTIVE_BACKLOGS_COLUMN = 'Active Backlogs'
+TOTAL_BACKLOGS_COLUMN = 'Total Backlogs'
+ACADEMIC_FIELDS = [
+    'branch', 'batch_year', 'lateral_entry', 'cgpa', 'tenth_percentage', 'twelfth_percentage',
+    'active_backlogs', 'total_backlogs',
+]
+ACADEMIC_UPSERT_FIELDS = ACADEMIC_FIELDS + ['updated_at']
+
+# Y22CSE279001: entry type (Y regular, L lateral), admission year, branch, roll number.
+REGISTER_NUMBER_PATTERN = re.compile(r'^(?P<entry>[A-Z])(?P<year>\d{2})(?P<branch>[A-Z]+)\d+$')
+
+
+def normalize_phone(value):
+    """
+    Turn a roster phone cell into the '+91XXXXXXXXXX' form the OTP views expect.
+    Excel hands numeric cells back as int/float, so strip the trailing '.0' first.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    phone_number = str(value).strip().replace(' ', '')
+    if phone_number and not phone_number.startswith('+91'):
+        phone_number = '+91' + phone_number.lstrip('0')
+    return phone_number
+
+
+def normalize_row(row):
+    """
+    Validate one roster row and return the Student fields it maps to.
+
+    Raises:
+        ValueError: if a required column is missing or empty
+    """
+    reg_no = str(row.get(REGISTER_COLUMN) or '').upper().strip()
+    name = str(row.get(NAME_COLUMN) or '').strip()
+    phone_number = normalize_phone(row.get(PHONE_COLUMN))
+
+    if not reg_no:
+        raise ValueError("Register number is missing")
+    if len(reg_no) > Student._meta.get_field('register_number').max_length:
+        raise ValueError(f"Register number is too long: {reg_no}")
+    if not name:
+        raise ValueError("Name is missing")
+    if not phone_number:
+        raise ValueError("Phone number is missing")
+    if len(phone_number) > Student._meta.get_field('phone_number').max_length:
+        raise ValueError(f"Phone number is too long: {phone_number}")
+
+    return {
+        'register_number': reg_no,
+        'name': name,
+        'phone_number': phone_number,
+    }
+
+
+def parse_register_number(register_number):
+    """
+    Return (branch, batch_year, lateral_entry) for a register number such as
+    Y22CSE279001. Lateral entries (L23...) join in the second year, so they
+    belong to the batch that started a year earlier.
+
+    Raises:
+        ValueError: if the register number does not have that shape
+    """
+    match = REGISTER_NUMBER_PATTERN.match(register_number)
+    if not match:
+        raise ValueError(f"Cannot read branch and batch from register number: {register_number}")
+    lateral_entry = match['entry'] == 'L'
+    batch_year = 2000 + int(match['year']) - (1 if lateral_entry else 0)
+    return match['branch'], batch_year, lateral_entry
+
+
+def _decimal(row, column, maximum):
+    value = row.get(column)
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        number = Decimal(str(value).strip().rstrip('%')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"{column} is not a number: {value}")
+    if not 0 <= number <= maximum:
+        raise ValueError(f"{column} must be between 0 and {maximum}: {value}")
+    return number
+
+
+def _count(row, column):
+    value = row.get(column)
+    if value is None or str(value).strip() == '':
+        return 0
+    try:
+        number = int(float(str(value).strip()))
+    except ValueError:
+        raise ValueError(f"{column} is not a whole number: {value}")
+    if number < 0:
+        raise ValueError(f"{column} cannot be negative: {value}")
+    return number
+
+
+def normalize_academic_row(row):
+    """
+    Validate one academic-records row and return the AcademicRecord fields it maps to.
+
+    Raises:
+        ValueError: if the register number is missing or malformed, or a score is out of range
+    """
+    reg_no = str(row.get(REGISTER_COLUMN) or '').upper().strip()
+    if not reg_no:
+        raise ValueError("Register number is missing")
+    branch, batch_year, lateral_entry = parse_register_number(reg_no)
+    active_backlogs = _count(row, ACTIVE_BACKLOGS_COLUMN)
+    return {
+        'register_number': reg_no,
+        'branch': branch,
+        'batch_year': batch_year,
+        'lateral_entry': lateral_entry,
+        'cgpa': _decimal(row, CGPA_COLUMN, 10),
+        'tenth_percentage': _decimal(row, TENTH_COLUMN, 100),
+        'twelfth_percentage': _decimal(row, TWELFTH_COLUMN, 100),
+        'active_backlogs': active_backlogs,
+        'total_backlogs': max(_count(row, TOTAL_BACKLOGS_COLUMN), active_backlogs),
+    }
+
+
+def roster_hash(record):
+    """Fingerprint of the roster fields of a normalize_row() result."""
+    data = '\x1f'.join(record[name] for name in ROSTER_FIELDS)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(file_path):
+    """SHA-1 of the file contents, so a checkpoint is only reused for the same roster."""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as handle:
+        while block := handle.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_roster_rows(file_path, sheet_name=None):
+    """
+    Stream (row_number, row_dict) pairs from an .xlsx or .csv roster without
+    loading the whole sheet into memory. row_number is the 1-based spreadsheet row.
+    """
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        with open(file_path, newline='', encoding='utf-8-sig') as handle:
+            for index, row in enumerate(csv.DictReader(handle), start=2):
+                yield index, row
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(cell).strip() if cell is not None else '' for cell in header]
+        for index, values in enumerate(rows, start=2):
+            if not any(value not in (None, '') for value in values):
+                continue
+            yield index, dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+def iter_batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def forget_cached_students(register_numbers):
+    """
+    Drop the cached user and profile of students written by bulk queries,
+    which send no post_save. The user cache lives in each process; other
+    workers see the change once their entries expire (JWT_USER_CACHE_TTL).
+    """
+    for reg_no in register_numbers:
+        user_cache.invalidate(reg_no)
+        invalidate_profile(reg_no)
+
+
+@dataclass
+class ImportReport:
+    processed: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deactivated: int = 0
+    batches: int = 0
+    dry_run: bool = False
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row_number, register_number, message):
+        self.errors.append({
+            'row': row_number,
+            'register_number': register_number or '',
+            'error': message,
+        })
+
+    def as_dict(self):
+        return {
+            'status': 'success',
+            'processed': self.processed,
+            'inserted': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'deactivated': self.deactivated,
+            'batches': self.batches,
+            'dry_run': self.dry_run,
+            'errors': self.errors,
+        }
+
+    def write_errors(self, path):
+        """Write the per-row error report as JSON (for *.json) or CSV."""
+        if path.lower().endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as handle:
+                json.dump(self.errors, handle, indent=2)
+            return
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.DictWriter(handle, fieldnames=['row', 'register_number', 'error'])
+            writer.writeheader()
+            writer.writerows(self.errors)
+
+
+class StudentImporter:
+    """
+    Upsert a roster into Student in fixed-size batches.
+
+    Each batch is validated in memory, then written inside its own transaction
+    with one query for the stored rows, a bulk_create for new students and a
+    bulk_update for those whose name or phone number changed, so a bad batch
+    never rolls back the batches before it. Unchanged students are not written
+    at all and keep their updated_at, which profile ETags, incremental
+    eligibility and the search index read as "changed since".
+    """
+
+    normalize = staticmethod(normalize_row)
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, progress=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.progress = progress
+
+    def run(self, file_path, sheet_name=None):
+        report = ImportReport(dry_run=self.dry_run)
+        rows = iter_roster_rows(file_path, sheet_name=sheet_name)
+        for batch in iter_batches(rows, self.batch_size):
+            self._import_batch(batch, report)
+            report.batches += 1
+            if self.progress:
+                self.progress(report)
+        return report
+
+    def _normalize_batch(self, batch, report):
+        records = {}
+        for row_number, row in batch:
+            report.processed += 1
+            try:
+                record = self.normalize(row)
+            except ValueError as e:
+                report.add_error(row_number, row.get(REGISTER_COLUMN), str(e))
+                continue
+
+            reg_no = record['register_number']
+            if reg_no in records:
+                previous_row, _ = records[reg_no]
+                report.add_error(previous_row, reg_no, f"Duplicate register number, superseded by row {row_number}")
+            records[reg_no] = (row_number, record)
+        return records
+
+    def _import_batch(self, batch, report):
+        records = self._normalize_batch(batch, report)
+        if not records:
+            return
+
+        created, changed = [], []
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                existing = {
+                    row[0]: row[1:]
+                    for row in Student.objects.filter(register_number__in=records.keys()).values_list(
+                        'register_number', 'name', 'phone_number',
+                    )
+                }
+                for reg_no, (_, record) in records.items():
+                    student = Student(updated_at=now, roster_hash=roster_hash(record), **record)
+                    if reg_no not in existing:
+                        created.append(student)
+                    elif existing[reg_no] != (record['name'], record['phone_number']):
+                        changed.append(student)
+
+                if not self.dry_run:
+                    # update_conflicts covers a student another import created since the query above.
+                    Student.objects.bulk_create(
+                        created,
+                        update_conflicts=True,
+                        unique_fields=['register_number'],
+                        update_fields=UPSERT_FIELDS,
+                    )
+                    Student.objects.bulk_update(changed, UPSERT_FIELDS)
+        except Exception as e:
+            for reg_no, (row_number, _) in records.items():
+                report.add_error(row_number, reg_no, f"Batch write failed: {e}")
+            return
+
+        if not self.dry_run:
+            forget_cached_students(student.register_number for student in changed)
+        report.created += len(created)
+        report.updated += len(changed)
+        report.unchanged += len(records) - len(created) - len(changed)
+
+
+class AcademicImporter(StudentImporter):
+    """
+    Upsert academic records (CGPA, 10th/12th percentages, backlogs) for
+    students already on the roster, batch by batch like StudentImporter.
+    Records whose values are unchanged are left alone, so they do not look
+    changed to the next incremental eligibility refresh.
+    """
+    normalize = staticmethod(normalize_academic_row)
+
+    def _import_batch(self, batch, report):
+        records = self._normalize_batch(batch, report)
+        if not records:
+            return
+
+        created, changed = [], []
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                students = set(
+                    Student.objects.filter(register_number__in=records.keys())
+                    .values_list('register_number', flat=True)
+                )
+                existing = {
+                    row[0]: row[1:]
+                    for row in AcademicRecord.objects.filter(student_id__in=students).values_list(
+                        'student_id', *ACADEMIC_FIELDS,
+                    )
+                }
+                for reg_no in sorted(records.keys() - students):
+                    report.add_error(records.pop(reg_no)[0], reg_no, "Register number is not on the roster")
+                for reg_no, (_, record) in records.items():
+                    values = {name: record[name] for name in ACADEMIC_FIELDS}
+                    academics = AcademicRecord(student_id=reg_no, updated_at=now, **values)
+                    if reg_no not in existing:
+                        created.append(academics)
+                    elif existing[reg_no] != tuple(values.values()):
+                        changed.append(academics)
+
+                if not self.dry_run:
+                    AcademicRecord.objects.bulk_create(
+                        created,
+                        update_conflicts=True,
+                        unique_fields=['student'],
+                        update_fields=ACADEMIC_UPSERT_FIELDS,
+                    )
+                    AcademicRecord.objects.bulk_update(changed, ACADEMIC_UPSERT_FIELDS)
+        except Exception as e:
+            for reg_no, (row_number, _) in records.items():
+                report.add_error(row_number, reg_no, f"Batch write failed: {e}")
+            return
+
+        report.created += len(created)
+        report.updated += len(changed)
+        report.unchanged += len(records) - len(created) - len(changed)
+
+
+class SyncCheckpoint:
+    """
+    JSON file recording how far a RosterSync got through one roster: the file's
+    fingerprint, the last spreadsheet row whose batch was committed and the
+    report so far. It is written after every batch and removed when the sync
+    finishes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, fingerprint):
+        """Saved state for the roster with this fingerprint, or None."""
+        try:
+            with open(self.path, encoding='utf-8') as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            return None
+        if state.get('fingerprint') != fingerprint:
+            return None
+        return state
+
+    def save(self, state):
+        # Write next to the target and rename, so an interruption never leaves half a file.
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump(state, handle, indent=2)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class RosterSync(StudentImporter):
+    """
+    Apply only what changed between a roster and the Student table.
+
+    Each batch costs one query for the stored roster_hash of its register
+    numbers; rows whose hash matches are skipped, new students are inserted
+    with bulk_create and changed ones rewritten with bulk_update on just the
+    columns that differ. With deactivate_missing, roster students absent from
+    the file are then marked inactive in batches (staff accounts and students
+    that never came from a roster are left alone) and reactivated if they
+    reappear in a later roster.
+
+    With a checkpoint_path, progress is saved after each committed batch and a
+    re-run on the same file resumes after the last saved row. A batch committed
+    just before an interruption but not yet checkpointed is simply found
+    unchanged the second time.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, progress=None,
+                 deactivate_missing=False, checkpoint_path=None):
+        super().__init__(batch_size=batch_size, dry_run=dry_run, progress=progress)
+        self.deactivate_missing = deactivate_missing
+        self.checkpoint = SyncCheckpoint(checkpoint_path) if checkpoint_path and not dry_run else None
+        self.resumed_after = 0
+
+    def run(self, file_path, sheet_name=None):
+        report = ImportReport(dry_run=self.dry_run)
+        fingerprint = state = None
+        if self.checkpoint:
+            fingerprint = file_fingerprint(file_path)
+            state = self.checkpoint.load(fingerprint)
+        if state:
+            self.resumed_after = state['row']
+            for name, value in state['report'].items():
+                setattr(report, name, value)
+
+        seen = set()
+        rows = self._pending_rows(iter_roster_rows(file_path, sheet_name=sheet_name), seen)
+        for batch in iter_batches(rows, self.batch_size):
+            self._import_batch(batch, report)
+            report.batches += 1
+            if self.checkpoint:
+                self.checkpoint.save({
+                    'file': os.path.abspath(file_path),
+                    'fingerprint': fingerprint,
+                    'row': batch[-1][0],
+                    'report': {
+                        name: getattr(report, name)
+                        for name in ('processed', 'created', 'updated', 'unchanged', 'batches', 'errors')
+                    },
+                })
+            if self.progress:
+                self.progress(report)
+
+        if self.deactivate_missing:
+            self._deactivate_missing(seen, report)
+        if self.checkpoint:
+            self.checkpoint.clear()
+        return report
+
+    def _pending_rows(self, rows, seen):
+        """
+        Note every register number in the file, including rows that fail
+        validation, and pass on only the rows after the checkpoint.
+        """
+        for row_number, row in rows:
+            reg_no = str(row.get(REGISTER_COLUMN) or '').upper().strip()
+            if reg_no:
+                seen.add(reg_no)
+            if row_number > self.resumed_after:
+                yield row_number, row
+
+    def _import_batch(self, batch, report):
+        records = self._normalize_batch(batch, report)
+        if not records:
+            return
+
+        created, changed = [], []
+        update_fields = set()
+        unchanged = 0
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                existing = {
+                    row[0]: row[1:]
+                    for row in Student.objects.filter(register_number__in=records.keys()).values_list(
+                        'register_number', 'roster_hash', 'name', 'phone_number', 'is_active',
+                    )
+                }
+                for reg_no, (_, record) in records.items():
+                    fingerprint = roster_hash(record)
+                    if reg_no not in existing:
+                        created.append(Student(updated_at=now, roster_hash=fingerprint, **record))
+                        continue
+                    stored_hash, name, phone_number, is_active = existing[reg_no]
+                    if stored_hash == fingerprint:
+                        unchanged += 1
+                        continue
+                    fields = {'roster_hash', 'updated_at'}
+                    if name != record['name']:
+                        fields.add('name')
+                    if phone_number != record['phone_number']:
+                        fields.add('phone_number')
+                    if stored_hash == REMOVED_HASH and not is_active:
+                        fields.add('is_active')
+                        is_active = True
+                    update_fields |= fields
+                    changed.append(Student(
+                        updated_at=now, roster_hash=fingerprint, is_active=is_active, **record,
+                    ))
+
+                if not self.dry_run:
+                    if created:
+                        Student.objects.bulk_create(created, batch_size=self.batch_size)
+                    if changed:
+                        Student.objects.bulk_update(changed, sorted(update_fields), batch_size=self.batch_size)
+        except Exception as e:
+            for reg_no, (row_number, _) in records.items():
+                report.add_error(row_number, reg_no, f"Batch write failed: {e}")
+            return
+
+        if not self.dry_run:
+            forget_cached_students(student.register_number for student in changed)
+        report.created += len(created)
+        report.updated += len(changed)
+        report.unchanged += unchanged
+
+    def _deactivate_missing(self, seen, report):
+        candidates = (
+            Student.objects.filter(is_active=True, is_staff=False)
+            .exclude(roster_hash__in=('', REMOVED_HASH))
+            .order_by('register_number')
+            .values_list('register_number', flat=True)
+            .iterator(chunk_size=self.batch_size)
+        )
+        missing = [reg_no for reg_no in candidates if reg_no not in seen]
+        if self.dry_run:
+            report.deactivated += len(missing)
+            return
+        now = timezone.now()
+        for chunk in iter_batches(missing, self.batch_size):
+            with transaction.atomic():
+                report.deactivated += Student.objects.filter(register_number__in=chunk, is_active=True).update(
+                    is_active=False, roster_hash=REMOVED_HASH, updated_at=now,
+                )
+            forget_cached_students(chunk)
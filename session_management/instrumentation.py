@@ -0,0 +1,147 @@
+"""
+Per-request timing breakdown.
+
+With settings.INSTRUMENTATION_ENABLED, InstrumentationMiddleware opens a timing
+record for each request in a context variable. Code on the request path adds
+to it through timed(): password hashing ('hash'), SMS provider calls ('sms')
+and JWT signing ('jwt'), while a database execute wrapper adds every query
+('db'). Context variables follow the request into sync_to_async threads, so
+async views are covered too.
+
+The middleware returns the record in a Server-Timing header and folds it into
+histograms per URL name, which the metrics/ endpoint exposes in Prometheus
+format. When the setting is off the middleware removes itself and timed() is a
+single context-variable lookup.
+"""
+import hmac
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseNotFound
+
+from session_management import metrics
+
+PHASES = ('db', 'hash', 'sms', 'jwt')
+
+_timings = ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to `phase` of the current request, if any."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - started
+        timings[f"{phase}_count"] = timings.get(f"{phase}_count", 0) + 1
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+def _install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def server_timing(timings, total):
+    entries = []
+    for phase in PHASES:
+        if phase in timings:
+            entries.append(f'{phase};dur={1000 * timings[phase]:.2f};desc="{timings[f"{phase}_count"]}x"')
+    entries.append(f"total;dur={1000 * total:.2f}")
+    return ', '.join(entries)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(_install_query_timer, dispatch_uid='session_management.instrumentation')
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _timings.set({})
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            self.record(request, response, _timings.get(), time.perf_counter() - started)
+            return response
+        finally:
+            _timings.reset(token)
+
+    async def __acall__(self, request):
+        token = _timings.set({})
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            self.record(request, response, _timings.get(), time.perf_counter() - started)
+            return response
+        finally:
+            _timings.reset(token)
+
+    def record(self, request, response, timings, total):
+        response['Server-Timing'] = server_timing(timings, total)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        metrics.incr('http_requests_total', view=view, method=request.method, status=response.status_code)
+        metrics.observe('http_request_duration_seconds', total, view=view)
+        for phase in PHASES:
+            if phase in timings:
+                metrics.observe('http_request_phase_seconds', timings[phase], view=view, phase=phase)
+        if 'db_count' in timings:
+            metrics.incr('http_request_db_queries_total', timings['db_count'], view=view)
+
+
+def _is_staff(request):
+    """Whether the caller is staff, by session login or by the API's own JWT authentication."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    from rest_framework.exceptions import AuthenticationFailed
+
+    from session_management.authentication import CachedJWTAuthentication
+
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of this worker's metrics registry, for callers
+    presenting METRICS_TOKEN (when set) or staff.
+    """
+    if not settings.INSTRUMENTATION_ENABLED:
+        return HttpResponseNotFound()
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    token_ok = bool(settings.METRICS_TOKEN) and hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode())
+    if not token_ok and not _is_staff(request):
+        return HttpResponse(status=401 if settings.METRICS_TOKEN else 403)
+    return HttpResponse(metrics.registry.render_prometheus(), content_type='text/plain; version=0.0.4')
@@ -1,60 +1,25 @@
-import pandas as pd
-from session_management.models import Student
+from session_management.importer import StudentImporter, DEFAULT_BATCH_SIZE
 
-def load_excel_data(file_path='Data.xlsx'):
+def load_excel_data(file_path='Data.xlsx', batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
     """
     Load register_number, name, and phone_number from an Excel file into the Student model.
     Other fields (dob, gender, father_name, mother_name, email, aadhar_number, password, updated_at)
-    are left as NULL.
-    
+    are left as NULL. Existing students are updated in place, so the import can be re-run.
+
+    Prefer `python manage.py import_students <file>`, which also reports progress
+    and can write a per-row error report.
+
     Args:
         file_path (str): Path to the Excel file (default: 'Data.xlsx')
-    
+        batch_size (int): Rows written per bulk upsert
+        dry_run (bool): Validate and count without writing
+
     Returns:
         dict: Summary of successful and failed insertions
     """
     try:
-        # Read Excel file
-        df = pd.read_excel(file_path)
-        success_count = 0
-        errors = []
-
-        # Insert each row into Student model
-        for index, row in df.iterrows():
-            try:
-                # Validate required fields
-                reg_no = str(row['Reg.No']).upper().strip()
-                name = str(row.get('Name of the Student', '')).strip()
-                phone_number = str(row.get('Student No', '')).strip()
-
-                if not reg_no:
-                    raise ValueError("Register number is missing")
-                if not name:
-                    raise ValueError("Name is missing")
-                if not phone_number:
-                    raise ValueError("Phone number is missing")
-
-                # Format phone number with +91
-                if not phone_number.startswith('+91'):
-                    phone_number = '+91' + phone_number.lstrip('0')
-
-                Student.objects.create(
-                    register_number=reg_no,
-                    name=name,
-                    phone_number=phone_number
-                )
-                print(f"Inserted student: {reg_no}")
-                success_count += 1
-            except Exception as e:
-                error_msg = f"Error inserting {row.get('Reg.No', 'unknown')}: {str(e)}"
-                print(error_msg)
-                errors.append(error_msg)
-
-        return {
-            'status': 'success',
-            'inserted': success_count,
-            'errors': errors
-        }
+        report = StudentImporter(batch_size=batch_size, dry_run=dry_run).run(file_path)
+        return report.as_dict()
     except Exception as e:
         print(f"Failed to load Excel file: {str(e)}")
         return {
@@ -64,4 +29,4 @@ def load_excel_data(file_path='Data.xlsx'):
         }
 
 if __name__ == '__main__':
-    load_excel_data()
\ No newline at end of file
+    load_excel_data()
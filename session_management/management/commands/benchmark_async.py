@@ -0,0 +1,120 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import override_settings
+
+from session_management import async_views, services, views
+from session_management.models import SMSDelivery, Student
+from session_management.sms import SMSBackend
+
+
+class SlowBackend(SMSBackend):
+    """Stands in for a provider that takes `latency` seconds to accept a message."""
+    name = 'benchmark'
+    latency = 0.2
+
+    def send(self, to, body):
+        time.sleep(self.latency)
+        return 'benchmark'
+
+    async def asend(self, to, body):
+        await asyncio.sleep(self.latency)
+        return 'benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare sync views on a thread pool with async views on one event loop, "
+        "sending OTPs through a provider with simulated latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=8, help="Worker threads for the sync views")
+        parser.add_argument('--concurrency', type=int, default=200, help="In-flight requests for the async views")
+        parser.add_argument('--latency', type=float, default=0.2, help="Simulated SMS provider latency in seconds")
+
+    def handle(self, *args, **options):
+        students = list(
+            Student.objects.filter(password__in=['', None]).values_list('register_number', flat=True)[:options['requests']]
+        )
+        if len(students) < options['requests']:
+            raise CommandError(
+                f"Need {options['requests']} students without a password; found {len(students)}."
+            )
+        SlowBackend.latency = options['latency']
+
+        overrides = override_settings(
+            SMS_BACKEND='session_management.management.commands.benchmark_async.SlowBackend',
+            SMS_EAGER=True,
+            SMS_RATE_LIMITS={},
+            SMS_RATE_LIMIT=0,
+            OTP_STORE_BACKEND='session_management.otp_store.LocMemOTPStore',
+            AUTH_THROTTLE_RATES={},
+        )
+        with overrides:
+            self.stdout.write(f"{'mode':<6} {'requests':>8} {'in flight':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+            for mode, run, width in (
+                ('sync', self._run_sync, options['threads']),
+                ('async', self._run_async, options['concurrency']),
+            ):
+                self._reset()
+                started = time.perf_counter()
+                latencies = run(students, width)
+                elapsed = time.perf_counter() - started
+                latencies.sort()
+                self.stdout.write(
+                    f"{mode:<6} {len(latencies):>8} {width:>9} {len(latencies) / elapsed:>8.1f} "
+                    f"{1000 * statistics.median(latencies):>8.1f} "
+                    f"{1000 * latencies[int(0.95 * (len(latencies) - 1))]:>8.1f}"
+                )
+        SMSDelivery.objects.filter(provider=SlowBackend.name).delete()
+
+    def _reset(self):
+        # The SMS backend and OTP store were built from settings; rebuild them from the overrides.
+        services.reset('sms_providers', 'otp_store')
+
+    def _run_sync(self, students, threads):
+        factory = RequestFactory()
+        view = views.RegisterCheckView.as_view()
+
+        def call(register_number):
+            request = factory.post(
+                '/auth/verify-register/', {'register_number': register_number}, content_type='application/json'
+            )
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            if response.status_code != 200:
+                raise CommandError(f"{register_number}: {response.status_code} {response.content[:200]}")
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(call, students))
+
+    def _run_async(self, students, concurrency):
+        factory = AsyncRequestFactory()
+        view = async_views.RegisterCheckView.as_view()
+
+        async def call(register_number, slots):
+            async with slots:
+                request = factory.post(
+                    '/auth/verify-register/', {'register_number': register_number}, content_type='application/json'
+                )
+                started = time.perf_counter()
+                response = await view(request)
+                await sync_to_async(response.render)()
+                if response.status_code != 200:
+                    raise CommandError(f"{register_number}: {response.status_code} {response.content[:200]}")
+                return time.perf_counter() - started
+
+        async def main():
+            slots = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(call(register_number, slots) for register_number in students))
+
+        return list(asyncio.run(main()))
@@ -0,0 +1,77 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from session_management import metrics
+from session_management.models import Student
+
+
+class Command(BaseCommand):
+    help = "Measure per-request latency of a one-row query with fresh, persistent and pooled connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--pool-size', type=int, default=4)
+
+    def handle(self, *args, **options):
+        register_number = Student.objects.values_list('register_number', flat=True).first()
+        if register_number is None:
+            raise CommandError("No students to query; import a roster first.")
+
+        base = connections.settings['default']
+        configs = {
+            'fresh': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+            'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+        }
+        if base['ENGINE'].endswith('postgresql'):
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                self.stdout.write("psycopg_pool is not installed; skipping the pooled run")
+            else:
+                configs['pooled'] = {
+                    'CONN_MAX_AGE': 0,
+                    'OPTIONS': {**base.get('OPTIONS', {}), 'pool': {'min_size': 1, 'max_size': options['pool_size']}},
+                }
+
+        self.stdout.write(f"{'mode':<11} {'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'connects':>9}")
+        for mode, overrides in configs.items():
+            alias = f"benchmark_{mode}"
+            settings_dict = {**copy.deepcopy(base), **overrides}
+            connections.settings[alias] = settings_dict
+            try:
+                latencies = self._run(alias, register_number, options['requests'])
+            finally:
+                connection = connections[alias]
+                connection.close()
+                if 'pool' in settings_dict['OPTIONS']:
+                    connection.close_pool()
+                del connections[alias]
+                del connections.settings[alias]
+
+            if 'pool' in settings_dict['OPTIONS']:
+                connects = metrics.registry.get('db_pool_connections_opened_total', alias=alias)
+            else:
+                connects = metrics.registry.get('db_connections_opened_total', alias=alias)
+            latencies.sort()
+            self.stdout.write(
+                f"{mode:<11} {len(latencies):>8} {1000 * statistics.median(latencies):>8.3f} "
+                f"{1000 * latencies[int(0.95 * (len(latencies) - 1))]:>8.3f} "
+                f"{1000 * statistics.fmean(latencies):>8.3f} {connects:>9.0f}"
+            )
+
+    def _run(self, alias, register_number, requests):
+        connection = connections[alias]
+        queryset = Student.objects.using(alias).filter(register_number=register_number).values_list('name', flat=True)
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            # What Django does on request_started / request_finished.
+            connection.close_if_unusable_or_obsolete()
+            list(queryset.all())
+            connection.close_if_unusable_or_obsolete()
+            latencies.append(time.perf_counter() - started)
+        return latencies
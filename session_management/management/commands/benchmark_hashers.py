@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher
+from django.core.management.base import BaseCommand
+
+from session_management.hashers import scrypt_maxmem
+
+
+def _int_list(value):
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+class Command(BaseCommand):
+    help = "Measure password hashes/sec per hasher and work factor on this machine."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0, help="Time spent on each configuration")
+        parser.add_argument(
+            '--pbkdf2-iterations', type=_int_list,
+            default=[PBKDF2PasswordHasher.iterations // 4, PBKDF2PasswordHasher.iterations // 2, PBKDF2PasswordHasher.iterations],
+        )
+        parser.add_argument(
+            '--scrypt-work-factors', type=_int_list,
+            default=[ScryptPasswordHasher.work_factor, ScryptPasswordHasher.work_factor * 2],
+        )
+        parser.add_argument('--threads', type=_int_list, default=[1, 4], help="Concurrent hashing threads")
+
+    def handle(self, *args, **options):
+        configurations = [
+            ('pbkdf2_sha256', f"iterations={n}", lambda pw, salt, n=n: PBKDF2PasswordHasher().encode(pw, salt, n))
+            for n in options['pbkdf2_iterations']
+        ] + [
+            ('scrypt', f"work_factor={n}", lambda pw, salt, n=n: self._scrypt(n).encode(pw, salt, n=n))
+            for n in options['scrypt_work_factors']
+        ]
+
+        self.stdout.write(f"{'hasher':<15} {'work factor':<22} {'threads':>7} {'hashes/s':>10} {'ms/hash':>9}")
+        for name, label, encode in configurations:
+            for threads in options['threads']:
+                rate = self._measure(encode, threads, options['seconds'])
+                self.stdout.write(
+                    f"{name:<15} {label:<22} {threads:>7} {rate:>10.1f} {1000 * threads / rate:>9.1f}"
+                )
+
+    def _scrypt(self, work_factor):
+        hasher = ScryptPasswordHasher()
+        hasher.maxmem = scrypt_maxmem(work_factor, hasher.block_size)
+        return hasher
+
+    def _measure(self, encode, threads, seconds):
+        deadline = time.monotonic() + seconds
+
+        def work():
+            count = 0
+            while time.monotonic() < deadline:
+                encode('benchmark-password', 'benchmarksalt123')
+                count += 1
+            return count
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            total = sum(executor.map(lambda _: work(), range(threads)))
+        return total / (time.monotonic() - started)
@@ -0,0 +1,101 @@
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from session_management.authentication import issue_tokens
+from session_management.blacklist import blacklist_filter
+from session_management.importer import iter_batches
+from session_management.models import Student
+
+BENCH_SETTINGS = 'student_portal.settings_bench'
+
+
+class Command(BaseCommand):
+    help = "Measure refresh-token rotation throughput with and without the blacklist filter."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--register-number', help="Student to issue tokens for (default: the first one)")
+        parser.add_argument('--requests', type=int, default=500, help="Refreshes per run")
+        parser.add_argument(
+            '--blacklisted', type=int, default=10000,
+            help="Blacklisted tokens to seed so the blacklist has a realistic size",
+        )
+        parser.add_argument(
+            '--allow-live-db', action='store_true',
+            help="Run against the configured database even though it is not the benchmark one",
+        )
+
+    def handle(self, *args, **options):
+        if settings.SETTINGS_MODULE != BENCH_SETTINGS and not options['allow_live_db']:
+            raise CommandError(
+                "benchmark_refresh seeds thousands of tokens; run it with "
+                f"DJANGO_SETTINGS_MODULE={BENCH_SETTINGS}, or pass --allow-live-db."
+            )
+        students = Student.objects.all()
+        if options['register_number']:
+            students = students.filter(register_number=options['register_number'])
+        student = students.first()
+        if student is None:
+            raise CommandError("No student to issue tokens for; import a roster first.")
+
+        # jti of every token this command creates; only those are deleted afterwards.
+        self.jtis = []
+        try:
+            self._seed(student, options['blacklisted'])
+            self.stdout.write(f"{'filter':<8} {'requests':>8} {'req/s':>8} {'ms/req':>8} {'queries/req':>12}")
+            for enabled in (False, True):
+                with override_settings(TOKEN_BLACKLIST_FILTER=enabled):
+                    blacklist_filter.reset()
+                    rate, queries = self._run(student, options['requests'])
+                self.stdout.write(
+                    f"{'on' if enabled else 'off':<8} {options['requests']:>8} {rate:>8.1f} "
+                    f"{1000 / rate:>8.2f} {queries:>12.2f}"
+                )
+        finally:
+            for chunk in iter_batches(self.jtis, 1000):
+                OutstandingToken.objects.filter(jti__in=chunk).delete()
+            blacklist_filter.reset()
+
+    def _seed(self, student, count):
+        now = timezone.now()
+        jtis = [uuid4().hex for _ in range(count)]
+        self.jtis.extend(jtis)
+        outstanding = OutstandingToken.objects.bulk_create(
+            [
+                OutstandingToken(
+                    user=student, jti=jti, token='benchmark',
+                    created_at=now, expires_at=now + timedelta(days=1),
+                )
+                for jti in jtis
+            ],
+            batch_size=1000,
+        )
+        if outstanding and outstanding[0].pk is None:
+            outstanding = OutstandingToken.objects.filter(jti__in=jtis)
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in outstanding], batch_size=1000)
+
+    def _run(self, student, requests):
+        client = Client()
+        url = reverse('token_refresh')
+        token = str(issue_tokens(student))
+        self.jtis.append(RefreshToken(token, verify=False)['jti'])
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = client.post(url, {'refresh': token}, content_type='application/json')
+                if response.status_code != 200:
+                    raise CommandError(f"Refresh failed with {response.status_code}: {response.content[:200]}")
+                token = response.json()['refresh']
+                self.jtis.append(RefreshToken(token, verify=False)['jti'])
+            elapsed = time.perf_counter() - started
+        return requests / elapsed, len(queries) / requests
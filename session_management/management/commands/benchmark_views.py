@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from session_management.models import Student
+from session_management.profile_cache import build_profile
+from session_management.queries import OTP_FIELDS, TOKEN_FIELDS, PROFILE_FIELDS
+from session_management.renderers import FastJSONRenderer, orjson
+
+ENDPOINT_COLUMNS = {
+    'verify-register': OTP_FIELDS,
+    'verify-otp': ('register_number',),
+    'set-password': TOKEN_FIELDS,
+    'login': TOKEN_FIELDS,
+    'student GET': PROFILE_FIELDS,
+    'student POST': PROFILE_FIELDS,
+    'forgot-password': TOKEN_FIELDS,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare bytes fetched per endpoint (full row vs pruned columns) and JSON rendering speed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=200, help="Students to fetch per measurement")
+        parser.add_argument('--iterations', type=int, default=2000, help="Renders per renderer")
+
+    def handle(self, *args, **options):
+        keys = list(Student.objects.values_list('register_number', flat=True)[:options['sample']])
+        if not keys:
+            raise CommandError("No students to measure; import a roster first.")
+
+        all_columns = [field.attname for field in Student._meta.concrete_fields]
+        full_bytes, full_ms = self._fetch(keys, all_columns)
+        self.stdout.write(f"Fetching {len(keys)} students")
+        self.stdout.write(f"{'endpoint':<16} {'columns':>7} {'bytes/row':>10} {'full row':>9} {'fetch ms':>9} {'full ms':>8}")
+        for endpoint, columns in ENDPOINT_COLUMNS.items():
+            pruned_bytes, pruned_ms = self._fetch(keys, columns)
+            self.stdout.write(
+                f"{endpoint:<16} {len(columns):>7} {pruned_bytes / len(keys):>10.0f} "
+                f"{full_bytes / len(keys):>9.0f} {pruned_ms:>9.2f} {full_ms:>8.2f}"
+            )
+
+        payloads = [build_profile(student) for student in Student.objects.filter(pk__in=keys)]
+        self.stdout.write("")
+        self.stdout.write(f"Rendering {len(payloads)}-profile list x {options['iterations']}")
+        renderers = [('JSONRenderer', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('FastJSONRenderer', FastJSONRenderer()))
+        else:
+            self.stdout.write("orjson is not installed; FastJSONRenderer falls back to JSONRenderer")
+        for name, renderer in renderers:
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                body = renderer.render(payloads)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name:<18} {1e6 * elapsed / options['iterations']:>9.1f} us/render {len(body):>9} bytes"
+            )
+
+    def _fetch(self, keys, columns):
+        started = time.perf_counter()
+        rows = list(Student.objects.filter(pk__in=keys).values_list(*columns))
+        elapsed_ms = 1000 * (time.perf_counter() - started)
+        size = sum(len(str(value).encode('utf-8')) for row in rows for value in row if value is not None)
+        return size, elapsed_ms
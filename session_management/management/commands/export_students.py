@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from session_management.exporter import DEFAULT_CHUNK_SIZE, FORMATS, iter_csv, write_xlsx
+from session_management.models import Student
+from session_management.queries import select_fields
+
+
+class Command(BaseCommand):
+    help = "Export the student roster to CSV or XLSX without loading it into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Destination file; '-' writes CSV to stdout")
+        parser.add_argument('--format', choices=sorted(FORMATS), help="Defaults to the output file's extension")
+        parser.add_argument('--fields', help="Comma-separated columns (default: every staff-visible column)")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched per round trip")
+
+    def handle(self, *args, **options):
+        output = options['output']
+        export_format = options['format'] or ('xlsx' if output.lower().endswith('.xlsx') else 'csv')
+        if output == '-' and export_format != 'csv':
+            raise CommandError("Only CSV can be written to stdout")
+        try:
+            fields = select_fields(options['fields'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.monotonic()
+        if export_format == 'xlsx':
+            with open(output, 'wb') as handle:
+                rows = write_xlsx(handle, fields, options['chunk_size'])
+        else:
+            handle = sys.stdout.buffer if output == '-' else open(output, 'wb')
+            try:
+                for chunk in iter_csv(fields, options['chunk_size']):
+                    handle.write(chunk)
+            finally:
+                if handle is not sys.stdout.buffer:
+                    handle.close()
+
+        if output != '-':
+            if export_format == 'csv':
+                rows = Student.objects.count()
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {rows} students to {output} ({time.monotonic() - started:.2f}s)"
+            ))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from session_management.importer import AcademicImporter, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Import (upsert) academic records from an Excel/CSV file with the columns "
+        "Reg.No, CGPA, 10th %, 12th %, Active Backlogs and Total Backlogs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Academic records file (.xlsx or .csv)")
+        parser.add_argument('--sheet', help="Worksheet name (defaults to the active sheet)")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate and count without writing")
+        parser.add_argument('--error-report', help="Write per-row errors to this .csv or .json file")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        started = time.monotonic()
+        importer = AcademicImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            report = importer.run(options['file'], sheet_name=options['sheet'])
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Failed to load academic records: {e}")
+
+        if options['error_report']:
+            report.write_errors(options['error_report'])
+
+        prefix = "[dry run] " if report.dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{report.processed} rows in {report.batches} batches "
+            f"({time.monotonic() - started:.2f}s): {report.created} created, "
+            f"{report.updated} updated, {report.unchanged} unchanged, {len(report.errors)} errors"
+        ))
+        if report.errors and not options['error_report']:
+            for error in report.errors[:20]:
+                self.stderr.write(f"row {error['row']} {error['register_number']}: {error['error']}")
+            if len(report.errors) > 20:
+                self.stderr.write(f"... {len(report.errors) - 20} more; use --error-report for the full list")
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from session_management.importer import RosterSync, StudentImporter, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Import (upsert) students from an Excel/CSV roster in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', default='Data.xlsx', help="Roster file (.xlsx or .csv)")
+        parser.add_argument('--sheet', help="Worksheet name (defaults to the active sheet)")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate and count without writing")
+        parser.add_argument('--error-report', help="Write per-row errors to this .csv or .json file")
+        parser.add_argument(
+            '--delta', action='store_true',
+            help="Only write students whose roster row changed since the last import",
+        )
+        parser.add_argument(
+            '--deactivate-missing', action='store_true',
+            help="With --delta, deactivate roster students who are no longer in the file",
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help="With --delta, save progress to this JSON file and resume from it if it matches the roster",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if (options['deactivate_missing'] or options['checkpoint']) and not options['delta']:
+            raise CommandError("--deactivate-missing and --checkpoint require --delta")
+
+        started = time.monotonic()
+
+        def progress(report):
+            self.stdout.write(
+                f"batch {report.batches}: {report.processed} rows processed, "
+                f"{report.created} created, {report.updated} updated, {report.unchanged} unchanged, "
+                f"{len(report.errors)} errors"
+            )
+
+        kwargs = {
+            'batch_size': options['batch_size'],
+            'dry_run': options['dry_run'],
+            'progress': progress if options['verbosity'] >= 1 else None,
+        }
+        if options['delta']:
+            importer = RosterSync(
+                deactivate_missing=options['deactivate_missing'], checkpoint_path=options['checkpoint'], **kwargs,
+            )
+        else:
+            importer = StudentImporter(**kwargs)
+        try:
+            report = importer.run(options['file'], sheet_name=options['sheet'])
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Failed to load roster: {e}")
+
+        if options['error_report']:
+            report.write_errors(options['error_report'])
+
+        prefix = "[dry run] " if report.dry_run else ""
+        if options['delta'] and importer.resumed_after:
+            self.stdout.write(f"Resumed after row {importer.resumed_after} from {options['checkpoint']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{report.processed} rows in {report.batches} batches "
+            f"({time.monotonic() - started:.2f}s): {report.created} created, "
+            f"{report.updated} updated, {report.unchanged} unchanged, "
+            f"{report.deactivated} deactivated, {len(report.errors)} errors"
+        ))
+        if report.errors and not options['error_report']:
+            for error in report.errors[:20]:
+                self.stderr.write(f"row {error['row']} {error['register_number']}: {error['error']}")
+            if len(report.errors) > 20:
+                self.stderr.write(f"... {len(report.errors) - 20} more; use --error-report for the full list")
@@ -0,0 +1,220 @@
+import json
+import math
+import re
+import statistics
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from session_management.models import Student
+from session_management.sms import LocMemBackend
+
+PREFIX = 'LOADTEST'
+OTP_PATTERN = re.compile(r'(\d{6})')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def add(self, endpoint, seconds, queries, ok):
+        with self._lock:
+            self.samples[endpoint].append((seconds, queries, ok))
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint, samples in self.samples.items():
+            latencies = sorted(seconds for seconds, _, _ in samples)
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'errors': sum(1 for _, _, ok in samples if not ok),
+                'rps': round(len(samples) / elapsed, 2),
+                'p50_ms': round(1000 * percentile(latencies, 50), 3),
+                'p95_ms': round(1000 * percentile(latencies, 95), 3),
+                'p99_ms': round(1000 * percentile(latencies, 99), 3),
+                'mean_ms': round(1000 * statistics.fmean(latencies), 3),
+                'queries_per_request': round(statistics.fmean(queries for _, queries, _ in samples), 2),
+            }
+        total = sum(len(samples) for samples in self.samples.values())
+        return endpoints, {
+            'requests': total,
+            'errors': sum(stats['errors'] for stats in endpoints.values()),
+            'elapsed_s': round(elapsed, 3),
+            'rps': round(total / elapsed, 2),
+        }
+
+
+class Flow:
+    """One student going through registration, login, profile edits, refresh and logout."""
+
+    def __init__(self, recorder, register_number, phone_number):
+        self.recorder = recorder
+        self.register_number = register_number
+        self.phone_number = phone_number
+        self.client = Client()
+        self.headers = {}
+
+    def call(self, endpoint, method, path, data=None, expect=200):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if method == 'get':
+                response = self.client.get(path, data, **self.headers)
+            elif method == 'patch':
+                response = self.client.patch(path, data, content_type='application/json', **self.headers)
+            else:
+                response = self.client.post(path, data, content_type='application/json', **self.headers)
+            elapsed = time.perf_counter() - started
+        ok = response.status_code == expect
+        self.recorder.add(endpoint, elapsed, len(queries), ok)
+        if not ok:
+            raise CommandError(
+                f"{endpoint} for {self.register_number}: expected {expect}, got "
+                f"{response.status_code} {response.content[:200]!r}"
+            )
+        return response.json()
+
+    def last_otp(self):
+        for message in reversed(LocMemBackend.outbox):
+            if message['to'].endswith(self.phone_number):
+                return OTP_PATTERN.search(message['body']).group(1)
+        raise CommandError(f"No OTP was sent to {self.register_number}")
+
+    def run(self):
+        reg_no = self.register_number
+        self.call('verify-register', 'post', '/auth/verify-register/', {'register_number': reg_no})
+        self.call('verify-otp', 'post', '/auth/verify-otp/', {'register_number': reg_no, 'otp': self.last_otp()})
+        self.call('set-password', 'post', '/auth/set-password/', {'register_number': reg_no, 'password': 'loadtest-pass'})
+        tokens = self.call('login', 'post', '/auth/login/', {'register_number': reg_no, 'password': 'loadtest-pass'})
+
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {tokens['access']}"}
+        self.call('student GET', 'get', '/auth/student/', {'register_number': reg_no})
+        self.call('student POST (otp)', 'post', '/auth/student/', {'register_number': reg_no})
+        self.call('student POST (update)', 'post', '/auth/student/', {
+            'register_number': reg_no, 'otp': self.last_otp(),
+            'email': f"{reg_no.lower()}@example.com", 'gender': 'F', 'dob': '2004-05-06',
+        })
+        self.call('student POST (otp)', 'post', '/auth/student/', {'register_number': reg_no})
+        self.call('student PATCH', 'patch', '/auth/student/', {'otp': self.last_otp(), 'gender': 'M'})
+        self.headers = {}
+
+        tokens = self.call('refresh', 'post', '/auth/refresh/', {'refresh': tokens['refresh']})
+        self.call('logout', 'post', '/auth/logout/', {'refresh': tokens['refresh']})
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the full student flow against a local database at the given concurrency and report "
+        "latency percentiles, throughput and queries per endpoint. Run with "
+        "DJANGO_SETTINGS_MODULE=student_portal.settings_bench."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Students to take through the flow")
+        parser.add_argument('--concurrency', type=int, default=8, help="Flows running at once")
+        parser.add_argument('--output', help="Write the JSON report to this file as well as stdout")
+        parser.add_argument('--compare', help="Previous JSON report to compare against")
+        parser.add_argument(
+            '--fail-threshold', type=float,
+            help="Exit with an error if any endpoint's p95 is this many percent slower than in --compare",
+        )
+        parser.add_argument('--no-setup', action='store_true', help="Skip creating the database tables")
+
+    def handle(self, *args, **options):
+        if not settings.SMS_BACKEND.endswith('LocMemBackend') or not settings.SMS_EAGER:
+            raise CommandError(
+                "loadtest sends real OTPs only through the in-memory SMS backend; "
+                "run it with DJANGO_SETTINGS_MODULE=student_portal.settings_bench."
+            )
+        if not options['no_setup']:
+            call_command('migrate', run_syncdb=True, verbosity=0)
+
+        students = self._seed(options['users'])
+        LocMemBackend.outbox.clear()
+        recorder = Recorder()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            flows = [Flow(recorder, reg_no, phone) for reg_no, phone in students]
+            for future in [executor.submit(flow.run) for flow in flows]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        endpoints, totals = recorder.summary(elapsed)
+        report = {
+            'commit': self._commit(),
+            'generated_at': timezone.now().isoformat(),
+            'users': options['users'],
+            'concurrency': options['concurrency'],
+            'database': connection.vendor,
+            'password_hasher': settings.PASSWORD_HASHERS[0],
+            'totals': totals,
+            'endpoints': endpoints,
+        }
+        body = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(body + '\n')
+        self.stdout.write(body)
+
+        if options['compare']:
+            self._compare(report, options['compare'], options['fail_threshold'])
+
+    def _seed(self, users):
+        Student.objects.filter(register_number__startswith=PREFIX).delete()
+        students = [
+            Student(
+                register_number=f"{PREFIX}{n:05d}",
+                name=f"Load Test {n}",
+                phone_number=f"9{n:09d}",
+            )
+            for n in range(1, users + 1)
+        ]
+        Student.objects.bulk_create(students, batch_size=1000)
+        return [(student.register_number, student.phone_number) for student in students]
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _compare(self, report, path, threshold):
+        with open(path, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+
+        self.stderr.write(f"Compared with {path} (commit {baseline.get('commit')}):")
+        regressions = []
+        for endpoint, stats in report['endpoints'].items():
+            before = baseline.get('endpoints', {}).get(endpoint)
+            if not before:
+                continue
+            p95_change = 100 * (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+            self.stderr.write(
+                f"  {endpoint:<22} p95 {before['p95_ms']:>9.2f} -> {stats['p95_ms']:>9.2f} ms ({p95_change:+.1f}%)  "
+                f"queries {before['queries_per_request']:>5.2f} -> {stats['queries_per_request']:>5.2f}"
+            )
+            if threshold is not None and p95_change > threshold:
+                regressions.append(endpoint)
+        if regressions:
+            raise CommandError(f"p95 regressed by more than {threshold}% on: {', '.join(regressions)}")
@@ -0,0 +1,116 @@
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before it can serve its first request: import the WSGI
+# module (settings, apps, middleware) and load the URLconf (views, serializers).
+BOOT = """
+import importlib, time
+started = time.perf_counter()
+importlib.import_module({wsgi_module!r})
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - started)
+"""
+# Only needed by particular requests or commands; a worker should not import them at boot.
+LAZY_MODULES = ('twilio', 'pandas', 'numpy', 'openpyxl')
+OWN_PACKAGES = ('session_management', 'student_portal')
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot a worker in fresh interpreters and report its startup time and what it imports, "
+        "by package and by module (python -X importtime). Fails if a lazily-loaded library "
+        "is imported at boot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to time")
+        parser.add_argument('--limit', type=int, default=15, help="Rows per table")
+        parser.add_argument(
+            '--lazy', default=','.join(LAZY_MODULES),
+            help="Comma-separated packages that must not be imported at boot ('' to skip the check)",
+        )
+
+    def handle(self, *args, **options):
+        wsgi_module = settings.WSGI_APPLICATION.rsplit('.', 1)[0]
+        boot = BOOT.format(wsgi_module=wsgi_module)
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+
+        timings = []
+        for _ in range(max(1, options['runs'])):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', boot], env=env, capture_output=True, text=True,
+            )
+            if result.returncode:
+                raise CommandError(f"Worker boot failed:\n{result.stderr[-2000:]}")
+            timings.append(float(result.stdout.strip().splitlines()[-1]))
+        modules = parse_importtime(result.stderr)
+
+        total = sum(module['self'] for module in modules) / 1000
+        self.stdout.write(
+            f"{wsgi_module}: boot {1000 * statistics.median(timings):.0f} ms median of {len(timings)} "
+            f"(min {1000 * min(timings):.0f} ms); {len(modules)} modules, {total:.0f} ms importing"
+        )
+
+        packages = defaultdict(lambda: [0, 0])
+        for module in modules:
+            package = packages[package_of(module)]
+            package[0] += module['self']
+            package[1] += 1
+        self.stdout.write(f"\n{'package':<32} {'ms':>8} {'modules':>8}")
+        for name, (us, count) in sorted(packages.items(), key=lambda item: -item[1][0])[:options['limit']]:
+            self.stdout.write(f"{name:<32} {us / 1000:>8.1f} {count:>8}")
+
+        self.stdout.write(f"\n{'module (cumulative, own packages)':<48} {'ms':>8} {'self ms':>8}")
+        own = [module for module in modules if package_of(module) in OWN_PACKAGES]
+        for module in sorted(own, key=lambda module: -module['cumulative'])[:options['limit']]:
+            self.stdout.write(f"{module['name']:<48} {module['cumulative'] / 1000:>8.1f} {module['self'] / 1000:>8.1f}")
+
+        lazy = {name.strip() for name in options['lazy'].split(',') if name.strip()}
+        eager = [
+            module for module in modules
+            if package_of(module) in lazy and (module['parent'] is None or package_of(module['parent']) not in lazy)
+        ]
+        if eager:
+            chains = '\n'.join(f"  {' <- '.join(import_chain(module))}" for module in eager)
+            raise CommandError(f"Imported at boot but meant to load on first use:\n{chains}")
+        self.stdout.write(self.style.SUCCESS(f"\nNone of {', '.join(sorted(lazy)) or 'the lazy packages'} imported at boot"))
+
+
+def parse_importtime(output):
+    """
+    Modules from `python -X importtime` output, in import order, each with its
+    self and cumulative microseconds and the module that imported it.
+    """
+    modules, stack = [], []
+    # A module is reported after everything it imports, so its children precede it at a greater depth.
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        module = {'name': name.strip(), 'self': int(self_us), 'cumulative': int(cumulative_us), 'parent': None}
+        while stack and stack[-1][0] > depth:
+            stack.pop()[1]['parent'] = module
+        stack.append((depth, module))
+        modules.append(module)
+    return modules
+
+
+def package_of(module):
+    return module['name'].split('.')[0]
+
+
+def import_chain(module):
+    """The module and the modules that imported it, innermost first."""
+    chain = [module['name']]
+    while module['parent'] is not None:
+        module = module['parent']
+        chain.append(module['name'])
+    return chain
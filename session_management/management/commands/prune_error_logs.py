@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from session_management.errors import prune_error_logs
+
+
+class Command(BaseCommand):
+    help = "Expire raw ErrorLogs rows and old hourly error buckets in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.RETENTION_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would go")
+
+    def handle(self, *args, **options):
+        deleted = prune_error_logs(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} error log rows"))
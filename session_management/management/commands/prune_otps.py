@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from session_management import metrics
+from session_management.models import OTP
+from session_management.retention import prune_otps
+
+
+class Command(BaseCommand):
+    help = "Delete expired OTP rows in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.RETENTION_BATCH_SIZE)
+        parser.add_argument(
+            '--max-age', type=int, default=settings.OTP_RETENTION_SECONDS,
+            help="Delete OTPs older than this many seconds",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would go")
+
+    def handle(self, *args, **options):
+        deleted = prune_otps(
+            batch_size=options['batch_size'],
+            max_age=options['max_age'],
+            dry_run=options['dry_run'],
+        )
+        remaining = metrics.registry.get('retention_table_rows', table=OTP._meta.db_table)
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} OTP rows; ~{remaining} rows in table"))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from session_management import metrics
+from session_management.blacklist import prune_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.RETENTION_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would go")
+
+    def handle(self, *args, **options):
+        deleted = prune_tokens(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        remaining = metrics.registry.get('retention_table_rows', table=OutstandingToken._meta.db_table)
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} token rows; ~{remaining} outstanding tokens in table"))
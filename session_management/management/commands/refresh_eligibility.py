@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from session_management.eligibility import refresh_eligibility
+from session_management.models import PlacementDrive
+
+
+class Command(BaseCommand):
+    help = "Bring materialized drive eligibility up to date for open drives (or one drive)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drive', type=int, help="Only this drive, open or not")
+        parser.add_argument('--full', action='store_true', help="Re-evaluate every student, not just changed ones")
+
+    def handle(self, *args, **options):
+        if options['drive']:
+            drives = PlacementDrive.objects.filter(pk=options['drive'])
+            if not drives.exists():
+                raise CommandError(f"Drive {options['drive']} not found")
+        else:
+            drives = PlacementDrive.objects.filter(is_open=True)
+
+        for drive in drives.order_by('pk'):
+            try:
+                summary = refresh_eligibility(drive, full=options['full'])
+            except ValueError as e:
+                self.stderr.write(f"{drive}: {e}")
+                continue
+            scope = "all students" if summary['full'] else f"{summary['evaluated']} changed students"
+            self.stdout.write(self.style.SUCCESS(
+                f"{drive} ({scope}, {summary['seconds']:.3f}s): {summary['eligible']} eligible, "
+                f"+{summary['added']} -{summary['removed']}"
+            ))
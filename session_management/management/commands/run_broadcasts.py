@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from session_management.broadcast import claim_broadcast, create_broadcast, run_broadcast
+from session_management.models import Broadcast
+
+
+class Command(BaseCommand):
+    help = (
+        "Send an SMS broadcast to a cohort (--message with --prefix and/or --register-numbers), "
+        "or resume broadcasts that are queued or were left running by a process that stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--message', help="Start a new broadcast with this text")
+        parser.add_argument('--prefix', help="Audience: register numbers starting with this, e.g. Y22CSE")
+        parser.add_argument('--register-numbers', help="Audience: comma-separated register numbers")
+        parser.add_argument('--include-inactive', action='store_true', help="Also message inactive students")
+        parser.add_argument('--id', type=int, dest='broadcast_id', help="Resume only this broadcast")
+        parser.add_argument('--workers', type=int, help="Concurrent senders (default: BROADCAST_WORKERS)")
+        parser.add_argument('--chunk-size', type=int, help="Recipients per chunk (default: BROADCAST_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        if options['message']:
+            audience = {
+                'prefix': options['prefix'],
+                'register_numbers': (options['register_numbers'] or '').split(','),
+                'include_inactive': options['include_inactive'],
+            }
+            try:
+                broadcast_ids = [create_broadcast(options['message'], audience).pk]
+            except ValueError as e:
+                raise CommandError(str(e))
+        elif options['broadcast_id']:
+            broadcast_ids = [options['broadcast_id']]
+        else:
+            broadcast_ids = list(
+                Broadcast.objects.filter(status__in=[Broadcast.QUEUED, Broadcast.RUNNING])
+                .order_by('created_at')
+                .values_list('pk', flat=True)
+            )
+
+        for broadcast_id in broadcast_ids:
+            if not claim_broadcast(broadcast_id):
+                self.stderr.write(f"Broadcast {broadcast_id} is finished or being sent by another process; skipped")
+                continue
+            started = time.monotonic()
+            broadcast = run_broadcast(
+                Broadcast.objects.get(pk=broadcast_id),
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                progress=self._progress if options['verbosity'] >= 1 else None,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Broadcast {broadcast.pk} {broadcast.status} ({time.monotonic() - started:.2f}s): "
+                f"{broadcast.sent} sent, {broadcast.failed} failed of {broadcast.recipients} recipients"
+            ))
+
+    def _progress(self, broadcast):
+        self.stdout.write(
+            f"broadcast {broadcast.pk}: {broadcast.sent} sent, {broadcast.failed} failed, "
+            f"{broadcast.recipients} recipients resolved"
+        )
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from session_management.models import SMSDelivery
+from session_management.sms import dispatcher
+
+
+class Command(BaseCommand):
+    help = "Deliver SMS messages left queued, e.g. by a worker process that restarted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=60,
+            help="Only pick up messages queued at least this many seconds ago",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        pending = SMSDelivery.objects.filter(
+            status=SMSDelivery.QUEUED, updated_at__lt=cutoff
+        ).values_list('pk', flat=True)
+
+        sent = retried = failed = skipped = 0
+        for delivery_id in pending.iterator():
+            with transaction.atomic():
+                # Skips messages a worker is sending or has attempted since the query above.
+                delivery = dispatcher.claim(delivery_id, queued_before=cutoff)
+                if delivery is None:
+                    skipped += 1
+                    continue
+                delay = dispatcher.attempt(delivery)
+            if delay is not None:
+                retried += 1
+            elif delivery.status == SMSDelivery.SENT:
+                sent += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{sent} sent, {failed} failed, {retried} left queued for retry, {skipped} skipped"
+        ))
@@ -0,0 +1,134 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and histograms are keyed by name plus optional labels and
+live only in the current worker process; snapshot() returns a plain dict for
+logging and render_prometheus() the Prometheus text exposition format for the
+metrics/ endpoint.
+"""
+import bisect
+import math
+import threading
+from collections import defaultdict
+
+# Seconds; suits request and query latencies.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    """A sample value at full precision: whole numbers as integers, anything else as repr(float)."""
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._histograms = {}
+
+    def incr(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'buckets': buckets, 'counts': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0,
+                }
+            histogram['counts'][bisect.bisect_left(histogram['buckets'], value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def get(self, name, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            if key in self._gauges:
+                return self._gauges[key]
+            return self._counters.get(key, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in self._counters.items()
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in self._gauges.items()
+                ],
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), 'count': histogram['count'], 'sum': histogram['sum']}
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+            }
+
+    def render_prometheus(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(
+                (key, {**histogram, 'counts': list(histogram['counts'])})
+                for key, histogram in self._histograms.items()
+            )
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), value in gauges:
+            declare(name, 'gauge')
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), histogram in histograms:
+            declare(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram['sum'])}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+incr = registry.incr
+set_gauge = registry.set_gauge
+observe = registry.observe
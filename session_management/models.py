@@ -1,15 +1,46 @@
 from django.db import models
+import uuid
 from datetime import timedelta, datetime
 from django.utils.timezone import now, make_aware, timezone
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin
 
 class ErrorLogs(models.Model):
     error = models.JSONField()
-    updated_at = models.DateTimeField(auto_now=True)
+    fingerprint = models.CharField(max_length=40, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.id}, {self.error}"
 
+
+class ErrorFingerprint(models.Model):
+    """One row per distinct error, rolled up from ErrorLogs (see session_management.errors)."""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    exception_type = models.CharField(max_length=200)
+    message = models.TextField()
+    count = models.PositiveBigIntegerField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField(db_index=True)
+    samples = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.exception_type}: {self.message} ({self.count})"
+
+
+class ErrorOccurrenceBucket(models.Model):
+    """Occurrences of one fingerprint within one hour, for top-errors-per-window queries."""
+    fingerprint = models.ForeignKey(ErrorFingerprint, on_delete=models.CASCADE, related_name='buckets')
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'bucket_start'], name='error_bucket_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket_start', 'fingerprint'], name='error_bucket_window_idx'),
+        ]
+
 class StudentUserManager(BaseUserManager):
     def create_user(self, register_number, password=None, **extra_fields):
         if not register_number:
@@ -39,6 +70,8 @@ class Student(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     updated_at = models.DateTimeField(auto_now=True)
+    # Fingerprint of the roster row last imported for this student (see importer.roster_hash).
+    roster_hash = models.CharField(max_length=40, blank=True, default='')
 
     USERNAME_FIELD = 'register_number'
     REQUIRED_FIELDS = ['name', 'phone_number']
@@ -52,4 +85,173 @@ class Student(AbstractBaseUser, PermissionsMixin):
 class OTP(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     otp = models.CharField(max_length=6)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Newest OTP per student, and the cooldown check, are index-only range scans.
+            models.Index(fields=['student', '-created_at'], name='otp_student_newest_idx'),
+            # Lets the retention job find expired rows without a full scan.
+            models.Index(fields=['created_at'], name='otp_created_at_idx'),
+        ]
+
+class SMSDelivery(models.Model):
+    QUEUED = 'queued'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    to = models.CharField(max_length=20)
+    body = models.CharField(max_length=320, blank=True)
+    provider = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    provider_message_id = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.id} -> {self.to} ({self.status})"
+
+
+class Broadcast(models.Model):
+    """An SMS sent to every student matching `audience` (see session_management.broadcast)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    body = models.CharField(max_length=320)
+    # Filters accepted by broadcast.audience_queryset(), e.g. {"prefix": "Y22CSE"}.
+    audience = models.JSONField(default=dict)
+    created_by = models.ForeignKey(Student, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    # Recipients are resolved in register_number order; this is the last one added.
+    resolved_through = models.CharField(max_length=20, blank=True)
+    resolved = models.BooleanField(default=False)
+    recipients = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Broadcast {self.pk} ({self.status}, {self.sent}/{self.recipients} sent)"
+
+
+class BroadcastRecipient(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='recipient_rows')
+    register_number = models.CharField(max_length=20)
+    to = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)
+    provider_message_id = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['broadcast', 'register_number'], name='broadcast_recipient_unique'),
+        ]
+        indexes = [
+            # The sender's "next due chunk" query.
+            models.Index(fields=['broadcast', 'status', 'next_attempt_at'], name='broadcast_pending_idx'),
+        ]
+
+
+class AcademicRecord(models.Model):
+    """A student's academic standing, as used by placement eligibility (see session_management.eligibility)."""
+    student = models.OneToOneField(Student, primary_key=True, on_delete=models.CASCADE, related_name='academics')
+    # branch, batch_year and lateral_entry come from the register number (importer.parse_register_number).
+    branch = models.CharField(max_length=10)
+    batch_year = models.PositiveSmallIntegerField()
+    lateral_entry = models.BooleanField(default=False)
+    cgpa = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    tenth_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    twelfth_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    active_backlogs = models.PositiveSmallIntegerField(default=0)
+    total_backlogs = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['batch_year', 'branch', 'cgpa'], name='academic_cohort_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} ({self.branch} {self.batch_year}, CGPA {self.cgpa})"
+
+
+class PlacementDrive(models.Model):
+    company = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, blank=True)
+    drive_date = models.DateField(null=True, blank=True)
+    is_open = models.BooleanField(default=True)
+    # When DriveEligibility was last brought up to date; None forces a full rebuild.
+    evaluated_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.company} {self.title}".strip()
+
+
+class EligibilityCriteria(models.Model):
+    """
+    One rule set of a drive. Every condition that is set must hold; a student
+    who satisfies any of the drive's rule sets is eligible.
+    """
+    drive = models.ForeignKey(PlacementDrive, on_delete=models.CASCADE, related_name='criteria')
+    # Empty lists allow every branch / batch.
+    branches = models.JSONField(default=list, blank=True)
+    batch_years = models.JSONField(default=list, blank=True)
+    min_cgpa = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    min_tenth_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    min_twelfth_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    max_active_backlogs = models.PositiveSmallIntegerField(null=True, blank=True)
+    max_total_backlogs = models.PositiveSmallIntegerField(null=True, blank=True)
+    allow_lateral_entry = models.BooleanField(default=True)
+    # Compound rule over AcademicRecord columns, e.g.
+    # "cgpa >= 8 or (cgpa >= 7 and twelfth_percentage >= 85)".
+    expression = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class DriveEligibility(models.Model):
+    """Materialized result: `student` is eligible for `drive`."""
+    drive = models.ForeignKey(PlacementDrive, on_delete=models.CASCADE, related_name='eligible')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    evaluated_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['drive', 'student'], name='drive_eligibility_unique'),
+        ]
@@ -0,0 +1,286 @@
+"""
+Storage for one-time passwords.
+
+Every OTP flow goes through the same four operations, each a single keyed
+lookup in the TTL-native backends:
+
+    issue(register_number, otp)     store a fresh code, honouring the resend cooldown
+    in_cooldown(register_number)    was a code issued less than OTP_COOLDOWN_SECONDS ago?
+    verify(register_number, otp)    classify a submitted code, consuming it when valid
+    expire(register_number)         drop any outstanding code and its cooldown
+
+Views verify through check_otp()/acheck_otp(), which look the code up once,
+classify it in memory, consume it when valid, count the outcome in
+otp_verifications_total and raise OTPRejected (carrying the client-facing
+message) for anything but a valid code. Async views use aissue()/averify(),
+which run the same logic without blocking the event loop.
+
+Pick the backend with settings.OTP_STORE_BACKEND. CacheOTPStore needs a cache
+shared by every worker (Redis/Memcached); LocMemOTPStore only works for a single
+process; DatabaseOTPStore falls back to the OTP model.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from session_management import metrics, services
+from session_management.models import OTP
+
+OTP_VALID = 'valid'
+OTP_INVALID = 'invalid'
+OTP_EXPIRED = 'expired'
+OTP_MISSING = 'missing'
+
+OTP_MESSAGES = {
+    OTP_INVALID: "Invalid OTP",
+    OTP_EXPIRED: "OTP expired",
+    OTP_MISSING: "No OTP found for this student",
+}
+
+
+class OTPRejected(Exception):
+    """A submitted code was not valid; str() is the message for the client."""
+
+    def __init__(self, result):
+        super().__init__(OTP_MESSAGES[result])
+        self.result = result
+
+
+class BaseOTPStore:
+    def __init__(self):
+        self.ttl = settings.OTP_TTL_SECONDS
+        self.cooldown = settings.OTP_COOLDOWN_SECONDS
+        # Expired codes are kept a little longer so callers can tell
+        # "expired" apart from "never requested".
+        self.retention = settings.OTP_RETENTION_SECONDS
+
+    def issue(self, register_number, otp, cooldown=True):
+        """
+        Store `otp` as the student's current code. With cooldown=True nothing is
+        stored and False is returned if a code was issued within the cooldown.
+        """
+        raise NotImplementedError
+
+    def in_cooldown(self, register_number):
+        raise NotImplementedError
+
+    def verify(self, register_number, otp, consume=True):
+        """Return one of OTP_VALID, OTP_INVALID, OTP_EXPIRED or OTP_MISSING."""
+        raise NotImplementedError
+
+    def expire(self, register_number):
+        raise NotImplementedError
+
+    async def aissue(self, register_number, otp, cooldown=True):
+        return await sync_to_async(self.issue)(register_number, otp, cooldown=cooldown)
+
+    async def averify(self, register_number, otp, consume=True):
+        return await sync_to_async(self.verify)(register_number, otp, consume=consume)
+
+    def classify(self, record, otp, now):
+        if record is None:
+            return OTP_MISSING
+        if record['otp'] != otp:
+            return OTP_INVALID
+        if now - record['issued_at'] > self.ttl:
+            return OTP_EXPIRED
+        return OTP_VALID
+
+
+class LocMemOTPStore(BaseOTPStore):
+    """Per-process dictionary store. Only suitable for a single worker or tests."""
+
+    def __init__(self):
+        super().__init__()
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def _get(self, register_number, now):
+        record = self._codes.get(register_number)
+        if record is not None and now - record['issued_at'] > self.retention:
+            del self._codes[register_number]
+            return None
+        return record
+
+    def issue(self, register_number, otp, cooldown=True):
+        now = time.time()
+        with self._lock:
+            record = self._get(register_number, now)
+            if cooldown and record is not None and now - record['issued_at'] < self.cooldown:
+                return False
+            self._codes[register_number] = {'otp': otp, 'issued_at': now}
+            return True
+
+    def in_cooldown(self, register_number):
+        now = time.time()
+        with self._lock:
+            record = self._get(register_number, now)
+            return record is not None and now - record['issued_at'] < self.cooldown
+
+    def verify(self, register_number, otp, consume=True):
+        now = time.time()
+        with self._lock:
+            result = self.classify(self._get(register_number, now), otp, now)
+            if result == OTP_VALID and consume:
+                del self._codes[register_number]
+            return result
+
+    def expire(self, register_number):
+        with self._lock:
+            self._codes.pop(register_number, None)
+
+    # Nothing here blocks, so there is no need for a thread hop.
+    async def aissue(self, register_number, otp, cooldown=True):
+        return self.issue(register_number, otp, cooldown=cooldown)
+
+    async def averify(self, register_number, otp, consume=True):
+        return self.verify(register_number, otp, consume=consume)
+
+
+class CacheOTPStore(BaseOTPStore):
+    """
+    Stores codes in a Django cache (settings.OTP_CACHE_ALIAS). Works with any
+    backend whose delete() reports whether the key existed, which makes
+    verify-and-consume safe against two concurrent submissions of the same code.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[settings.OTP_CACHE_ALIAS]
+
+    def _code_key(self, register_number):
+        return f"otp:code:{register_number}"
+
+    def _cooldown_key(self, register_number):
+        return f"otp:cooldown:{register_number}"
+
+    def issue(self, register_number, otp, cooldown=True):
+        cooldown_key = self._cooldown_key(register_number)
+        if cooldown:
+            if not self.cache.add(cooldown_key, 1, self.cooldown):
+                return False
+        else:
+            self.cache.set(cooldown_key, 1, self.cooldown)
+        self.cache.set(
+            self._code_key(register_number),
+            {'otp': otp, 'issued_at': time.time()},
+            self.retention,
+        )
+        return True
+
+    def in_cooldown(self, register_number):
+        return self.cache.get(self._cooldown_key(register_number)) is not None
+
+    def verify(self, register_number, otp, consume=True):
+        key = self._code_key(register_number)
+        result = self.classify(self.cache.get(key), otp, time.time())
+        if result == OTP_VALID and consume:
+            if not self.cache.delete(key):
+                return OTP_MISSING
+            self.cache.delete(self._cooldown_key(register_number))
+        return result
+
+    def expire(self, register_number):
+        self.cache.delete_many([self._code_key(register_number), self._cooldown_key(register_number)])
+
+
+class DatabaseOTPStore(BaseOTPStore):
+    """Fallback backed by the OTP table; needs no shared cache."""
+
+    def issue(self, register_number, otp, cooldown=True):
+        if cooldown and self.in_cooldown(register_number):
+            return False
+        OTP.objects.create(student_id=register_number, otp=otp)
+        return True
+
+    def in_cooldown(self, register_number):
+        return OTP.objects.filter(
+            student_id=register_number,
+            created_at__gte=timezone.now() - timedelta(seconds=self.cooldown),
+        ).exists()
+
+    def verify(self, register_number, otp, consume=True):
+        row = (
+            OTP.objects.filter(student_id=register_number)
+            .order_by('-created_at')
+            .values('pk', 'otp', 'created_at')
+            .first()
+        )
+        result = self.classify(self._record(row), otp, time.time())
+        if result == OTP_VALID and consume and not self._consume(register_number, row):
+            return OTP_MISSING
+        return result
+
+    @staticmethod
+    def _record(row):
+        if row is None:
+            return None
+        return {'otp': row['otp'], 'issued_at': row['created_at'].timestamp()}
+
+    @staticmethod
+    def _consume(register_number, row):
+        """
+        Delete the verified code by pk, plus the older codes it superseded.
+        A code issued after it was read is left alone. Returns False if a
+        concurrent verify consumed it first.
+        """
+        with transaction.atomic():
+            if not OTP.objects.filter(pk=row['pk']).delete()[0]:
+                return False
+            OTP.objects.filter(student_id=register_number, created_at__lt=row['created_at']).delete()
+        return True
+
+    def expire(self, register_number):
+        OTP.objects.filter(student_id=register_number).delete()
+
+    async def aissue(self, register_number, otp, cooldown=True):
+        if cooldown and await OTP.objects.filter(
+            student_id=register_number,
+            created_at__gte=timezone.now() - timedelta(seconds=self.cooldown),
+        ).aexists():
+            return False
+        await OTP.objects.acreate(student_id=register_number, otp=otp)
+        return True
+
+    async def averify(self, register_number, otp, consume=True):
+        row = await (
+            OTP.objects.filter(student_id=register_number)
+            .order_by('-created_at')
+            .values('pk', 'otp', 'created_at')
+            .afirst()
+        )
+        result = self.classify(self._record(row), otp, time.time())
+        if result == OTP_VALID and consume and not await sync_to_async(self._consume)(register_number, row):
+            return OTP_MISSING
+        return result
+
+
+def build_otp_store():
+    """The OTP_STORE_BACKEND instance; the 'otp_store' service."""
+    return import_string(settings.OTP_STORE_BACKEND)()
+
+
+def get_otp_store():
+    return services.get('otp_store')
+
+
+def check_otp(register_number, otp, consume=True):
+    """Verify `otp` for the student, consuming it unless consume=False; raises OTPRejected."""
+    result = get_otp_store().verify(register_number, otp, consume=consume)
+    metrics.incr('otp_verifications_total', result=result)
+    if result != OTP_VALID:
+        raise OTPRejected(result)
+
+
+async def acheck_otp(register_number, otp, consume=True):
+    result = await get_otp_store().averify(register_number, otp, consume=consume)
+    metrics.incr('otp_verifications_total', result=result)
+    if result != OTP_VALID:
+        raise OTPRejected(result)
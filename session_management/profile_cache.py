@@ -0,0 +1,81 @@
+"""
+Validators and a server-side cache for the student profile returned by
+StudentView.get.
+
+Both are derived from Student.updated_at: the ETag and Last-Modified let the
+SPA revalidate with a single-column lookup, and cached payloads are stored
+with the updated_at they were built from, so any save (which bumps updated_at)
+makes them stale even if the post_save invalidation in signals.py never ran in
+this process.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def profile_cache():
+    return caches[settings.PROFILE_CACHE_ALIAS]
+
+
+def _key(register_number):
+    return f"student-profile:{register_number}"
+
+
+def profile_etag(register_number, updated_at):
+    digest = hashlib.sha1(f"{register_number}:{updated_at.isoformat()}".encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def build_profile(student):
+    return {
+        "register_number": student.register_number,
+        "name": student.name,
+        "phone_number": student.phone_number,
+        "dob": student.dob.isoformat() if student.dob else None,
+        "gender": student.gender or "",
+        "father_name": student.father_name or "",
+        "mother_name": student.mother_name or "",
+        "email": student.email or "",
+        "aadhar_number": student.aadhar_number or "",
+        "updated_at": student.updated_at.isoformat() if student.updated_at else None
+    }
+
+
+def get_profile(register_number, updated_at, load_student):
+    """
+    Return the profile payload for `register_number` at version `updated_at`,
+    calling load_student() only when the cached copy is missing or stale.
+    """
+    cache = profile_cache()
+    entry = cache.get(_key(register_number))
+    if entry is not None and entry['updated_at'] == updated_at:
+        return entry['payload']
+
+    payload = build_profile(load_student())
+    cache.set(
+        _key(register_number),
+        {'updated_at': updated_at, 'payload': payload},
+        settings.PROFILE_CACHE_TTL,
+    )
+    return payload
+
+
+async def aget_profile(register_number, updated_at, load_student):
+    """get_profile() for async views; load_student is a coroutine function."""
+    cache = profile_cache()
+    entry = await cache.aget(_key(register_number))
+    if entry is not None and entry['updated_at'] == updated_at:
+        return entry['payload']
+
+    payload = build_profile(await load_student())
+    await cache.aset(
+        _key(register_number),
+        {'updated_at': updated_at, 'payload': payload},
+        settings.PROFILE_CACHE_TTL,
+    )
+    return payload
+
+
+def invalidate_profile(register_number):
+    profile_cache().delete(_key(register_number))
@@ -0,0 +1,123 @@
+"""
+Column-pruned Student lookups shared by the views.
+
+Each view loads only the columns it reads, so hashed passwords and Aadhaar
+numbers are not pulled over the wire for requests that never use them. When an
+instance loaded this way is saved, pass update_fields explicitly (including
+'updated_at', which profile caching relies on). The a-prefixed variants use the
+async ORM for the views in async_views.py.
+"""
+from session_management.models import Student
+from session_management.serializers import StudentSerializer
+
+# Sending an OTP: the phone number, and whether a password is already set.
+OTP_FIELDS = ('register_number', 'phone_number', 'password')
+# Issuing tokens and the login/password-reset response bodies.
+TOKEN_FIELDS = ('register_number', 'name', 'phone_number', 'email', 'password', 'is_staff', 'is_active')
+# Everything a profile update may touch.
+PROFILE_FIELDS = (
+    'register_number', 'name', 'phone_number', 'dob', 'gender', 'father_name',
+    'mother_name', 'email', 'aadhar_number', 'updated_at',
+)
+# Profile columns students edit themselves, after an OTP check.
+EDITABLE_FIELDS = ('dob', 'gender', 'father_name', 'mother_name', 'email', 'aadhar_number')
+# Columns the staff bulk API may return.
+STAFF_FIELDS = StudentSerializer.Meta.fields
+
+
+def get_student(register_number, fields):
+    """Student with only `fields` loaded; raises Student.DoesNotExist."""
+    return Student.objects.only(*fields).get(register_number=register_number)
+
+
+def student_exists(register_number):
+    return Student.objects.filter(register_number=register_number).exists()
+
+
+def get_profile_version(register_number):
+    """The student's updated_at, or None if there is no such student."""
+    versions = list(
+        Student.objects.filter(register_number=register_number).values_list('updated_at', flat=True)[:1]
+    )
+    return versions[0] if versions else None
+
+
+def apply_changes(student, values):
+    """Set each of `values` that differs from the loaded instance; returns the changed field names."""
+    changed = []
+    for name, value in values.items():
+        if getattr(student, name) != value:
+            setattr(student, name, value)
+            changed.append(name)
+    return changed
+
+
+def save_profile_changes(student, values):
+    """
+    Write only the profile fields whose value changed (one UPDATE, or none when
+    nothing did) and return their names.
+    """
+    changed = apply_changes(student, values)
+    if changed:
+        student.save(update_fields=changed + ['updated_at'])
+    return changed
+
+
+def select_fields(requested):
+    """
+    Validate a staff field selection (a list or comma-separated string).
+    Returns the columns to fetch, register_number always first; raises
+    ValueError naming any unknown field.
+    """
+    if not requested:
+        return list(STAFF_FIELDS)
+    if isinstance(requested, str):
+        requested = requested.split(',')
+    requested = [field.strip() for field in requested if field.strip()]
+    unknown = sorted(set(requested) - set(STAFF_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ['register_number'] + [field for field in dict.fromkeys(requested) if field != 'register_number']
+
+
+def list_students(after, limit, fields):
+    """
+    One keyset page of students ordered by register_number, starting after
+    `after`. Returns (rows, has_more). Each page is an index range scan on the
+    primary key, so deep pages cost the same as the first.
+    """
+    queryset = Student.objects.order_by('register_number')
+    if after:
+        queryset = queryset.filter(register_number__gt=after)
+    rows = list(queryset.values(*fields)[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def lookup_students(register_numbers, fields):
+    """Rows for the given register numbers, in request order, and the numbers not found."""
+    wanted = list(dict.fromkeys(number.strip().upper() for number in register_numbers))
+    found = {row['register_number']: row for row in Student.objects.filter(register_number__in=wanted).values(*fields)}
+    return [found[number] for number in wanted if number in found], [number for number in wanted if number not in found]
+
+
+async def aget_student(register_number, fields):
+    return await Student.objects.only(*fields).aget(register_number=register_number)
+
+
+async def astudent_exists(register_number):
+    return await Student.objects.filter(register_number=register_number).aexists()
+
+
+async def aget_profile_version(register_number):
+    versions = [
+        version async for version in
+        Student.objects.filter(register_number=register_number).values_list('updated_at', flat=True)[:1]
+    ]
+    return versions[0] if versions else None
+
+
+async def asave_profile_changes(student, values):
+    changed = apply_changes(student, values)
+    if changed:
+        await student.asave(update_fields=changed + ['updated_at'])
+    return changed
@@ -0,0 +1,123 @@
+"""
+Retention jobs for tables that only ever grow.
+
+delete_in_batches() removes old rows a bounded batch at a time, each batch in
+its own short transaction, so pruning never holds long locks on a hot table.
+Jobs registered with the scheduler run periodically inside the web process when
+settings.RETENTION_INTERVAL_SECONDS is set; the matching management commands
+(prune_otps, ...) run the same jobs from cron instead.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from session_management import metrics
+from session_management.models import OTP
+
+logger = logging.getLogger(__name__)
+
+
+def delete_in_batches(queryset, batch_size=1000, pause=0.0, dry_run=False):
+    """
+    Delete the rows matched by `queryset` in batches of `batch_size` primary keys.
+    Returns the number of rows deleted (or that would be deleted with dry_run).
+    """
+    if dry_run:
+        return queryset.count()
+
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        deleted += model._base_manager.filter(pk__in=pks).delete()[0]
+        if len(pks) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def estimate_rows(model):
+    """Cheap row count: the planner estimate on PostgreSQL, COUNT(*) elsewhere."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    return model._base_manager.count()
+
+
+def prune_otps(batch_size=None, max_age=None, dry_run=False):
+    """Delete OTP rows older than settings.OTP_RETENTION_SECONDS (or `max_age` seconds)."""
+    max_age = settings.OTP_RETENTION_SECONDS if max_age is None else max_age
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    deleted = delete_in_batches(
+        OTP.objects.filter(created_at__lt=cutoff),
+        batch_size=batch_size or settings.RETENTION_BATCH_SIZE,
+        pause=settings.RETENTION_BATCH_PAUSE,
+        dry_run=dry_run,
+    )
+    if not dry_run:
+        metrics.incr('retention_rows_pruned_total', deleted, table=OTP._meta.db_table)
+    metrics.set_gauge('retention_table_rows', estimate_rows(OTP), table=OTP._meta.db_table)
+    return deleted
+
+
+class RetentionScheduler:
+    """Runs registered jobs every `interval` seconds on a single daemon thread."""
+
+    def __init__(self):
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, name, job):
+        self.jobs[name] = job
+
+    def start(self, interval):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name='retention-scheduler', daemon=True
+            )
+            self._thread.start()
+
+    def run_pending(self):
+        for name, job in list(self.jobs.items()):
+            started = time.monotonic()
+            try:
+                deleted = job()
+                logger.info("Retention job %s removed %s rows in %.2fs", name, deleted, time.monotonic() - started)
+            except Exception:
+                logger.exception("Retention job %s failed", name)
+            finally:
+                close_old_connections()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            self.run_pending()
+
+
+scheduler = RetentionScheduler()
+scheduler.register('otp', prune_otps)
+
+
+def start_scheduler(**kwargs):
+    """request_started receiver: start the in-process scheduler in serving processes only."""
+    if settings.RETENTION_INTERVAL_SECONDS:
+        scheduler.start(settings.RETENTION_INTERVAL_SECONDS)
@@ -0,0 +1,373 @@
+"""
+Staff search over students by name, register number and phone number.
+
+A query is split into terms and every term must match the student somewhere:
+
+* a register number it starts (Y22ECE2...) or whose branch it names (ECE);
+* the last digits of a phone number ("4321");
+* a word of the name it starts ("rav" finds RAVI KUMAR), or, when no name
+  word starts with it, a name word that is close to it ("ravee").
+
+Results are ranked (exact register number, then register/name prefixes, then
+phone and fuzzy matches) and paged with limit/offset.
+
+On PostgreSQL the query runs in the database against pg_trgm GIN indexes,
+created by ensure_search_indexes() after migrate. If pg_trgm is not installed
+(checked once per process), search still answers every other kind of match
+but skips fuzzy name matching. Elsewhere (SQLite, tests)
+search_index, a per-process in-memory index, answers it: sorted keys for
+prefix lookups and name-word trigrams for fuzzy ones. It is loaded on first
+use, patched from post_save/post_delete, and otherwise re-synced from
+Student.updated_at at most every SEARCH_INDEX_MAX_AGE seconds, which also
+picks up bulk imports and writes by other processes.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from session_management.importer import REGISTER_NUMBER_PATTERN
+from session_management.models import Student
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ('register_number', 'name', 'phone_number', 'is_active')
+# Minimum trigram similarity for a fuzzy name match.
+FUZZY_THRESHOLD = 0.4
+MAX_TERMS = 5
+
+# Score of each kind of match; a result's rank is the sum over the query terms.
+SCORE_REGISTER_EXACT = 100.0
+SCORE_REGISTER_PREFIX = 50.0
+SCORE_NAME_WORD = 30.0
+SCORE_NAME_PREFIX = 20.0
+SCORE_PHONE_SUFFIX = 15.0
+SCORE_BRANCH = 10.0
+SCORE_FUZZY = 10.0  # multiplied by the similarity
+
+TRIGRAM_INDEXES = {
+    'student_name_trgm': 'UPPER(name::text)',
+    'student_register_number_trgm': 'register_number',
+    'student_phone_number_trgm': 'phone_number',
+}
+
+_word = re.compile(r'[A-Z0-9]+')
+
+# Database alias -> whether pg_trgm is installed there.
+_trigram_support = {}
+
+
+def split_query(query):
+    """Upper-cased search terms of a query; raises ValueError if there are none."""
+    terms = list(dict.fromkeys(_word.findall(query.upper())))[:MAX_TERMS]
+    if not terms:
+        raise ValueError("Enter a name, register number or phone number to search for")
+    return terms
+
+
+def search_students(query, limit, offset=0):
+    """
+    One page of students matching `query`, best first. Returns (rows, has_more);
+    each row has RESULT_FIELDS and a 'score'.
+    """
+    terms = split_query(query)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(terms, limit, offset)
+    return search_index.search(terms, limit, offset)
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_words(name):
+    return set(_word.findall((name or '').upper()))
+
+
+def phone_key(phone, reg_no):
+    """Sort key that turns "numbers ending in 4321" into a prefix lookup on "1234"."""
+    digits = ''.join(ch for ch in phone or '' if ch.isdigit())
+    return f"{digits[::-1]} {reg_no}" if digits else ''
+
+
+def similarity(left, right):
+    """pg_trgm's similarity(): shared trigrams over all trigrams of both words."""
+    a, b = trigrams(left), trigrams(right)
+    return len(a & b) / len(a | b)
+
+
+# PostgreSQL
+
+def ensure_search_indexes(using='default'):
+    """Create pg_trgm and the trigram indexes search relies on; a no-op on other databases."""
+    conn = connections[using]
+    if conn.vendor != 'postgresql':
+        return False
+    table = Student._meta.db_table
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except Exception:
+        logger.exception(
+            "Could not create the pg_trgm extension; student search will not match misspelled names "
+            "until a superuser runs CREATE EXTENSION pg_trgm"
+        )
+        return False
+    _trigram_support[using] = True
+    try:
+        with conn.cursor() as cursor:
+            for name, expression in TRIGRAM_INDEXES.items():
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {conn.ops.quote_name(table)} "
+                    f"USING gin (({expression}) gin_trgm_ops)"
+                )
+    except Exception:
+        logger.exception("Could not create the student search indexes; search will scan the table")
+        return False
+    return True
+
+
+def has_trigram_support(using='default'):
+    """Whether pg_trgm is installed; looked up once per process (restart after installing it)."""
+    if using not in _trigram_support:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_support[using] = cursor.fetchone() is not None
+        if not _trigram_support[using]:
+            logger.warning("pg_trgm is not installed; student search will not match misspelled names")
+    return _trigram_support[using]
+
+
+def _search_postgresql(terms, limit, offset):
+    fuzzy = has_trigram_support()
+    queryset = Student.objects.all()
+    score = Value(0.0, output_field=FloatField())
+    for term in terms:
+        name_prefix = Q(name__istartswith=term) | Q(name__icontains=f" {term}")
+        match = Q(register_number__startswith=term) | name_prefix
+        if term.isalpha():
+            match |= Q(register_number__contains=term)
+        if term.isdigit():
+            match |= Q(phone_number__endswith=term)
+        elif fuzzy and len(term) >= 3:
+            # <% is pg_trgm's word similarity operator, served by student_name_trgm.
+            match |= Q(RawSQL('%s <%% UPPER("name"::text)', (term,), output_field=BooleanField()))
+        queryset = queryset.filter(match)
+
+        score = score + Case(
+            When(register_number=term, then=Value(SCORE_REGISTER_EXACT)),
+            When(register_number__startswith=term, then=Value(SCORE_REGISTER_PREFIX)),
+            When(Q(name__iexact=term) | Q(name__istartswith=f"{term} ") | Q(name__iendswith=f" {term}")
+                 | Q(name__icontains=f" {term} "), then=Value(SCORE_NAME_WORD)),
+            When(name_prefix, then=Value(SCORE_NAME_PREFIX)),
+            When(phone_number__endswith=term, then=Value(SCORE_PHONE_SUFFIX)),
+            When(register_number__contains=term, then=Value(SCORE_BRANCH)),
+            default=(
+                RawSQL(f'{SCORE_FUZZY} * word_similarity(%s, UPPER("name"::text))', (term,))
+                if fuzzy else Value(0.0)
+            ),
+            output_field=FloatField(),
+        )
+
+    rows = list(
+        queryset.annotate(score=score)
+        .order_by('-score', 'register_number')
+        .values(*RESULT_FIELDS, 'score')[offset:offset + limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+
+# In-process index
+
+def _prefixed(keys, prefix):
+    """The slice of sorted `keys` that start with `prefix`."""
+    return keys[bisect.bisect_left(keys, prefix):bisect.bisect_left(keys, prefix + '\uffff')]
+
+
+def _insort(keys, key):
+    index = bisect.bisect_left(keys, key)
+    if index == len(keys) or keys[index] != key:
+        keys.insert(index, key)
+
+
+def _discard(keys, key):
+    index = bisect.bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
+
+
+class StudentSearchIndex:
+    """In-memory search structures over every Student; see the module docstring."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next search loads the index again."""
+        with self._lock:
+            self._loaded = False
+            self._clear()
+
+    def _clear(self):
+        self._docs = {}                       # register_number -> (name, phone_number, is_active)
+        self._register_numbers = []           # sorted
+        self._phone_keys = []                 # sorted "<reversed digits> <register_number>"
+        self._words = []                      # sorted distinct name words
+        self._word_students = defaultdict(set)
+        self._word_trigrams = defaultdict(set)
+        self._branches = defaultdict(set)
+        self._dirty = set()
+        self._last_updated = None
+        self._synced_at = 0.0
+
+    # Keeping in sync
+
+    def mark_dirty(self, register_number):
+        """A student was saved; re-read it before the next search."""
+        with self._lock:
+            if self._loaded:
+                self._dirty.add(register_number)
+
+    def remove(self, register_number):
+        with self._lock:
+            if self._loaded:
+                self._discard(register_number)
+
+    def _sync(self):
+        now = time.monotonic()
+        if not self._loaded:
+            self._load_all()
+        elif now - self._synced_at >= settings.SEARCH_INDEX_MAX_AGE:
+            # Bulk imports and other processes bypass the signals; updated_at catches their writes.
+            changed = Student.objects.all()
+            if self._last_updated:
+                changed = changed.filter(updated_at__gt=self._last_updated)
+            self._dirty.update(changed.values_list('register_number', flat=True))
+            self._refresh_dirty()
+            if Student.objects.count() != len(self._docs):
+                # Deleted elsewhere; only a reload notices.
+                self._load_all()
+        else:
+            self._refresh_dirty()
+            return
+        self._synced_at = now
+
+    def _load_all(self):
+        self._clear()
+        self._store(Student.objects.values_list(*RESULT_FIELDS, 'updated_at').iterator(chunk_size=5000))
+        self._loaded = True
+
+    def _refresh_dirty(self):
+        register_numbers = sorted(self._dirty)
+        self._dirty = set()
+        for start in range(0, len(register_numbers), 1000):
+            chunk = register_numbers[start:start + 1000]
+            for reg_no in chunk:
+                self._discard(reg_no)
+            self._store(Student.objects.filter(register_number__in=chunk).values_list(*RESULT_FIELDS, 'updated_at'))
+
+    def _store(self, rows):
+        for reg_no, name, phone, is_active, updated_at in rows:
+            self._add(reg_no, (name, phone, is_active))
+            if updated_at and (self._last_updated is None or updated_at > self._last_updated):
+                self._last_updated = updated_at
+
+    def _add(self, reg_no, doc):
+        self._docs[reg_no] = doc
+        _insort(self._register_numbers, reg_no)
+        for word in name_words(doc[0]):
+            if word not in self._word_students:
+                _insort(self._words, word)
+                for gram in trigrams(word):
+                    self._word_trigrams[gram].add(word)
+            self._word_students[word].add(reg_no)
+        if phone_key(doc[1], reg_no):
+            _insort(self._phone_keys, phone_key(doc[1], reg_no))
+        match = REGISTER_NUMBER_PATTERN.match(reg_no)
+        if match:
+            self._branches[match['branch']].add(reg_no)
+
+    def _discard(self, reg_no):
+        doc = self._docs.pop(reg_no, None)
+        if doc is None:
+            return
+        _discard(self._register_numbers, reg_no)
+        for word in name_words(doc[0]):
+            students = self._word_students[word]
+            students.discard(reg_no)
+            if not students:
+                del self._word_students[word]
+                _discard(self._words, word)
+                for gram in trigrams(word):
+                    self._word_trigrams[gram].discard(word)
+        if phone_key(doc[1], reg_no):
+            _discard(self._phone_keys, phone_key(doc[1], reg_no))
+        for students in self._branches.values():
+            students.discard(reg_no)
+
+    # Matching
+
+    def _term_scores(self, term):
+        scores = defaultdict(float)
+
+        def add(reg_no, score):
+            if score > scores[reg_no]:
+                scores[reg_no] = score
+
+        for reg_no in _prefixed(self._register_numbers, term):
+            add(reg_no, SCORE_REGISTER_EXACT if reg_no == term else SCORE_REGISTER_PREFIX)
+        for reg_no in self._branches.get(term, ()):
+            add(reg_no, SCORE_BRANCH)
+
+        words = _prefixed(self._words, term)
+        for word in words:
+            score = SCORE_NAME_WORD if word == term else SCORE_NAME_PREFIX
+            for reg_no in self._word_students[word]:
+                add(reg_no, score)
+        if not words and len(term) >= 3 and not term.isdigit():
+            candidates = set()
+            for gram in trigrams(term):
+                candidates.update(self._word_trigrams.get(gram, ()))
+            for word in candidates:
+                score = similarity(term, word)
+                if score >= FUZZY_THRESHOLD:
+                    for reg_no in self._word_students[word]:
+                        add(reg_no, SCORE_FUZZY * score)
+
+        if term.isdigit():
+            for key in _prefixed(self._phone_keys, term[::-1]):
+                add(key.rsplit(' ', 1)[1], SCORE_PHONE_SUFFIX)
+        return scores
+
+    def search(self, terms, limit, offset=0):
+        with self._lock:
+            self._sync()
+            totals = None
+            for term in terms:
+                scores = self._term_scores(term)
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {reg_no: total + scores[reg_no] for reg_no, total in totals.items() if reg_no in scores}
+                if not totals:
+                    return [], False
+            # Typeahead pages are small; a heap avoids sorting every match of a one-letter query.
+            page = heapq.nsmallest(offset + limit + 1, totals.items(), key=lambda item: (-item[1], item[0]))[offset:]
+            rows = [
+                dict(zip(RESULT_FIELDS, (reg_no, *self._docs[reg_no])), score=round(score, 2))
+                for reg_no, score in page[:limit]
+            ]
+        return rows, len(page) > limit
+
+
+search_index = StudentSearchIndex()
@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Student
+from .models import Student, PlacementDrive, EligibilityCriteria
+from .eligibility import validate_expression
 
 class RegisterNumberSerializer(serializers.Serializer):
     register_number = serializers.CharField()
@@ -24,5 +26,68 @@ class ForgotPasswordSerializer(serializers.Serializer):
 class StudentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Student
-        fields = '__all__'
+        # Everything staff may read; never the password hash or permission fields.
+        fields = (
+            'register_number', 'name', 'phone_number', 'dob', 'gender', 'father_name',
+            'mother_name', 'email', 'aadhar_number', 'is_active', 'updated_at',
+        )
+
+class StudentProfileUpdateSerializer(serializers.ModelSerializer):
+    otp = serializers.CharField(max_length=6, write_only=True)
+
+    class Meta:
+        model = Student
+        fields = ('otp', 'dob', 'gender', 'father_name', 'mother_name', 'email', 'aadhar_number')
+
+class StudentBatchSerializer(serializers.Serializer):
+    register_numbers = serializers.ListField(child=serializers.CharField(max_length=20), allow_empty=False)
+    fields = serializers.ListField(child=serializers.CharField(), required=False)
+
+class BroadcastSerializer(serializers.Serializer):
+    message = serializers.CharField(max_length=320)
+    prefix = serializers.CharField(max_length=20, required=False)
+    register_numbers = serializers.ListField(child=serializers.CharField(max_length=20), required=False)
+    include_inactive = serializers.BooleanField(default=False)
+
+class EligibilityCriteriaSerializer(serializers.ModelSerializer):
+    branches = serializers.ListField(child=serializers.CharField(max_length=10), required=False)
+    batch_years = serializers.ListField(child=serializers.IntegerField(min_value=2000, max_value=2100), required=False)
+
+    class Meta:
+        model = EligibilityCriteria
+        fields = (
+            'id', 'branches', 'batch_years', 'min_cgpa', 'min_tenth_percentage', 'min_twelfth_percentage',
+            'max_active_backlogs', 'max_total_backlogs', 'allow_lateral_entry', 'expression',
+        )
+
+    def validate_branches(self, value):
+        return [branch.strip().upper() for branch in value]
+
+    def validate_expression(self, value):
+        if value:
+            try:
+                validate_expression(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
+class PlacementDriveSerializer(serializers.ModelSerializer):
+    criteria = EligibilityCriteriaSerializer(many=True)
+
+    class Meta:
+        model = PlacementDrive
+        fields = ('id', 'company', 'title', 'drive_date', 'is_open', 'evaluated_at', 'criteria')
+        read_only_fields = ('evaluated_at',)
+
+    def validate_criteria(self, value):
+        if not value:
+            raise serializers.ValidationError("A drive needs at least one set of criteria")
+        return value
+
+    def create(self, validated_data):
+        criteria = validated_data.pop('criteria')
+        with transaction.atomic():
+            drive = PlacementDrive.objects.create(**validated_data)
+            EligibilityCriteria.objects.bulk_create([EligibilityCriteria(drive=drive, **rules) for rules in criteria])
+        return drive
 
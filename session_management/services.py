@@ -0,0 +1,60 @@
+"""
+Process-wide services, built on first use.
+
+Provider clients and pluggable stores are registered here by the dotted path
+of a factory. Nothing is imported or constructed until get() first asks for a
+service, so a worker, management command or test process only pays for the
+ones it uses. A missing TWILIO_* variable therefore fails the first SMS rather
+than every import. `manage.py profile_startup` reports what a worker does
+import at boot.
+
+Each factory runs once per process; reset() drops built instances (e.g. after
+overriding settings) and register() swaps a factory in.
+"""
+import threading
+
+from django.utils.module_loading import import_string
+
+SERVICES = {
+    'sms_providers': 'session_management.sms.build_providers',
+    'twilio_client': 'session_management.sms.twilio_client',
+    'otp_store': 'session_management.otp_store.build_otp_store',
+    'throttle_store': 'session_management.throttling.build_throttle_store',
+}
+
+_instances = {}
+# Reentrant: a factory may get() the services it depends on.
+_lock = threading.RLock()
+
+
+def register(name, factory):
+    """Use `factory` (a callable or its dotted path) for `name` from now on."""
+    with _lock:
+        SERVICES[name] = factory
+        _instances.pop(name, None)
+
+
+def get(name):
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            factory = SERVICES[name]
+            if isinstance(factory, str):
+                factory = import_string(factory)
+            _instances[name] = factory()
+        return _instances[name]
+
+
+def reset(*names):
+    """Forget the built instances of `names` (all services if none are given)."""
+    with _lock:
+        for name in names or list(_instances):
+            _instances.pop(name, None)
+
+
+def loaded():
+    """Names of the services built so far in this process."""
+    return sorted(_instances)
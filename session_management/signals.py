@@ -0,0 +1,67 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from session_management import metrics
+from session_management.authentication import user_cache
+from session_management.models import EligibilityCriteria, PlacementDrive, Student
+from session_management.profile_cache import invalidate_profile
+from session_management.search import ensure_search_indexes, search_index
+
+
+@receiver(post_save, sender=Student, dispatch_uid='student_saved')
+@receiver(post_delete, sender=Student, dispatch_uid='student_deleted')
+def invalidate_student_caches(sender, instance, **kwargs):
+    user_cache.invalidate(instance.register_number)
+    invalidate_profile(instance.register_number)
+
+
+@receiver(post_save, sender=Student, dispatch_uid='student_search_saved')
+def update_search_index(sender, instance, **kwargs):
+    # Re-read on the next search rather than here: the instance may have deferred fields.
+    search_index.mark_dirty(instance.register_number)
+
+
+@receiver(post_delete, sender=Student, dispatch_uid='student_search_deleted')
+def remove_from_search_index(sender, instance, **kwargs):
+    search_index.remove(instance.register_number)
+
+
+@receiver(post_migrate, dispatch_uid='student_search_indexes')
+def create_search_indexes(sender, using, **kwargs):
+    if sender.name == 'session_management':
+        ensure_search_indexes(using)
+
+
+@receiver(post_save, sender=EligibilityCriteria, dispatch_uid='eligibility_criteria_saved')
+@receiver(post_delete, sender=EligibilityCriteria, dispatch_uid='eligibility_criteria_deleted')
+def reset_drive_eligibility(sender, instance, **kwargs):
+    # The next eligibility.refresh_eligibility() for the drive starts from scratch.
+    PlacementDrive.objects.filter(pk=instance.drive_id).update(evaluated_at=None)
+
+
+# psycopg_pool stats -> gauge names; the *_ms and *_num values are cumulative.
+POOL_STATS = {
+    'pool_size': 'db_pool_size',
+    'pool_available': 'db_pool_available',
+    'requests_waiting': 'db_pool_requests_waiting',
+    'requests_num': 'db_pool_requests_total',
+    'requests_wait_ms': 'db_pool_wait_ms_total',
+    'requests_errors': 'db_pool_timeouts_total',
+    'connections_num': 'db_pool_connections_opened_total',
+}
+
+
+@receiver(connection_created, dispatch_uid='db_connection_created')
+def record_connection(sender, connection, **kwargs):
+    """
+    Count new database connections. With a connection pool this fires on every
+    checkout, so the pool's own statistics are recorded instead.
+    """
+    if not connection.settings_dict.get('OPTIONS', {}).get('pool'):
+        metrics.incr('db_connections_opened_total', alias=connection.alias)
+        return
+
+    stats = connection.pool.get_stats()
+    for stat, name in POOL_STATS.items():
+        metrics.set_gauge(name, stats.get(stat, 0), alias=connection.alias)
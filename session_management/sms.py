@@ -0,0 +1,572 @@
+"""
+Background SMS delivery.
+
+Views call enqueue_sms(), which records an SMSDelivery row and returns straight
+away. A small per-process worker pool hands queued messages to the configured
+backend, retrying transient failures with exponential backoff and holding each
+provider to its rate limit. Delivery status lives on the SMSDelivery row so
+clients can poll it through the sms-status/ endpoint. Each attempt holds a row
+lock on its message, so a worker, a retry timer and `manage.py send_pending_sms`
+never send the same message at once. Async views use
+aenqueue_sms(), and with SMS_EAGER the message is sent through the backend's
+asend() without tying up a thread.
+
+Every send is bounded by SMS_TIMEOUT and goes through a provider (a backend
+with its own rate limiter and circuit breaker). While SMS_BACKEND's breaker is
+open, sends fail over to SMS_FAILOVER_BACKENDS in order, or fail straight away
+with SMSUnavailable if none is up, instead of tying up workers waiting on a
+degraded provider. A queued message deferred that way waits for the next trial
+send, but is marked failed once it is SMS_DEFER_MAX_AGE seconds old. Breaker state and per-provider send latency are exported as
+the sms_breaker_state and sms_send_duration_seconds metrics.
+"""
+import asyncio
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from session_management import metrics, services
+from session_management.instrumentation import timed
+from session_management.models import SMSDelivery
+
+logger = logging.getLogger(__name__)
+
+
+class SMSPermanentError(Exception):
+    """The provider rejected the message in a way a retry cannot fix (bad number, etc.)."""
+
+
+class SMSUnavailable(Exception):
+    """
+    Every provider's circuit breaker is open; the send was not attempted.
+    retry_after is the number of seconds until a breaker lets a trial send through.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__("Every SMS provider is unavailable; try again shortly")
+        self.retry_after = retry_after
+
+
+class SMSBackend:
+    name = 'base'
+
+    def send(self, to, body):
+        """Send one message and return the provider's message id."""
+        raise NotImplementedError
+
+    async def asend(self, to, body):
+        return await sync_to_async(self.send, thread_sensitive=False)(to, body)
+
+
+def twilio_client(http_client=None):
+    """A Twilio REST client for the configured account; the 'twilio_client' service."""
+    missing = [name for name in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE') if not getattr(settings, name)]
+    if missing:
+        raise ImproperlyConfigured(f"Set {', '.join(missing)} to send SMS through Twilio")
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.rest import Client
+
+    return Client(
+        settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN,
+        http_client=http_client or TwilioHttpClient(timeout=settings.SMS_TIMEOUT),
+    )
+
+
+class TwilioBackend(SMSBackend):
+    name = 'twilio'
+
+    def __init__(self):
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def send(self, to, body):
+        from twilio.base.exceptions import TwilioRestException
+
+        client = services.get('twilio_client')
+        try:
+            message = client.messages.create(body=body, from_=settings.TWILIO_PHONE, to=to)
+        except TwilioRestException as e:
+            if e.status and 400 <= e.status < 500 and e.status != 429:
+                raise SMSPermanentError(str(e)) from e
+            raise
+        return message.sid
+
+    def _async_client(self):
+        # aiohttp sessions belong to the event loop that created them.
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            from twilio.http.async_http_client import AsyncTwilioHttpClient
+
+            client = twilio_client(http_client=AsyncTwilioHttpClient(timeout=settings.SMS_TIMEOUT))
+            self._async_clients[loop] = client
+        return client
+
+    async def asend(self, to, body):
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            message = await self._async_client().messages.create_async(
+                body=body, from_=settings.TWILIO_PHONE, to=to
+            )
+        except TwilioRestException as e:
+            if e.status and 400 <= e.status < 500 and e.status != 429:
+                raise SMSPermanentError(str(e)) from e
+            raise
+        return message.sid
+
+
+class LocMemBackend(SMSBackend):
+    """Keeps sent messages in LocMemBackend.outbox; for tests and offline development."""
+    name = 'locmem'
+    outbox = []
+    _lock = threading.Lock()
+
+    def send(self, to, body):
+        with self._lock:
+            self.outbox.append({'to': to, 'body': body})
+            return f"locmem-{len(self.outbox)}"
+
+    async def asend(self, to, body):
+        return self.send(to, body)
+
+
+class StubBackend(LocMemBackend):
+    """
+    LocMemBackend that behaves like a remote provider: every send takes
+    settings.SMS_STUB_LATENCY seconds and fails transiently with probability
+    settings.SMS_STUB_FAILURE_RATE. For exercising retries, concurrency and
+    rate limits (e.g. a broadcast) without a real account.
+    """
+    name = 'stub'
+
+    def _fail(self):
+        if settings.SMS_STUB_LATENCY > settings.SMS_TIMEOUT:
+            raise TimeoutError(f"stub provider: no response within {settings.SMS_TIMEOUT}s")
+        if random.random() < settings.SMS_STUB_FAILURE_RATE:
+            raise ConnectionError("stub provider: simulated failure")
+
+    def send(self, to, body):
+        # Like an HTTP client with a timeout, never waits longer than SMS_TIMEOUT.
+        time.sleep(min(settings.SMS_STUB_LATENCY, settings.SMS_TIMEOUT))
+        self._fail()
+        return super().send(to, body)
+
+    async def asend(self, to, body):
+        await asyncio.sleep(min(settings.SMS_STUB_LATENCY, settings.SMS_TIMEOUT))
+        self._fail()
+        return super().send(to, body)
+
+
+class ConsoleBackend(SMSBackend):
+    """Prints each message to stdout; for local development."""
+    name = 'console'
+    _lock = threading.Lock()
+
+    def send(self, to, body):
+        with self._lock:
+            sys.stdout.write(f"SMS to {to}: {body}\n")
+            sys.stdout.flush()
+        return f"console-{uuid.uuid4().hex}"
+
+
+class FileBackend(SMSBackend):
+    """Appends each message as a JSON line to settings.SMS_FILE_PATH."""
+    name = 'file'
+    _lock = threading.Lock()
+
+    def send(self, to, body):
+        record = {'to': to, 'body': body, 'sent_at': time.time()}
+        with self._lock:
+            with open(settings.SMS_FILE_PATH, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(record) + '\n')
+        return f"file-{record['sent_at']}"
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` sends per second with bursts of up to `rate`."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate or 0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is free; otherwise return how long until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while wait := self._take():
+            time.sleep(wait)
+
+    async def aacquire(self):
+        if not self.rate:
+            return
+        while wait := self._take():
+            await asyncio.sleep(wait)
+
+
+def retry_delay(error, attempts):
+    """Backoff in seconds before retrying a send that failed with `error`, or None to give up."""
+    if isinstance(error, SMSPermanentError) or attempts > settings.SMS_MAX_RETRIES:
+        return None
+    return settings.SMS_RETRY_BACKOFF * 2 ** (attempts - 1)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a provider is unhealthy. SMS_BREAKER_THRESHOLD transient
+    failures in a row open the breaker and sends skip the provider for
+    SMS_BREAKER_RESET_SECONDS; then a single trial send is let through
+    (half-open), which closes the breaker again or re-opens it. Permanent
+    rejections (SMSPermanentError) mean the provider answered and count as
+    successes. State is per process and exported as the sms_breaker_state gauge.
+    """
+    CLOSED = 'closed'
+    HALF_OPEN = 'half_open'
+    OPEN = 'open'
+    GAUGE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name, threshold, reset_seconds):
+        self.name = name
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge('sms_breaker_state', self.GAUGE_VALUES[state], provider=self.name)
+        metrics.incr('sms_breaker_transitions_total', provider=self.name, state=state)
+
+    def allow(self):
+        """Whether a send may go to the provider now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def retry_after(self):
+        """Seconds until allow() may let a send through (0 while closed)."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            if self.state == self.HALF_OPEN:
+                # The trial send in flight settles it within SMS_TIMEOUT.
+                return settings.SMS_TIMEOUT if self._trial else 0.0
+            return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial = False
+            if self.state != self.CLOSED:
+                logger.info("SMS provider %s recovered; circuit closed", self.name)
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                logger.warning(
+                    "SMS provider %s failed %s times in a row; circuit open for %ss",
+                    self.name, self.failures, self.reset_seconds,
+                )
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+
+class SMSProvider:
+    """A backend with its own rate limiter and circuit breaker."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.limiter = RateLimiter(settings.SMS_RATE_LIMITS.get(backend.name, settings.SMS_RATE_LIMIT))
+        self.breaker = CircuitBreaker(backend.name, settings.SMS_BREAKER_THRESHOLD, settings.SMS_BREAKER_RESET_SECONDS)
+
+    def record(self, started, error=None):
+        """Account for one send that began at `started` (time.perf_counter())."""
+        if error is None:
+            outcome = 'sent'
+        elif isinstance(error, SMSPermanentError):
+            outcome = 'rejected'
+        else:
+            outcome = 'error'
+        metrics.observe('sms_send_duration_seconds', time.perf_counter() - started, provider=self.name, outcome=outcome)
+        if outcome == 'error':
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+
+def build_providers():
+    """SMS_BACKEND followed by SMS_FAILOVER_BACKENDS, in order; the 'sms_providers' service."""
+    return [
+        SMSProvider(import_string(path)())
+        for path in [settings.SMS_BACKEND, *settings.SMS_FAILOVER_BACKENDS]
+    ]
+
+
+class SMSDispatcher:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    @property
+    def providers(self):
+        return services.get('sms_providers')
+
+    @property
+    def backend(self):
+        """The primary backend; messages go to the failover backends only while it is down."""
+        return self.providers[0].backend
+
+    def enqueue(self, to, body):
+        delivery = SMSDelivery.objects.create(to=to, body=body, provider=self.backend.name)
+        if settings.SMS_EAGER:
+            # One attempt on the request thread; retries wait out their backoff on the workers.
+            delay = self.deliver(delivery.pk)
+            if delay is not None:
+                transaction.on_commit(lambda: self.submit(delivery.pk, delay=delay))
+            delivery.refresh_from_db()
+        else:
+            transaction.on_commit(lambda: self.submit(delivery.pk))
+        return delivery
+
+    def submit(self, delivery_id, delay=0):
+        self._ensure_workers()
+        if delay:
+            timer = threading.Timer(delay, self._queue.put, args=(delivery_id,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._queue.put(delivery_id)
+
+    def _ensure_workers(self):
+        if len(self._workers) >= settings.SMS_WORKERS:
+            return
+        with self._lock:
+            while len(self._workers) < settings.SMS_WORKERS:
+                worker = threading.Thread(
+                    target=self._run, name=f"sms-worker-{len(self._workers)}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self):
+        while True:
+            delivery_id = self._queue.get()
+            try:
+                delay = self.deliver(delivery_id)
+                if delay is not None:
+                    self.submit(delivery_id, delay=delay)
+            except Exception:
+                logger.exception("SMS delivery %s crashed", delivery_id)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def deliver(self, delivery_id):
+        """
+        Make one delivery attempt. Returns the backoff delay in seconds if the
+        message should be retried, otherwise None.
+        """
+        with transaction.atomic():
+            delivery = self.claim(delivery_id)
+            if delivery is None:
+                return None
+            return self.attempt(delivery)
+
+    def claim(self, delivery_id, queued_before=None):
+        """
+        Lock a queued message for one attempt, or return None if it is no
+        longer queued or another worker (or send_pending_sms) holds it. Call
+        inside transaction.atomic(); the lock lasts until it commits, so the
+        same message is never sent twice concurrently. queued_before skips
+        messages attempted since then.
+        """
+        claimed = SMSDelivery.objects.select_for_update(skip_locked=True).filter(
+            pk=delivery_id, status=SMSDelivery.QUEUED,
+        )
+        if queued_before is not None:
+            claimed = claimed.filter(updated_at__lt=queued_before)
+        return claimed.first()
+
+    def attempt(self, delivery):
+        """Send a claimed message once and save the outcome; returns the retry delay or None."""
+        try:
+            provider, message_id = self._send(delivery.to, delivery.body)
+        except Exception as e:
+            update_fields, delay = self._record_attempt(delivery, error=e)
+        else:
+            update_fields, delay = self._record_attempt(delivery, message_id=message_id, provider=provider)
+        delivery.save(update_fields=update_fields)
+        return delay
+
+    def send(self, to, body):
+        """
+        Send one message straight away, within the provider's rate limit, and
+        return the provider's message id. Nothing is recorded; callers that
+        need delivery state keep their own (see enqueue() and broadcast.py).
+        """
+        return self._send(to, body)[1]
+
+    def _send(self, to, body):
+        """
+        Send through the first provider whose breaker allows it, failing over
+        to the next on a transient error. Returns (provider name, message id).
+        """
+        error = None
+        for provider in self.providers:
+            if not provider.breaker.allow():
+                continue
+            provider.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                with timed('sms'):
+                    message_id = provider.backend.send(to, body)
+            except Exception as e:
+                provider.record(started, error=e)
+                if isinstance(e, SMSPermanentError):
+                    raise
+                error = e
+            else:
+                provider.record(started)
+                return provider.name, message_id
+        raise error or self._unavailable()
+
+    def _unavailable(self):
+        # Never less than a moment, so deferred sends do not spin while a trial is being decided.
+        return SMSUnavailable(max(0.1, min(provider.breaker.retry_after() for provider in self.providers)))
+
+    async def _asend(self, to, body):
+        """_send() for the event loop; each call is cut off after SMS_TIMEOUT."""
+        error = None
+        for provider in self.providers:
+            if not provider.breaker.allow():
+                continue
+            await provider.limiter.aacquire()
+            started = time.perf_counter()
+            try:
+                with timed('sms'):
+                    message_id = await asyncio.wait_for(provider.backend.asend(to, body), settings.SMS_TIMEOUT)
+            except Exception as e:
+                provider.record(started, error=e)
+                if isinstance(e, SMSPermanentError):
+                    raise
+                error = e
+            else:
+                provider.record(started)
+                return provider.name, message_id
+        raise error or self._unavailable()
+
+    async def aenqueue(self, to, body):
+        delivery = await SMSDelivery.objects.acreate(to=to, body=body, provider=self.backend.name)
+        if settings.SMS_EAGER:
+            delay = await self.adeliver(delivery.pk)
+            if delay is not None:
+                self.submit(delivery.pk, delay=delay)
+            await delivery.arefresh_from_db()
+        else:
+            # Async views run in autocommit, so the row is already visible to the workers.
+            self.submit(delivery.pk)
+        return delivery
+
+    async def adeliver(self, delivery_id):
+        """
+        deliver() for the event loop: awaits the backend and the rate limiter.
+        Only aenqueue() calls it, for the row it has just created and not yet
+        submitted, so no other worker can be holding that message.
+        """
+        delivery = await SMSDelivery.objects.aget(pk=delivery_id)
+        if delivery.status != SMSDelivery.QUEUED:
+            return None
+
+        try:
+            provider, message_id = await self._asend(delivery.to, delivery.body)
+        except Exception as e:
+            update_fields, delay = self._record_attempt(delivery, error=e)
+        else:
+            update_fields, delay = self._record_attempt(delivery, message_id=message_id, provider=provider)
+        await delivery.asave(update_fields=update_fields)
+        return delay
+
+    def _record_attempt(self, delivery, message_id=None, error=None, provider=None):
+        """Apply one attempt's outcome to `delivery`; returns (update_fields, retry delay or None)."""
+        if isinstance(error, SMSUnavailable):
+            # No provider was called, so this is a deferral rather than a failed attempt,
+            # until the message has waited SMS_DEFER_MAX_AGE (by then an OTP in it has expired).
+            delivery.last_error = str(error)
+            remaining = settings.SMS_DEFER_MAX_AGE - (timezone.now() - delivery.created_at).total_seconds()
+            if remaining > 0:
+                return ['last_error', 'updated_at'], min(error.retry_after, remaining)
+            delivery.status = SMSDelivery.FAILED
+            delivery.body = ''
+            logger.warning(
+                "SMS %s to %s failed: no provider available for %ss", delivery.pk, delivery.to,
+                settings.SMS_DEFER_MAX_AGE,
+            )
+            return ['status', 'body', 'last_error', 'updated_at'], None
+        delivery.attempts += 1
+        if error is not None:
+            delivery.last_error = str(error)
+            delay = retry_delay(error, delivery.attempts)
+            if delay is None:
+                delivery.status = SMSDelivery.FAILED
+                delivery.body = ''
+                logger.warning(
+                    "SMS %s to %s failed after %s attempts: %s", delivery.pk, delivery.to, delivery.attempts, error
+                )
+            return ['attempts', 'status', 'body', 'last_error', 'updated_at'], delay
+
+        # The body usually carries an OTP; there is no reason to keep it once sent.
+        delivery.status = SMSDelivery.SENT
+        delivery.provider = provider or delivery.provider
+        delivery.provider_message_id = message_id or ''
+        delivery.body = ''
+        delivery.last_error = ''
+        return ['attempts', 'status', 'body', 'provider', 'provider_message_id', 'last_error', 'updated_at'], None
+
+
+dispatcher = SMSDispatcher()
+
+
+def enqueue_sms(to, body):
+    return dispatcher.enqueue(to, body)
+
+
+async def aenqueue_sms(to, body):
+    return await dispatcher.aenqueue(to, body)
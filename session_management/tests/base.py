@@ -0,0 +1,34 @@
+"""Fixtures shared by the session_management test modules."""
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from session_management.authentication import issue_tokens, user_cache
+from session_management.blacklist import blacklist_filter
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+
+def create_student(register_number, name='TEST STUDENT', phone_number='+919000000000', **fields):
+    from session_management.models import Student
+
+    return Student.objects.create(register_number=register_number, name=name, phone_number=phone_number, **fields)
+
+
+def api_client(student=None):
+    client = APIClient()
+    if student is not None:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(student).access_token}")
+    return client
+
+
+def reset_process_state():
+    """Per-process caches outlive each test's rolled-back transaction."""
+    user_cache.clear()
+    blacklist_filter.reset()
+    caches['default'].clear()
+
+
+class PortalTestCase(TestCase):
+    def setUp(self):
+        reset_process_state()
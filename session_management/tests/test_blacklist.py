@@ -0,0 +1,54 @@
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from session_management.authentication import issue_tokens
+from session_management.blacklist import BloomFilter, blacklist_filter
+from session_management.tests.base import TEST_CACHES, PortalTestCase, create_student
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RefreshTokenTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = create_student('Y22CSE279001')
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post('/auth/refresh/', {'refresh': str(token)}, format='json')
+
+    def test_rotation_blacklists_the_presented_token(self):
+        token = issue_tokens(self.student)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], str(token))
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_replay_is_rejected_even_with_a_stale_filter(self):
+        token = issue_tokens(self.student)
+        self.assertFalse(blacklist_filter.might_contain(token['jti']))
+        # Blacklisted by another worker; this process's filter has not synced since.
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        self.assertFalse(blacklist_filter.might_contain(token['jti']))
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_logout_blacklists_the_token(self):
+        token = issue_tokens(self.student)
+        self.assertEqual(self.client.post('/auth/logout/', {'refresh': str(token)}, format='json').status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_inactive_student_cannot_refresh(self):
+        token = issue_tokens(self.student)
+        self.student.is_active = False
+        self.student.save(update_fields=['is_active', 'updated_at'])
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(100)
+        for jti in ('a', 'b', 'c'):
+            bloom.add(jti)
+        self.assertIn('b', bloom)
+        self.assertEqual(sum(f"other-{i}" in bloom for i in range(1000)), 0)
@@ -0,0 +1,98 @@
+import time
+from datetime import timedelta
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from session_management import services
+from session_management.broadcast import claim_broadcast, create_broadcast, heartbeat, run_broadcast
+from session_management.models import Broadcast, BroadcastRecipient
+from session_management.sms import LocMemBackend
+from session_management.tests.base import TEST_CACHES, PortalTestCase, create_student
+
+SMS_SETTINGS = {
+    'CACHES': TEST_CACHES,
+    'SMS_BACKEND': 'session_management.sms.LocMemBackend',
+    'SMS_FAILOVER_BACKENDS': [],
+    'SMS_RATE_LIMITS': {},
+    'SMS_RATE_LIMIT': 0,
+}
+
+
+def make_stale(broadcast):
+    Broadcast.objects.filter(pk=broadcast.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+
+@override_settings(**SMS_SETTINGS)
+class BroadcastTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        services.reset('sms_providers')
+        self.addCleanup(services.reset, 'sms_providers')
+        LocMemBackend.outbox.clear()
+        self.addCleanup(LocMemBackend.outbox.clear)
+        for i in range(1, 6):
+            create_student(f"Y22CSE27900{i}", phone_number=f"900000000{i}")
+        create_student('Y22ECE279009', phone_number='9000000009')
+        self.broadcast = create_broadcast("Drive on Monday", {'prefix': 'y22cse'})
+
+    def test_claim_is_exclusive_until_the_runner_goes_quiet(self):
+        self.assertTrue(claim_broadcast(self.broadcast.pk))
+        self.assertFalse(claim_broadcast(self.broadcast.pk))
+
+        make_stale(self.broadcast)
+        self.assertTrue(claim_broadcast(self.broadcast.pk))
+
+        Broadcast.objects.filter(pk=self.broadcast.pk).update(status=Broadcast.COMPLETED)
+        make_stale(self.broadcast)
+        self.assertFalse(claim_broadcast(self.broadcast.pk))
+
+    def test_sends_to_the_audience(self):
+        claim_broadcast(self.broadcast.pk)
+        broadcast = run_broadcast(self.broadcast, chunk_size=2, workers=2)
+
+        self.assertEqual(broadcast.status, Broadcast.COMPLETED)
+        self.assertEqual((broadcast.recipients, broadcast.sent, broadcast.failed), (5, 5, 0))
+        self.assertEqual(
+            sorted(message['to'] for message in LocMemBackend.outbox),
+            [f"+91900000000{i}" for i in range(1, 6)],
+        )
+
+    def test_resumes_without_sending_twice(self):
+        class Interrupted(Exception):
+            pass
+
+        def interrupt(broadcast):
+            raise Interrupted
+
+        claim_broadcast(self.broadcast.pk)
+        with self.assertRaises(Interrupted):
+            run_broadcast(self.broadcast, chunk_size=2, workers=1, progress=interrupt)
+        self.assertEqual(len(LocMemBackend.outbox), 2)
+
+        make_stale(self.broadcast)
+        self.assertTrue(claim_broadcast(self.broadcast.pk))
+        broadcast = run_broadcast(Broadcast.objects.get(pk=self.broadcast.pk), chunk_size=2, workers=1)
+
+        self.assertEqual((broadcast.status, broadcast.sent), (Broadcast.COMPLETED, 5))
+        recipients = [message['to'] for message in LocMemBackend.outbox]
+        self.assertEqual(len(recipients), len(set(recipients)))
+        self.assertEqual(len(recipients), 5)
+        self.assertFalse(BroadcastRecipient.objects.exclude(status=BroadcastRecipient.SENT).exists())
+
+
+@override_settings(BROADCAST_STALE_SECONDS=1)
+class BroadcastHeartbeatTests(TransactionTestCase):
+    # The heartbeat writes from its own thread, which only sees committed rows.
+
+    def test_heartbeat_keeps_a_slow_broadcast_claimed(self):
+        broadcast = create_broadcast("Drive on Monday", {'prefix': 'Y22CSE'})
+        self.assertTrue(claim_broadcast(broadcast.pk))
+        make_stale(broadcast)
+
+        with heartbeat(broadcast.pk, 0.05):
+            time.sleep(0.3)
+        self.assertFalse(claim_broadcast(broadcast.pk))
+
+        make_stale(broadcast)
+        self.assertTrue(claim_broadcast(broadcast.pk))
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from session_management.eligibility import refresh_eligibility, validate_expression
+from session_management.models import AcademicRecord, DriveEligibility, EligibilityCriteria, PlacementDrive, Student
+from session_management.tests.base import PortalTestCase, create_student
+
+
+class EligibilityTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        scores = {
+            'Y22CSE279001': ('8.50', '70.00'),
+            'Y22CSE279002': ('7.20', '90.00'),
+            'Y22CSE279003': ('7.20', '60.00'),
+            'Y22ECE279004': ('9.10', '95.00'),
+        }
+        for register_number, (cgpa, twelfth) in scores.items():
+            create_student(register_number)
+            AcademicRecord.objects.create(
+                student_id=register_number, branch=register_number[3:6], batch_year=2022,
+                cgpa=Decimal(cgpa), twelfth_percentage=Decimal(twelfth),
+            )
+        self.drive = PlacementDrive.objects.create(company='Acme')
+        EligibilityCriteria.objects.create(
+            drive=self.drive, branches=['CSE'],
+            expression="cgpa >= 8 or (cgpa >= 7 and twelfth_percentage >= 85)",
+        )
+
+    def eligible(self):
+        return set(DriveEligibility.objects.filter(drive=self.drive).values_list('student_id', flat=True))
+
+    def test_validate_expression(self):
+        validate_expression("cgpa >= 7.5 and active_backlogs == 0")
+        validate_expression("not (branch in ['CSE', 'ECE'])")
+        for expression, message in (
+            ("cgpa", "must be a condition"),
+            ("cgpa + 1", "must be a condition"),
+            ("cgpa >= 8 or cgpa", "must be a condition"),
+            ("aadhar_number == 1", "Unknown column"),
+            ("__import__('os')", "may not use Call"),
+            ("cgpa >=", "Invalid expression"),
+        ):
+            with self.subTest(expression=expression), self.assertRaisesMessage(ValueError, message):
+                validate_expression(expression)
+
+    def test_full_then_incremental_refresh(self):
+        summary = refresh_eligibility(self.drive)
+        self.assertTrue(summary['full'])
+        self.assertEqual(self.eligible(), {'Y22CSE279001', 'Y22CSE279002'})
+
+        record = AcademicRecord.objects.get(pk='Y22CSE279001')
+        record.cgpa = Decimal('6.00')
+        record.save()
+        summary = refresh_eligibility(self.drive)
+        self.assertFalse(summary['full'])
+        self.assertEqual((summary['evaluated'], summary['added'], summary['removed']), (1, 0, 1))
+        self.assertEqual(self.eligible(), {'Y22CSE279002'})
+
+    def test_changing_criteria_forces_a_full_refresh(self):
+        refresh_eligibility(self.drive)
+        self.drive.criteria.update(branches=[])
+        criteria = self.drive.criteria.get()
+        criteria.save()
+        summary = refresh_eligibility(self.drive)
+        self.assertTrue(summary['full'])
+        self.assertEqual(self.eligible(), {'Y22CSE279001', 'Y22CSE279002', 'Y22ECE279004'})
+
+    def test_inactive_students_are_not_eligible(self):
+        Student.objects.filter(pk='Y22CSE279002').update(is_active=False)
+        refresh_eligibility(self.drive)
+        self.assertEqual(self.eligible(), {'Y22CSE279001'})
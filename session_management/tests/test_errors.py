@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import override_settings
+
+from session_management.errors import MAX_SAMPLES, fingerprint_exception, record_errors, top_errors
+from session_management.models import ErrorFingerprint, ErrorLogs, ErrorOccurrenceBucket
+from session_management.tests.base import TEST_CACHES, PortalTestCase, api_client, create_student
+
+HOUR = datetime(2026, 1, 5, 10, tzinfo=dt_timezone.utc)
+
+
+def raise_lookup(key):
+    return {}[key]
+
+
+def error_record(e, occurred_at, error=None):
+    fingerprint, exception_type, message = fingerprint_exception(e)
+    return {
+        'error': error or str(e),
+        'error_trace': '',
+        'fingerprint': fingerprint,
+        'exception_type': exception_type,
+        'message': message,
+        'occurred_at': occurred_at.isoformat(),
+    }
+
+
+def caught(key):
+    try:
+        raise_lookup(key)
+    except KeyError as e:
+        return e
+
+
+class FingerprintTests(PortalTestCase):
+    def test_same_failure_with_different_values_shares_a_fingerprint(self):
+        first, second = fingerprint_exception(caught('a')), fingerprint_exception(caught('b'))
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(first[1], 'KeyError')
+
+    def test_unraised_errors_group_by_normalized_message(self):
+        first = fingerprint_exception(message="Order 1234 failed")
+        self.assertEqual(first, fingerprint_exception(message="Order 98 failed"))
+        self.assertEqual(first[2], "Order <n> failed")
+        self.assertNotEqual(first[0], fingerprint_exception(message="Order 98 timed out")[0])
+
+
+class RecordErrorsTests(PortalTestCase):
+    def test_rolls_up_counts_and_hourly_buckets(self):
+        e = caught('a')
+        record_errors([
+            error_record(e, HOUR + timedelta(minutes=5)),
+            error_record(e, HOUR + timedelta(minutes=50)),
+            error_record(e, HOUR + timedelta(hours=1, minutes=1)),
+        ])
+        record_errors([error_record(e, HOUR + timedelta(minutes=30))])
+
+        self.assertEqual(ErrorLogs.objects.count(), 4)
+        rollup = ErrorFingerprint.objects.get()
+        self.assertEqual((rollup.count, rollup.exception_type), (4, 'KeyError'))
+        self.assertEqual(rollup.first_seen, HOUR + timedelta(minutes=5))
+        self.assertEqual(rollup.last_seen, HOUR + timedelta(hours=1, minutes=1))
+        self.assertEqual(
+            dict(ErrorOccurrenceBucket.objects.values_list('bucket_start', 'count')),
+            {HOUR: 3, HOUR + timedelta(hours=1): 1},
+        )
+
+    def test_keeps_the_latest_samples(self):
+        e = caught('a')
+        errors = [f"sample {batch}-{i}" for batch in range(3) for i in range(3)]
+        for batch in range(3):
+            record_errors([error_record(e, HOUR, error=error) for error in errors[batch * 3:batch * 3 + 3]])
+
+        samples = ErrorFingerprint.objects.get().samples
+        self.assertEqual([sample['error'] for sample in samples], errors[-MAX_SAMPLES:])
+
+    def test_top_errors_ranks_by_occurrences_in_the_window(self):
+        common, rare = caught('a'), ValueError("bad value")
+        record_errors([error_record(common, HOUR)] * 3 + [error_record(rare, HOUR)])
+        record_errors([error_record(rare, HOUR - timedelta(days=2))] * 5)
+
+        results = top_errors(HOUR, HOUR + timedelta(hours=1))
+        self.assertEqual([(row['exception_type'], row['occurrences']) for row in results], [
+            ('KeyError', 3), ('ValueError', 1),
+        ])
+        self.assertEqual(results[1]['total'], 6)
+        self.assertEqual(len(top_errors(HOUR, HOUR + timedelta(hours=1), limit=1)), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TopErrorsViewTests(PortalTestCase):
+    def test_staff_only(self):
+        record_errors([error_record(caught('a'), HOUR)])
+        url = f"/auth/errors/top/?since={HOUR.isoformat()}&until={(HOUR + timedelta(hours=1)).isoformat()}"
+        url = url.replace('+', '%2B')
+
+        student = create_student('Y22CSE279001')
+        self.assertEqual(api_client(student).get(url).status_code, 403)
+        response = api_client(create_student('STAFF001', is_staff=True)).get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['errors'][0]['occurrences'], 1)
+        self.assertEqual(api_client(create_student('STAFF002', is_staff=True)).get(url + '&limit=x').status_code, 400)
@@ -0,0 +1,84 @@
+import csv
+import os
+import tempfile
+from decimal import Decimal
+
+from django.test import override_settings
+
+from session_management.importer import (
+    CGPA_COLUMN, NAME_COLUMN, PHONE_COLUMN, REGISTER_COLUMN, AcademicImporter, StudentImporter,
+)
+from session_management.models import AcademicRecord, Student
+from session_management.tests.base import TEST_CACHES, PortalTestCase, api_client
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StudentImporterTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.rows = [(f"Y22CSE27900{i}", f"STUDENT {i}", f"900000000{i}") for i in range(1, 4)]
+
+    def write(self, name, header, rows):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return path
+
+    def import_students(self, **options):
+        roster = self.write('roster.csv', [REGISTER_COLUMN, NAME_COLUMN, PHONE_COLUMN], self.rows)
+        return StudentImporter(batch_size=2, **options).run(roster)
+
+    def test_reimport_leaves_unchanged_students_alone(self):
+        report = self.import_students()
+        self.assertEqual((report.created, report.updated, report.unchanged), (3, 0, 0))
+        before = dict(Student.objects.values_list('register_number', 'updated_at'))
+        client = api_client(Student.objects.get(pk='Y22CSE279001'))
+        url = '/auth/student/?register_number=Y22CSE279001'
+        etag = client.get(url)['ETag']
+
+        report = self.import_students()
+        self.assertEqual((report.created, report.updated, report.unchanged), (0, 0, 3))
+        self.assertEqual(dict(Student.objects.values_list('register_number', 'updated_at')), before)
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_reimport_updates_changed_students(self):
+        self.import_students()
+        before = Student.objects.get(pk='Y22CSE279002').updated_at
+
+        self.rows[1] = ('Y22CSE279002', 'STUDENT TWO', '9000000022')
+        report = self.import_students()
+        self.assertEqual((report.created, report.updated, report.unchanged), (0, 1, 2))
+        student = Student.objects.get(pk='Y22CSE279002')
+        self.assertEqual((student.name, student.phone_number), ('STUDENT TWO', '+919000000022'))
+        self.assertGreater(student.updated_at, before)
+
+    def test_dry_run_classifies_without_writing(self):
+        self.import_students()
+        self.rows[0] = ('Y22CSE279001', 'STUDENT ONE', '9000000001')
+        self.rows.append(('Y22CSE279004', 'STUDENT 4', '9000000004'))
+
+        report = self.import_students(dry_run=True)
+        self.assertEqual((report.created, report.updated, report.unchanged), (1, 1, 2))
+        self.assertEqual(Student.objects.get(pk='Y22CSE279001').name, 'STUDENT 1')
+        self.assertFalse(Student.objects.filter(pk='Y22CSE279004').exists())
+
+    def test_academic_reimport_only_writes_changed_records(self):
+        self.import_students()
+        header = [REGISTER_COLUMN, CGPA_COLUMN]
+        academics = self.write('academics.csv', header, [('Y22CSE279001', '8.5'), ('Y22CSE279002', '7.25')])
+        report = AcademicImporter().run(academics)
+        self.assertEqual((report.created, report.updated, report.unchanged), (2, 0, 0))
+        before = dict(AcademicRecord.objects.values_list('student_id', 'updated_at'))
+
+        academics = self.write('academics.csv', header, [('Y22CSE279001', '8.50'), ('Y22CSE279002', '7.5')])
+        report = AcademicImporter().run(academics)
+        self.assertEqual((report.created, report.updated, report.unchanged), (0, 1, 1))
+        after = dict(AcademicRecord.objects.values_list('student_id', 'updated_at'))
+        self.assertEqual(after['Y22CSE279001'], before['Y22CSE279001'])
+        self.assertGreater(after['Y22CSE279002'], before['Y22CSE279002'])
+        self.assertEqual(AcademicRecord.objects.get(pk='Y22CSE279002').cgpa, Decimal('7.5'))
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+
+from session_management import services
+from session_management.management.commands.loadtest import percentile
+from session_management.tests.base import TEST_CACHES, reset_process_state
+
+# settings_bench, with a fast hasher so the flows finish quickly.
+BENCH_SETTINGS = {
+    'CACHES': TEST_CACHES,
+    'SMS_BACKEND': 'session_management.sms.LocMemBackend',
+    'SMS_FAILOVER_BACKENDS': [],
+    'SMS_EAGER': True,
+    'OTP_STORE_BACKEND': 'session_management.otp_store.LocMemOTPStore',
+    'AUTH_THROTTLE_RATES': {},
+    'ERROR_LOG_ASYNC': False,
+    'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+}
+
+
+@override_settings(**BENCH_SETTINGS)
+class LoadTestCommandTests(TransactionTestCase):
+    # The flows run on worker threads, which only see committed rows.
+
+    def setUp(self):
+        reset_process_state()
+        services.reset()
+        self.addCleanup(services.reset)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def loadtest(self, **options):
+        stdout, stderr = StringIO(), StringIO()
+        # The in-memory test database allows one writer at a time.
+        call_command('loadtest', users=2, concurrency=1, no_setup=True, stdout=stdout, stderr=stderr, **options)
+        return json.loads(stdout.getvalue()), stderr.getvalue()
+
+    def test_reports_every_endpoint_of_the_flow(self):
+        output = os.path.join(self.directory, 'report.json')
+        report, _ = self.loadtest(output=output)
+
+        self.assertEqual(report['totals']['errors'], 0)
+        self.assertEqual(report['database'], connection.vendor)
+        self.assertEqual(
+            set(report['endpoints']),
+            {
+                'verify-register', 'verify-otp', 'set-password', 'login', 'student GET',
+                'student POST (otp)', 'student POST (update)', 'student PATCH', 'refresh', 'logout',
+            },
+        )
+        login = report['endpoints']['login']
+        self.assertEqual(login['requests'], 2)
+        self.assertLessEqual(login['p50_ms'], login['p95_ms'])
+        self.assertGreater(login['queries_per_request'], 0)
+        with open(output, encoding='utf-8') as handle:
+            self.assertEqual(json.load(handle)['endpoints'].keys(), report['endpoints'].keys())
+
+    def test_compare_fails_on_a_p95_regression(self):
+        baseline = os.path.join(self.directory, 'baseline.json')
+        with open(baseline, 'w', encoding='utf-8') as handle:
+            json.dump({'commit': 'abc123', 'endpoints': {'login': {'p95_ms': 1e-6, 'queries_per_request': 1}}}, handle)
+        with self.assertRaisesMessage(CommandError, "p95 regressed by more than 50.0% on: login"):
+            self.loadtest(compare=baseline, fail_threshold=50.0)
+
+        with open(baseline, 'w', encoding='utf-8') as handle:
+            json.dump({'commit': 'abc123', 'endpoints': {'login': {'p95_ms': 1e6, 'queries_per_request': 1}}}, handle)
+        _, stderr = self.loadtest(compare=baseline, fail_threshold=50.0)
+        self.assertIn("commit abc123", stderr)
+
+    @override_settings(SMS_BACKEND='session_management.sms.ConsoleBackend')
+    def test_refuses_to_send_real_sms(self):
+        with self.assertRaisesMessage(CommandError, "in-memory SMS backend"):
+            self.loadtest()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 95), 0.0)
@@ -0,0 +1,61 @@
+from django.test import override_settings
+
+from session_management.metrics import MetricsRegistry
+from session_management.tests.base import TEST_CACHES, PortalTestCase, api_client, create_student
+
+
+class RenderPrometheusTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.registry = MetricsRegistry()
+
+    def test_counters_are_whole_numbers(self):
+        self.registry.incr('requests_total', 1234567, view='login')
+        self.registry.incr('requests_total', view='login')
+        self.assertEqual(
+            self.registry.render_prometheus(),
+            '# TYPE requests_total counter\nrequests_total{view="login"} 1234568\n',
+        )
+
+    def test_values_keep_full_precision(self):
+        self.registry.set_gauge('queue_depth', 1234.5678)
+        self.registry.set_gauge('ratio', 0.1 + 0.2)
+        self.registry.set_gauge('breaker', float('inf'))
+        lines = self.registry.render_prometheus().splitlines()
+        self.assertIn('queue_depth 1234.5678', lines)
+        self.assertIn('ratio 0.30000000000000004', lines)
+        self.assertIn('breaker +Inf', lines)
+
+    def test_histogram(self):
+        for value in (0.003, 0.2, 20.0):
+            self.registry.observe('latency_seconds', value, buckets=(0.005, 0.25), view='login')
+        self.assertEqual(self.registry.render_prometheus().splitlines(), [
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{view="login",le="0.005"} 1',
+            'latency_seconds_bucket{view="login",le="0.25"} 2',
+            'latency_seconds_bucket{view="login",le="+Inf"} 3',
+            'latency_seconds_sum{view="login"} 20.203',
+            'latency_seconds_count{view="login"} 3',
+        ])
+
+    def test_label_values_are_escaped(self):
+        self.registry.incr('errors_total', path='a"b\\c\nd')
+        self.assertIn('errors_total{path="a\\"b\\\\c\\nd"} 1', self.registry.render_prometheus())
+
+
+@override_settings(CACHES=TEST_CACHES, INSTRUMENTATION_ENABLED=True)
+class MetricsEndpointTests(PortalTestCase):
+    url = '/auth/metrics/'
+
+    def test_staff_only_without_a_token(self):
+        self.assertEqual(api_client().get(self.url).status_code, 403)
+        self.assertEqual(api_client(create_student('Y22CSE279001')).get(self.url).status_code, 403)
+        response = api_client(create_student('STAFF001', is_staff=True)).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token(self):
+        self.assertEqual(api_client().get(self.url).status_code, 401)
+        self.assertEqual(api_client().get(self.url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(api_client().get(self.url, HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
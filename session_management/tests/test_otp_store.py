@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from session_management import services
+from session_management.models import OTP
+from session_management.otp_store import (
+    OTP_EXPIRED, OTP_INVALID, OTP_MISSING, OTP_VALID, CacheOTPStore, DatabaseOTPStore, LocMemOTPStore,
+    OTPRejected, check_otp,
+)
+from session_management.tests.base import TEST_CACHES, PortalTestCase, create_student
+
+
+class OTPStoreTests:
+    """Run against each backend by the subclasses below."""
+    store_class = None
+
+    def setUp(self):
+        super().setUp()
+        create_student('Y22CSE279001')
+        self.store = self.store_class()
+
+    def test_issue_and_verify_consumes_the_code(self):
+        self.assertTrue(self.store.issue('Y22CSE279001', '123456', cooldown=False))
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456'), OTP_VALID)
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456'), OTP_MISSING)
+
+    def test_verify_without_consuming(self):
+        self.store.issue('Y22CSE279001', '123456')
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456', consume=False), OTP_VALID)
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456'), OTP_VALID)
+
+    def test_wrong_code_is_invalid_and_not_consumed(self):
+        self.store.issue('Y22CSE279001', '123456')
+        self.assertEqual(self.store.verify('Y22CSE279001', '654321'), OTP_INVALID)
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456'), OTP_VALID)
+
+    def test_never_issued(self):
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456'), OTP_MISSING)
+
+    def test_expired_code(self):
+        self.store.issue('Y22CSE279001', '123456')
+        self.store.ttl = -1
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456'), OTP_EXPIRED)
+
+    def test_cooldown(self):
+        self.assertFalse(self.store.in_cooldown('Y22CSE279001'))
+        self.assertTrue(self.store.issue('Y22CSE279001', '111111'))
+        self.assertTrue(self.store.in_cooldown('Y22CSE279001'))
+        self.assertFalse(self.store.issue('Y22CSE279001', '222222'))
+        self.assertEqual(self.store.verify('Y22CSE279001', '111111', consume=False), OTP_VALID)
+
+        self.assertTrue(self.store.issue('Y22CSE279001', '222222', cooldown=False))
+        self.assertEqual(self.store.verify('Y22CSE279001', '222222'), OTP_VALID)
+
+    def test_expire(self):
+        self.store.issue('Y22CSE279001', '123456')
+        self.store.expire('Y22CSE279001')
+        self.assertFalse(self.store.in_cooldown('Y22CSE279001'))
+        self.assertEqual(self.store.verify('Y22CSE279001', '123456'), OTP_MISSING)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LocMemOTPStoreTests(OTPStoreTests, PortalTestCase):
+    store_class = LocMemOTPStore
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CacheOTPStoreTests(OTPStoreTests, PortalTestCase):
+    store_class = CacheOTPStore
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DatabaseOTPStoreTests(OTPStoreTests, PortalTestCase):
+    store_class = DatabaseOTPStore
+
+    def latest(self):
+        return OTP.objects.filter(student_id='Y22CSE279001').order_by('-created_at').values('pk', 'otp', 'created_at')[0]
+
+    def test_consume_keeps_a_code_issued_after_the_read(self):
+        self.store.issue('Y22CSE279001', '111111', cooldown=False)
+        verified = self.latest()
+        self.store.issue('Y22CSE279001', '222222', cooldown=False)
+
+        self.assertTrue(self.store._consume('Y22CSE279001', verified))
+        self.assertFalse(self.store._consume('Y22CSE279001', verified))
+        self.assertEqual(self.store.verify('Y22CSE279001', '222222'), OTP_VALID)
+
+    def test_consume_drops_superseded_codes(self):
+        self.store.issue('Y22CSE279001', '111111', cooldown=False)
+        OTP.objects.update(created_at=timezone.now() - timedelta(seconds=30))
+        self.store.issue('Y22CSE279001', '222222', cooldown=False)
+        self.assertEqual(self.store.verify('Y22CSE279001', '222222'), OTP_VALID)
+        self.assertEqual(self.store.verify('Y22CSE279001', '111111'), OTP_MISSING)
+
+    async def test_averify_consumes_the_code(self):
+        await self.store.aissue('Y22CSE279001', '123456', cooldown=False)
+        self.assertEqual(await self.store.averify('Y22CSE279001', '123456'), OTP_VALID)
+        self.assertEqual(await self.store.averify('Y22CSE279001', '123456'), OTP_MISSING)
+
+
+@override_settings(CACHES=TEST_CACHES, OTP_STORE_BACKEND='session_management.otp_store.LocMemOTPStore')
+class CheckOTPTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        services.reset('otp_store')
+        self.addCleanup(services.reset, 'otp_store')
+
+    def test_rejection_carries_the_client_message(self):
+        services.get('otp_store').issue('Y22CSE279001', '123456')
+        with self.assertRaisesMessage(OTPRejected, "Invalid OTP"):
+            check_otp('Y22CSE279001', '000000')
+        check_otp('Y22CSE279001', '123456')
+        with self.assertRaises(OTPRejected) as raised:
+            check_otp('Y22CSE279001', '123456')
+        self.assertEqual(raised.exception.result, OTP_MISSING)
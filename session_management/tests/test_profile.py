@@ -0,0 +1,35 @@
+from django.test import override_settings
+
+from session_management.tests.base import TEST_CACHES, PortalTestCase, api_client, create_student
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StudentProfileETagTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = create_student('Y22CSE279001')
+        self.client = api_client(self.student)
+        self.url = '/auth/student/?register_number=Y22CSE279001'
+
+    def test_unchanged_profile_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['register_number'], 'Y22CSE279001')
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_profile_gets_a_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.student.email = 'student@example.com'
+        self.student.save(update_fields=['email', 'updated_at'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['email'], 'student@example.com')
+
+    def test_unknown_student(self):
+        self.assertEqual(self.client.get('/auth/student/?register_number=Y22CSE279999').status_code, 404)
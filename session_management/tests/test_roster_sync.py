@@ -0,0 +1,94 @@
+import csv
+import os
+import tempfile
+
+from django.test import override_settings
+
+from session_management.authentication import user_cache
+from session_management.importer import (
+    NAME_COLUMN, PHONE_COLUMN, REGISTER_COLUMN, REMOVED_HASH, RosterSync, SyncCheckpoint,
+)
+from session_management.models import Student
+from session_management.tests.base import TEST_CACHES, PortalTestCase
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RosterSyncTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.roster = os.path.join(directory.name, 'roster.csv')
+        self.checkpoint = os.path.join(directory.name, 'sync.json')
+        self.rows = [(f"Y22CSE27900{i}", f"STUDENT {i}", f"900000000{i}") for i in range(1, 6)]
+
+    def write_roster(self, rows):
+        with open(self.roster, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.writer(handle)
+            writer.writerow([REGISTER_COLUMN, NAME_COLUMN, PHONE_COLUMN])
+            writer.writerows(rows)
+
+    def sync(self, **options):
+        return RosterSync(batch_size=2, **options).run(self.roster)
+
+    def test_applies_only_changes(self):
+        self.write_roster(self.rows)
+        report = self.sync()
+        self.assertEqual((report.created, report.updated, report.unchanged), (5, 0, 0))
+        self.assertEqual(Student.objects.get(pk='Y22CSE279001').phone_number, '+919000000001')
+
+        self.rows[0] = ('Y22CSE279001', 'STUDENT ONE', '9000000001')
+        self.write_roster(self.rows)
+        report = self.sync()
+        self.assertEqual((report.created, report.updated, report.unchanged), (0, 1, 4))
+        self.assertEqual(Student.objects.get(pk='Y22CSE279001').name, 'STUDENT ONE')
+
+    def test_deactivates_missing_and_reactivates_returning_students(self):
+        self.write_roster(self.rows)
+        self.sync()
+        user_cache.set('Y22CSE279005', Student.objects.get(pk='Y22CSE279005'))
+
+        self.write_roster(self.rows[:4])
+        report = self.sync(deactivate_missing=True)
+        self.assertEqual(report.deactivated, 1)
+        student = Student.objects.get(pk='Y22CSE279005')
+        self.assertFalse(student.is_active)
+        self.assertEqual(student.roster_hash, REMOVED_HASH)
+        # Bulk writes send no post_save; the sync drops the cached user itself.
+        self.assertIsNone(user_cache.get('Y22CSE279005'))
+
+        self.write_roster(self.rows)
+        report = self.sync(deactivate_missing=True)
+        self.assertEqual((report.updated, report.deactivated), (1, 0))
+        self.assertTrue(Student.objects.get(pk='Y22CSE279005').is_active)
+
+    def test_resumes_from_checkpoint(self):
+        self.write_roster(self.rows)
+
+        class Interrupted(Exception):
+            pass
+
+        def interrupt(report):
+            if report.batches == 1:
+                raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            self.sync(checkpoint_path=self.checkpoint, progress=interrupt)
+        self.assertTrue(os.path.exists(self.checkpoint))
+        self.assertEqual(Student.objects.count(), 2)
+
+        sync = RosterSync(batch_size=2, checkpoint_path=self.checkpoint)
+        report = sync.run(self.roster)
+        # Rows 2-3 (the header is row 1) were committed before the interruption.
+        self.assertEqual(sync.resumed_after, 3)
+        self.assertEqual((report.processed, report.created), (5, 5))
+        self.assertEqual(Student.objects.count(), 5)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_of_another_file_is_ignored(self):
+        checkpoint = SyncCheckpoint(self.checkpoint)
+        checkpoint.save({'fingerprint': 'old', 'row': 3, 'report': {}})
+        self.assertIsNone(checkpoint.load('new'))
+        self.assertEqual(checkpoint.load('old')['row'], 3)
+        checkpoint.clear()
+        self.assertIsNone(checkpoint.load('old'))
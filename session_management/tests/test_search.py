@@ -0,0 +1,69 @@
+from django.test import override_settings
+
+from session_management.search import ensure_search_indexes, search_index, search_students, split_query
+from session_management.tests.base import TEST_CACHES, PortalTestCase, api_client, create_student
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StudentSearchTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        search_index.reset()
+        self.addCleanup(search_index.reset)
+        create_student('Y22CSE279001', name='RAVI KUMAR', phone_number='+919876544321')
+        create_student('Y22CSE279002', name='RAVINDRA SINGH', phone_number='+919000000002')
+        create_student('Y22ECE279003', name='PRIYA SHARMA', phone_number='+919000004321')
+        create_student('Y21CSE279004', name='KUMAR SWAMY', phone_number='+919000000004')
+
+    def search(self, query, limit=20, offset=0):
+        rows, _ = search_students(query, limit, offset)
+        return [row['register_number'] for row in rows]
+
+    def test_register_numbers(self):
+        rows, _ = search_students('y22cse279001', 20)
+        self.assertEqual([(row['register_number'], row['score']) for row in rows], [('Y22CSE279001', 100.0)])
+        self.assertEqual(self.search('Y22CSE'), ['Y22CSE279001', 'Y22CSE279002'])
+        self.assertEqual(self.search('ECE'), ['Y22ECE279003'])
+
+    def test_names_and_phone_numbers(self):
+        self.assertEqual(self.search('rav'), ['Y22CSE279001', 'Y22CSE279002'])
+        self.assertEqual(self.search('kumar'), ['Y21CSE279004', 'Y22CSE279001'])
+        self.assertEqual(self.search('4321'), ['Y22CSE279001', 'Y22ECE279003'])
+        self.assertEqual(self.search('ravi 4321'), ['Y22CSE279001'])
+        self.assertEqual(self.search('kumar 0002'), [])
+
+    def test_misspelled_names(self):
+        self.assertEqual(self.search('kumaar'), ['Y21CSE279004', 'Y22CSE279001'])
+        self.assertEqual(self.search('zzz'), [])
+
+    def test_paging(self):
+        rows, has_more = search_students('Y2', 3)
+        self.assertEqual((len(rows), has_more), (3, True))
+        rest, has_more = search_students('Y2', 3, offset=3)
+        self.assertEqual((len(rest), has_more), (1, False))
+        self.assertFalse({row['register_number'] for row in rows} & {row['register_number'] for row in rest})
+
+    def test_sees_students_saved_after_loading(self):
+        self.assertEqual(self.search('priya'), ['Y22ECE279003'])
+        create_student('Y22MEC279005', name='PRIYANKA RAO')
+        self.assertEqual(self.search('priya'), ['Y22ECE279003', 'Y22MEC279005'])
+
+    def test_split_query(self):
+        self.assertEqual(split_query('ravi, Ravi kumar'), ['RAVI', 'KUMAR'])
+        with self.assertRaisesMessage(ValueError, "Enter a name"):
+            split_query(' -- ')
+
+    def test_indexes_are_postgresql_only(self):
+        self.assertFalse(ensure_search_indexes())
+
+    def test_endpoint_is_staff_only(self):
+        url = '/auth/students/search/?q=ravi&limit=1'
+        self.assertEqual(api_client(create_student('Y22CSE279009')).get(url).status_code, 403)
+
+        client = api_client(create_student('STAFF001', is_staff=True))
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['register_number'] for row in response.data['results']], ['Y22CSE279001'])
+        self.assertIn('offset=1', response.data['next'])
+        self.assertEqual(client.get('/auth/students/search/?q=').status_code, 400)
+        self.assertEqual(client.get('/auth/students/search/?q=ravi&limit=0').status_code, 400)
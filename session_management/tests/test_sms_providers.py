@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from session_management import services
+from session_management.models import SMSDelivery
+from session_management.sms import CircuitBreaker, LocMemBackend, SMSBackend, SMSUnavailable, dispatcher
+from session_management.tests.base import PortalTestCase
+
+
+class FailingBackend(SMSBackend):
+    """Fails every send transiently; counts how often it was called."""
+    name = 'failing'
+    calls = 0
+
+    def send(self, to, body):
+        FailingBackend.calls += 1
+        raise ConnectionError("provider down")
+
+
+@override_settings(
+    SMS_BACKEND='session_management.tests.test_sms_providers.FailingBackend',
+    SMS_FAILOVER_BACKENDS=['session_management.sms.LocMemBackend'],
+    SMS_BREAKER_THRESHOLD=2,
+    SMS_BREAKER_RESET_SECONDS=30,
+    SMS_RATE_LIMIT=0,
+    SMS_MAX_RETRIES=3,
+)
+class CircuitBreakerTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        FailingBackend.calls = 0
+        LocMemBackend.outbox.clear()
+        services.reset('sms_providers')
+        self.addCleanup(services.reset, 'sms_providers')
+
+    def test_opens_after_threshold_and_lets_one_trial_through(self):
+        breaker = CircuitBreaker('test', threshold=2, reset_seconds=30)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        with self.assertLogs('session_management.sms', 'WARNING'):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertAlmostEqual(breaker.retry_after(), 30, delta=1)
+
+        breaker.opened_at -= 30
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker('test', threshold=1, reset_seconds=30)
+        with self.assertLogs('session_management.sms', 'WARNING') as logs:
+            breaker.record_failure()
+            breaker.opened_at -= 30
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_fails_over_and_skips_the_open_provider(self):
+        with self.assertLogs('session_management.sms', 'WARNING'):
+            for _ in range(3):
+                dispatcher.send('+919000000000', 'hello')
+        self.assertEqual(len(LocMemBackend.outbox), 3)
+        # Two failures open the primary's breaker; the third send goes straight to the failover.
+        self.assertEqual(FailingBackend.calls, 2)
+        self.assertEqual(dispatcher.providers[0].breaker.state, CircuitBreaker.OPEN)
+
+    @override_settings(SMS_FAILOVER_BACKENDS=[])
+    def test_unavailable_send_is_deferred_not_counted(self):
+        delivery = SMSDelivery.objects.create(to='+919000000000', body='hello', provider='failing')
+        with self.assertLogs('session_management.sms', 'WARNING'):
+            for attempts in (1, 2):
+                self.assertIsNotNone(dispatcher.deliver(delivery.pk))
+                delivery.refresh_from_db()
+                self.assertEqual(delivery.attempts, attempts)
+
+        # The breaker is open now: nothing is sent and no attempt is used up.
+        delay = dispatcher.deliver(delivery.pk)
+        delivery.refresh_from_db()
+        self.assertEqual(FailingBackend.calls, 2)
+        self.assertEqual(delivery.attempts, 2)
+        self.assertEqual(delivery.status, SMSDelivery.QUEUED)
+        self.assertAlmostEqual(delay, 30, delta=1)
+        with self.assertRaises(SMSUnavailable):
+            dispatcher.send('+919000000000', 'hello')
+
+
+    @override_settings(SMS_FAILOVER_BACKENDS=[], SMS_BREAKER_THRESHOLD=1, SMS_DEFER_MAX_AGE=300)
+    def test_deferral_stops_at_the_max_age(self):
+        delivery = SMSDelivery.objects.create(to='+919000000000', body='Your OTP is 123456', provider='failing')
+        with self.assertLogs('session_management.sms', 'WARNING'):
+            dispatcher.deliver(delivery.pk)
+
+        SMSDelivery.objects.filter(pk=delivery.pk).update(created_at=timezone.now() - timedelta(seconds=290))
+        self.assertAlmostEqual(dispatcher.deliver(delivery.pk), 10, delta=1)
+
+        SMSDelivery.objects.filter(pk=delivery.pk).update(created_at=timezone.now() - timedelta(seconds=301))
+        with self.assertLogs('session_management.sms', 'WARNING') as logs:
+            self.assertIsNone(dispatcher.deliver(delivery.pk))
+        self.assertIn("no provider available", logs.output[0])
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.status, delivery.body, delivery.attempts), (SMSDelivery.FAILED, '', 1))
+        self.assertEqual(FailingBackend.calls, 1)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from session_management import services
+from session_management.models import SMSDelivery
+from session_management.sms import LocMemBackend, dispatcher
+from session_management.tests.base import TEST_CACHES, PortalTestCase, api_client, create_student
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    SMS_BACKEND='session_management.sms.LocMemBackend',
+    SMS_FAILOVER_BACKENDS=[],
+)
+class SendPendingSMSTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        services.reset('sms_providers')
+        self.addCleanup(services.reset, 'sms_providers')
+        LocMemBackend.outbox.clear()
+        self.addCleanup(LocMemBackend.outbox.clear)
+
+    def queued(self, age=120):
+        delivery = SMSDelivery.objects.create(to='+919000000001', body='Your OTP is 123456', provider='locmem')
+        SMSDelivery.objects.filter(pk=delivery.pk).update(updated_at=timezone.now() - timedelta(seconds=age))
+        return delivery
+
+    def send_pending(self):
+        stdout = StringIO()
+        call_command('send_pending_sms', stdout=stdout)
+        return stdout.getvalue()
+
+    def test_sends_each_stale_message_once(self):
+        delivery = self.queued()
+        self.assertIn("1 sent, 0 failed, 0 left queued for retry, 0 skipped", self.send_pending())
+        self.assertIn("0 sent", self.send_pending())
+
+        self.assertEqual(LocMemBackend.outbox, [{'to': '+919000000001', 'body': 'Your OTP is 123456'}])
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.status, delivery.attempts, delivery.body), (SMSDelivery.SENT, 1, ''))
+
+    def test_leaves_recent_messages_to_the_workers(self):
+        self.queued(age=0)
+        self.assertIn("0 sent", self.send_pending())
+        self.assertEqual(LocMemBackend.outbox, [])
+
+    def test_claim_skips_messages_attempted_since_the_cutoff(self):
+        delivery = self.queued()
+        cutoff = timezone.now() - timedelta(seconds=60)
+        # A worker's attempt after the command listed the message bumps updated_at.
+        SMSDelivery.objects.filter(pk=delivery.pk).update(updated_at=timezone.now())
+        with transaction.atomic():
+            self.assertIsNone(dispatcher.claim(delivery.pk, queued_before=cutoff))
+
+    def test_deliver_does_not_resend(self):
+        delivery = self.queued()
+        self.assertIsNone(dispatcher.deliver(delivery.pk))
+        self.assertIsNone(dispatcher.deliver(delivery.pk))
+        self.assertEqual(len(LocMemBackend.outbox), 1)
+
+    @skipUnless(connection.features.has_select_for_update_skip_locked, "needs SELECT ... FOR UPDATE SKIP LOCKED")
+    def test_claim_skips_locked_rows(self):
+        delivery = self.queued()
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            dispatcher.claim(delivery.pk)
+        self.assertIn('SKIP LOCKED', queries[-1]['sql'])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SMSStatusTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = create_student('Y22CSE279001', phone_number='9000000001')
+        self.delivery = SMSDelivery.objects.create(to='+919000000001', body='', provider='locmem')
+        self.url = f'/auth/sms-status/{self.delivery.pk}/'
+
+    def test_only_staff_and_the_recipient_can_read_a_status(self):
+        self.assertEqual(api_client().get(self.url).status_code, 401)
+
+        response = api_client(self.student).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], SMSDelivery.QUEUED)
+
+        other = create_student('Y22CSE279002', phone_number='9000000002')
+        self.assertEqual(api_client(other).get(self.url).status_code, 403)
+        staff = create_student('STAFF001', phone_number='9000000003', is_staff=True)
+        self.assertEqual(api_client(staff).get(self.url).status_code, 200)
@@ -0,0 +1,37 @@
+from django.test import override_settings
+
+from session_management.models import Student
+from session_management.tests.base import TEST_CACHES, PortalTestCase, api_client, create_student
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StudentListTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = create_student('STAFF001', is_staff=True)
+        for i in range(1, 6):
+            create_student(f"Y22CSE27900{i}", name=f"STUDENT {i}")
+
+    def test_keyset_pages_cover_every_student_once(self):
+        client = api_client(self.staff)
+        url, seen, pages = '/auth/students/?limit=2&fields=name', [], 0
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(all(set(row) == {'register_number', 'name'} for row in response.data['results']))
+            seen.extend(row['register_number'] for row in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(Student.objects.values_list('register_number', flat=True)))
+
+    def test_after_seeks_past_the_given_register_number(self):
+        response = api_client(self.staff).get('/auth/students/?limit=10&after=y22cse279003')
+        self.assertEqual([row['register_number'] for row in response.data['results']], ['Y22CSE279004', 'Y22CSE279005'])
+        self.assertIsNone(response.data['next'])
+
+    def test_rejects_bad_parameters_and_students(self):
+        client = api_client(self.staff)
+        self.assertEqual(client.get('/auth/students/?limit=0').status_code, 400)
+        self.assertEqual(client.get('/auth/students/?fields=password').status_code, 400)
+        self.assertEqual(api_client(Student.objects.get(pk='Y22CSE279001')).get('/auth/students/').status_code, 403)
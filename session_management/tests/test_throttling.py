@@ -0,0 +1,43 @@
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from session_management import services
+from session_management.tests.base import TEST_CACHES, PortalTestCase
+from session_management.throttling import CacheWindowStore, TokenBucketStore
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    AUTH_THROTTLE_RATES={'login': {'ip': '100/min', 'register_number': '2/min'}},
+)
+class ThrottleTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        services.reset('throttle_store')
+        self.addCleanup(services.reset, 'throttle_store')
+
+    def test_token_bucket(self):
+        store = TokenBucketStore()
+        self.assertEqual(store.hit('key', 2, 60), 0)
+        self.assertEqual(store.hit('key', 2, 60), 0)
+        self.assertAlmostEqual(store.hit('key', 2, 60), 30, delta=1)
+        self.assertEqual(store.hit('other', 2, 60), 0)
+
+    def test_cache_window(self):
+        store = CacheWindowStore()
+        self.assertEqual(store.hit('key', 2, 60), 0)
+        self.assertEqual(store.hit('key', 2, 60), 0)
+        self.assertGreater(store.hit('key', 2, 60), 0)
+        self.assertEqual(store.hit('other', 2, 60), 0)
+
+    def test_login_is_throttled_per_register_number(self):
+        client = APIClient()
+        for _ in range(2):
+            response = client.post('/auth/login/', {'register_number': 'Y22CSE279001', 'password': 'x'}, format='json')
+            self.assertEqual(response.status_code, 404)
+        response = client.post('/auth/login/', {'register_number': 'y22cse279001', 'password': 'x'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+        response = client.post('/auth/login/', {'register_number': 'Y22CSE279002', 'password': 'x'}, format='json')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,136 @@
+"""
+Throttles for the unauthenticated auth endpoints.
+
+Each throttle applies two limits from settings.AUTH_THROTTLE_RATES: one keyed
+by client IP and one keyed by the register_number in the request body. Both are
+checked before the view runs, so a rejected request costs no DB query and no
+password hash. DRF turns a rejection into a 429 with a Retry-After header.
+
+With AUTH_THROTTLE_BACKEND = 'memory' each worker keeps its own token buckets;
+'cache' keeps sliding-window counters in the shared Django cache so the limits
+hold across workers.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from session_management import metrics, services
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+class TokenBucketStore:
+    """Per-process token buckets; idle buckets are swept once max_keys is reached."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, period):
+        """Take one token. Returns 0 if allowed, else seconds until a token is free."""
+        now = time.monotonic()
+        refill = limit / period
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + (now - updated) * refill)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / refill
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._sweep(now)
+            self._buckets[key] = (tokens - 1, now)
+            return 0
+
+    def _sweep(self, now):
+        # A bucket idle for longer than it takes to refill completely is equivalent to a fresh one.
+        stale = [key for key, (_, updated) in self._buckets.items() if now - updated > 3600]
+        for key in stale:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+
+class CacheWindowStore:
+    """Sliding-window counters in a shared cache (approximated from two fixed windows)."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        window = int(now // period)
+        elapsed = (now % period) / period
+        current_key = f"throttle:{key}:{window}"
+        counts = self.cache.get_many([current_key, f"throttle:{key}:{window - 1}"])
+        current = counts.get(current_key, 0)
+        previous = counts.get(f"throttle:{key}:{window - 1}", 0)
+        if previous * (1 - elapsed) + current >= limit:
+            return period * (1 - elapsed)
+        if not self.cache.add(current_key, 1, period * 2):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, period * 2)
+        return 0
+
+
+def build_throttle_store():
+    """The store AUTH_THROTTLE_BACKEND selects; the 'throttle_store' service."""
+    if settings.AUTH_THROTTLE_BACKEND == 'cache':
+        return CacheWindowStore(settings.AUTH_THROTTLE_CACHE_ALIAS)
+    return TokenBucketStore()
+
+
+def get_throttle_store():
+    return services.get('throttle_store')
+
+
+class AuthRateThrottle(BaseThrottle):
+    scope = None
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        rates = settings.AUTH_THROTTLE_RATES.get(self.scope, {})
+        store = get_throttle_store()
+
+        idents = {'ip': self.get_ident(request)}
+        if 'register_number' in rates:
+            register_number = request.data.get('register_number') if hasattr(request.data, 'get') else None
+            if register_number:
+                idents['register_number'] = str(register_number).strip().upper()
+
+        for kind, ident in idents.items():
+            if kind not in rates:
+                continue
+            limit, period = parse_rate(rates[kind])
+            wait = store.hit(f"{self.scope}:{kind}:{ident}", limit, period)
+            if wait:
+                self.wait_time = wait
+                metrics.incr('throttle_rejected_total', scope=self.scope, key=kind)
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class LoginThrottle(AuthRateThrottle):
+    scope = 'login'
+
+
+class OTPRequestThrottle(AuthRateThrottle):
+    scope = 'otp_request'
+
+
+class OTPVerifyThrottle(AuthRateThrottle):
+    scope = 'otp_verify'
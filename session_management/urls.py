@@ -1,6 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from .views import ForgotPasswordView, RegisterCheckView, OTPVerifyView, SetPasswordView, LoginView, StudentView, RefreshTokenView
+
+# Async views only pay off under an ASGI server; see session_management/async_views.py.
+if settings.ASYNC_VIEWS:
+    from .async_views import ForgotPasswordView, RegisterCheckView, OTPVerifyView, SetPasswordView, LoginView, StudentView, RefreshTokenView, SMSStatusView, TopErrorsView
+else:
+    from .views import ForgotPasswordView, RegisterCheckView, OTPVerifyView, SetPasswordView, LoginView, StudentView, RefreshTokenView, SMSStatusView, TopErrorsView
 from rest_framework_simplejwt.views import TokenRefreshView, TokenBlacklistView
+from .instrumentation import metrics_view
+# Staff bulk endpoints are sync-only; ASGI servers run them in a thread.
+from .views import StudentListView, StudentSearchView, StudentBatchView, StudentExportView, BroadcastListView, BroadcastView, PlacementDriveListView, DriveEligibleView
 
 urlpatterns = [
     path('verify-register/', RegisterCheckView.as_view(), name='verify-register'),
@@ -11,5 +20,16 @@ urlpatterns = [
     path('refresh/', RefreshTokenView.as_view(), name='token_refresh'),
     path('logout/', TokenBlacklistView.as_view(), name='token_blacklist'),
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot-password'),
+    path('sms-status/<uuid:delivery_id>/', SMSStatusView.as_view(), name='sms-status'),
+    path('errors/top/', TopErrorsView.as_view(), name='top-errors'),
+    path('metrics/', metrics_view, name='metrics'),
+    path('students/', StudentListView.as_view(), name='student-list'),
+    path('students/search/', StudentSearchView.as_view(), name='student-search'),
+    path('students/batch/', StudentBatchView.as_view(), name='student-batch'),
+    path('students/export/', StudentExportView.as_view(), name='student-export'),
+    path('broadcasts/', BroadcastListView.as_view(), name='broadcast-list'),
+    path('broadcasts/<int:broadcast_id>/', BroadcastView.as_view(), name='broadcast'),
+    path('drives/', PlacementDriveListView.as_view(), name='drive-list'),
+    path('drives/<int:drive_id>/eligible/', DriveEligibleView.as_view(), name='drive-eligible'),
 
 ]
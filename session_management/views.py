@@ -4,28 +4,66 @@ from django.utils import timezone
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework.permissions import IsAuthenticated
-from .models import Student, OTP
-from .serializers import RegisterNumberSerializer, OTPVerifySerializer, SetPasswordSerializer, LoginSerializer, ForgotPasswordSerializer
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-from django.contrib.auth.hashers import make_password, check_password
-from decouple import config
+from rest_framework.permissions import BasePermission, IsAuthenticated, IsAdminUser
+from .models import Student, SMSDelivery, Broadcast, PlacementDrive, DriveEligibility
+from .serializers import RegisterNumberSerializer, OTPVerifySerializer, SetPasswordSerializer, LoginSerializer, ForgotPasswordSerializer, StudentBatchSerializer, StudentProfileUpdateSerializer, BroadcastSerializer, PlacementDriveSerializer
+from .throttling import LoginThrottle, OTPRequestThrottle, OTPVerifyThrottle
+from .authentication import issue_tokens
+from .blacklist import FilteredRefreshToken
+from .profile_cache import get_profile, profile_etag
+from .queries import get_student, student_exists, get_profile_version, save_profile_changes, select_fields, list_students, lookup_students, OTP_FIELDS, TOKEN_FIELDS, PROFILE_FIELDS, EDITABLE_FIELDS
+from .hashing import HashingBusy, hash_password, check_user_password
+from .sms import enqueue_sms
+from .errors import top_errors
+from .exporter import FORMATS, iter_export, aiter_export
+from .importer import normalize_phone
+from .broadcast import AUDIENCE_KEYS, create_broadcast, start_broadcast, cancel_broadcast, broadcast_summary
+from .eligibility import refresh_eligibility
+from .search import search_students
+from .otp_store import get_otp_store, check_otp, OTPRejected
 from student_portal.utils import *
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 import json
-from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.db.models import F
+
+STUDENT_PAGE_SIZE = 100
+MAX_STUDENT_PAGE_SIZE = 1000
+MAX_BATCH_LOOKUP = 1000
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+
+def busy_response():
+    return Response(
+        {"error": "Server is busy, please try again shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"}
+    )
+
+
+class IsStaffOrDeliveryOwner(BasePermission):
+    """Staff, or the student the SMS delivery was sent to."""
+
+    def has_object_permission(self, request, view, delivery):
+        user = request.user
+        if user.is_staff:
+            return True
+        # A stateless token user carries no phone number.
+        phone_number = getattr(user, 'phone_number', None)
+        if phone_number is None:
+            phone_number = Student.objects.filter(pk=user.pk).values_list('phone_number', flat=True).first()
+        return bool(phone_number) and normalize_phone(phone_number) == delivery.to
 
-account_sid = config('TWILIO_ACCOUNT_SID')
-auth_token = config('TWILIO_AUTH_TOKEN')
-twilio_phone = config('TWILIO_PHONE')
-twilio_client = Client(account_sid, auth_token)
 
 class RegisterCheckView(APIView):
+    throttle_classes = [OTPRequestThrottle]
+
     def post(self, request):
         serializer = RegisterNumberSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -33,37 +71,25 @@ class RegisterCheckView(APIView):
         reg_no = serializer.validated_data['register_number'].upper()
 
         try:
-            student = Student.objects.get(register_number=reg_no)
+            student = get_student(reg_no, OTP_FIELDS)
 
             if student.password:
                 return Response({"message": "Please enter your password."}, status=200)
 
-            recent_otp = OTP.objects.filter(
-                student=student, created_at__gte=timezone.now() - timedelta(minutes=1)
-            ).exists()
-            if recent_otp:
-                return Response({"error": "Please wait before requesting a new OTP."}, status=429)
-
             otp = str(random.randint(100000, 999999))
-            OTP.objects.create(student=student, otp=otp)
+            if not get_otp_store().issue(student.register_number, otp):
+                return Response({"error": "Please wait before requesting a new OTP."}, status=429)
 
             phone_number = student.phone_number.strip().replace(' ', '')
             if not phone_number.startswith('+91'):
                 phone_number = '+91' + phone_number.lstrip('0')
 
-            try:
-                twilio_client.messages.create(
-                    body=f"Your OTP is {otp}",
-                    from_=twilio_phone,
-                    to=phone_number
-                )
-            except TwilioRestException as e:
-                log_exception(e)
-                return Response({"error": f"Twilio error: {str(e)}. Verify phone number in Twilio Console."}, status=400)
+            delivery = enqueue_sms(phone_number, f"Your OTP is {otp}")
 
             return Response({
                 "message": "OTP sent successfully",
-                "phone_number": phone_number
+                "phone_number": phone_number,
+                "delivery_id": str(delivery.id)
             }, status=200)
 
         except Student.DoesNotExist:
@@ -73,6 +99,8 @@ class RegisterCheckView(APIView):
             return Response({"error": str(e)}, status=500)
 
 class OTPVerifyView(APIView):
+    throttle_classes = [OTPVerifyThrottle]
+
     def post(self, request):
         serializer = OTPVerifySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -80,23 +108,14 @@ class OTPVerifyView(APIView):
         otp_input = serializer.validated_data['otp']
 
         try:
-            student = Student.objects.get(register_number=reg_no)
-            try:
-                otp_obj = OTP.objects.filter(student=student).latest('created_at')
-                if otp_obj.otp != otp_input:
-                    log_exception(Exception(f"Invalid OTP provided: {otp_input}, expected: {otp_obj.otp}"))
-                    return Response({"error": "Invalid OTP"}, status=400)
-
-                if timezone.now() - otp_obj.created_at > timedelta(minutes=5):
-                    log_exception(Exception(f"OTP expired: {otp_input}, created at: {otp_obj.created_at}"))
-                    return Response({"error": "OTP expired"}, status=400)
-
-                return Response({"message": "OTP verified"}, status=200)
-            except OTP.DoesNotExist:
-                log_exception(Exception(f"No OTP found for student: {reg_no}"))
-                return Response({"error": "No OTP found for this student"}, status=400)
-        except Student.DoesNotExist:
-            return Response({"error": "Register number not found"}, status=404)
+            if not student_exists(reg_no):
+                return Response({"error": "Register number not found"}, status=404)
+
+            check_otp(reg_no, otp_input, consume=False)
+            return Response({"message": "OTP verified"}, status=200)
+        except OTPRejected as e:
+            log_exception(Exception(f"OTP check failed for {reg_no}: {e.result}"))
+            return Response({"error": str(e)}, status=400)
         except Exception as e:
             log_exception(e)
             return Response({"error": str(e)}, status=500)
@@ -110,14 +129,14 @@ class SetPasswordView(APIView):
         password = serializer.validated_data['password']
 
         try:
-            student = Student.objects.get(register_number=reg_no)
+            student = get_student(reg_no, TOKEN_FIELDS)
 
             # ✅ Set and save hashed password
-            student.password = make_password(password)
-            student.save()
+            student.password = hash_password(password)
+            student.save(update_fields=['password', 'updated_at'])
 
             # ✅ Generate JWT tokens
-            refresh = RefreshToken.for_user(student)
+            refresh = issue_tokens(student)
             access = refresh.access_token
 
             return Response({
@@ -132,11 +151,15 @@ class SetPasswordView(APIView):
                 {"error": "Student not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except HashingBusy:
+            return busy_response()
         except Exception as e:
             log_exception(e)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class LoginView(APIView):
+    throttle_classes = [LoginThrottle]
+
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -145,11 +168,11 @@ class LoginView(APIView):
         password = serializer.validated_data['password']
 
         try:
-            student = Student.objects.get(register_number=reg_no)
+            student = get_student(reg_no, TOKEN_FIELDS)
 
-            if check_password(password, student.password):
+            if check_user_password(student, password):
                 # ✅ Correct way to generate refresh and access tokens
-                refresh = RefreshToken.for_user(student)
+                refresh = issue_tokens(student)
                 access = refresh.access_token
 
                 return Response({
@@ -171,6 +194,8 @@ class LoginView(APIView):
                 {"error": "Register number not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except HashingBusy:
+            return busy_response()
         except Exception as e:
             log_exception(e)
             return Response(
@@ -189,7 +214,15 @@ class RefreshTokenView(APIView):
             )
 
         try:
-            refresh = RefreshToken(refresh_token)
+            refresh = FilteredRefreshToken(refresh_token)
+            try:
+                student = get_student(refresh[api_settings.USER_ID_CLAIM], ('register_number', 'is_active'))
+            except (KeyError, Student.DoesNotExist):
+                raise TokenError("No active account found for the given token.")
+            if not student.is_active:
+                raise TokenError("No active account found for the given token.")
+
+            refresh.rotate(student)
             access_token = str(refresh.access_token)
 
             return Response(
@@ -219,31 +252,35 @@ class StudentView(APIView):
     def get(self, request):
         reg_no = request.GET.get('register_number', '').upper()
 
+        # Revalidation only needs updated_at; the profile columns are read on a cache miss.
+        updated_at = get_profile_version(reg_no)
+        if updated_at is None:
+            return Response({"error": "Student not found"}, status=404)
+
+        etag = profile_etag(reg_no, updated_at)
+        last_modified = updated_at.timestamp()
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
         try:
-            student = Student.objects.get(register_number=reg_no)
-            data = {
-                "register_number": student.register_number,
-                "name": student.name,
-                "phone_number": student.phone_number,
-                "dob": student.dob.isoformat() if student.dob else None,
-                "gender": student.gender or "",
-                "father_name": student.father_name or "",
-                "mother_name": student.mother_name or "",
-                "email": student.email or "",
-                "aadhar_number": student.aadhar_number or "",
-                "updated_at": student.updated_at.isoformat() if student.updated_at else None
-            }
-            return Response(data, status=200)
+            data = get_profile(reg_no, updated_at, lambda: get_student(reg_no, PROFILE_FIELDS))
         except Student.DoesNotExist:
             return Response({"error": "Student not found"}, status=404)
 
+        response = Response(data, status=200)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
     def post(self, request):
         try:
             data = request.data
             reg_no = data.get("register_number", "").upper()
             otp = data.get("otp", "").strip()
 
-            student = Student.objects.get(register_number=reg_no)
+            student = get_student(reg_no, PROFILE_FIELDS)
 
             # Format phone number
             phone_number = student.phone_number.strip().replace(' ', '')
@@ -253,47 +290,54 @@ class StudentView(APIView):
             # If OTP is not provided, generate and send one
             if not otp:
                 generated_otp = str(random.randint(100000, 999999))
-                OTP.objects.create(student=student, otp=generated_otp)
+                get_otp_store().issue(student.register_number, generated_otp, cooldown=False)
 
-                try:
-                    twilio_client.messages.create(
-                        body=f"Your OTP is {generated_otp}",
-                        from_=twilio_phone,
-                        to=phone_number
-                    )
-                except Exception as e:
-                    log_exception(e)
-                    return Response({"error": f"Twilio error: {str(e)}"}, status=400)
+                delivery = enqueue_sms(phone_number, f"Your OTP is {generated_otp}")
 
-                return Response({"message": "OTP sent to registered mobile number"}, status=200)
+                return Response({
+                    "message": "OTP sent to registered mobile number",
+                    "delivery_id": str(delivery.id)
+                }, status=200)
 
-            # Validate OTP
-            valid_otp = OTP.objects.filter(
-                student=student,
-                otp=otp,
-                created_at__gte=timezone.now() - timedelta(minutes=5)
-            ).order_by("-created_at").first()
+            check_otp(student.register_number, otp)
 
-            if not valid_otp:
-                try:
-                    latest_otp = OTP.objects.filter(student=student).latest('created_at')
-                    if latest_otp.otp != otp:
-                        return Response({"error": "Invalid OTP"}, status=400)
-                    if timezone.now() - latest_otp.created_at > timedelta(minutes=5):
-                        return Response({"error": "OTP expired"}, status=400)
-                except OTP.DoesNotExist:
-                    return Response({"error": "No OTP found for this student"}, status=400)
-
-            # Update student details
-            update_fields = ['dob', 'gender', 'father_name', 'mother_name', 'email', 'aadhar_number']
-            for field in update_fields:
-                value = data.get(field)
-                if value:
-                    setattr(student, field, parse_date(value) if field == 'dob' else value)
-
-            student.save()
+            # Update the details that were sent and differ from the stored ones
+            changes = {
+                field: parse_date(data[field]) if field == 'dob' else data[field]
+                for field in EDITABLE_FIELDS if data.get(field)
+            }
+            save_profile_changes(student, changes)
             return Response({"message": "Student data updated successfully"}, status=200)
 
+        except OTPRejected as e:
+            return Response({"error": str(e)}, status=400)
+        except Student.DoesNotExist:
+            return Response({"error": "Student not found"}, status=404)
+        except Exception as e:
+            log_exception(e)
+            return Response({"error": str(e)}, status=500)
+
+    def patch(self, request):
+        """
+        Update the signed-in student's own profile. Request a code with a POST
+        carrying only register_number, then PATCH the changed fields with it;
+        only columns whose value actually changed are written.
+        """
+        serializer = StudentProfileUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        otp = changes.pop('otp')
+        if not changes:
+            return Response({"error": "No profile fields to update"}, status=400)
+
+        reg_no = request.user.pk
+        try:
+            check_otp(reg_no, otp)
+            student = get_student(reg_no, PROFILE_FIELDS)
+            updated = save_profile_changes(student, changes)
+            return Response({"message": "Student data updated successfully", "updated_fields": updated}, status=200)
+        except OTPRejected as e:
+            return Response({"error": str(e)}, status=400)
         except Student.DoesNotExist:
             return Response({"error": "Student not found"}, status=404)
         except Exception as e:
@@ -302,6 +346,8 @@ class StudentView(APIView):
 
 
 class ForgotPasswordView(APIView):
+    throttle_classes = [OTPRequestThrottle]
+
     def post(self, request):
         serializer = ForgotPasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -310,7 +356,7 @@ class ForgotPasswordView(APIView):
         new_password = serializer.validated_data.get('new_password', '')
 
         try:
-            student = Student.objects.get(register_number=reg_no)
+            student = get_student(reg_no, TOKEN_FIELDS)
 
             if not student.password:
                 return Response(
@@ -324,67 +370,34 @@ class ForgotPasswordView(APIView):
 
             # Step 1: Requesting OTP
             if not otp and not new_password:
-                recent_otp = OTP.objects.filter(
-                    student=student, created_at__gte=timezone.now() - timedelta(minutes=1)
-                ).exists()
-
-                if recent_otp:
+                generated_otp = str(random.randint(100000, 999999))
+                if not get_otp_store().issue(student.register_number, generated_otp):
                     return Response(
                         {"error": "Please wait before requesting a new OTP."},
                         status=429
                     )
 
-                generated_otp = str(random.randint(100000, 999999))
-                OTP.objects.create(student=student, otp=generated_otp)
-
-                try:
-                    twilio_client.messages.create(
-                        body=f"Your password reset OTP is {generated_otp}",
-                        from_=twilio_phone,
-                        to=phone_number
-                    )
-                except TwilioRestException as e:
-                    log_exception(e)
-                    return Response(
-                        {"error": f"Twilio error: {str(e)}. Verify phone number in Twilio Console."},
-                        status=400
-                    )
+                delivery = enqueue_sms(phone_number, f"Your password reset OTP is {generated_otp}")
 
                 return Response({
                     "message": "Password reset OTP sent successfully",
-                    "phone_number": phone_number
+                    "phone_number": phone_number,
+                    "delivery_id": str(delivery.id)
                 }, status=200)
 
             # Step 2: Resetting password
             if otp and new_password:
-                valid_otp = OTP.objects.filter(
-                    student=student,
-                    otp=otp,
-                    created_at__gte=timezone.now() - timedelta(minutes=5)
-                ).order_by("-created_at").first()
-
-                if not valid_otp:
-                    try:
-                        latest_otp = OTP.objects.filter(student=student).latest('created_at')
-                        if latest_otp.otp != otp:
-                            log_exception(Exception(f"Invalid OTP provided: {otp}, expected: {latest_otp.otp}"))
-                            return Response({"error": "Invalid OTP"}, status=400)
-
-                        if timezone.now() - latest_otp.created_at > timedelta(minutes=5):
-                            log_exception(Exception(f"OTP expired: {otp}, created at: {latest_otp.created_at}"))
-                            return Response({"error": "OTP expired"}, status=400)
-                    except OTP.DoesNotExist:
-                        log_exception(Exception(f"No OTP found for student: {reg_no}"))
-                        return Response({"error": "No OTP found for this student"}, status=400)
-
-                student.password = make_password(new_password)
-                student.save()
-                OTP.objects.filter(student=student).delete()
+                try:
+                    check_otp(student.register_number, otp)
+                except OTPRejected as e:
+                    log_exception(Exception(f"OTP check failed for {reg_no}: {e.result}"))
+                    return Response({"error": str(e)}, status=400)
+
+                student.password = hash_password(new_password)
+                student.save(update_fields=['password', 'updated_at'])
 
                 # 🔐 Generate JWT tokens
-                refresh = RefreshToken.for_user(student)
-                refresh['register_number'] = student.register_number
-                refresh['name'] = student.name
+                refresh = issue_tokens(student)
                 access = refresh.access_token
 
                 return Response({
@@ -404,6 +417,273 @@ class ForgotPasswordView(APIView):
 
         except Student.DoesNotExist:
             return Response({"error": "Register number not found"}, status=404)
+        except HashingBusy:
+            return busy_response()
         except Exception as e:
             log_exception(e)
-            return Response({"error": str(e)}, status=500)
\ No newline at end of file
+            return Response({"error": str(e)}, status=500)
+
+
+class SMSStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsStaffOrDeliveryOwner]
+
+    def get(self, request, delivery_id):
+        try:
+            delivery = SMSDelivery.objects.only('to', 'status', 'attempts', 'updated_at').get(pk=delivery_id)
+        except SMSDelivery.DoesNotExist:
+            return Response({"error": "Delivery not found"}, status=404)
+        self.check_object_permissions(request, delivery)
+
+        return Response({
+            "delivery_id": str(delivery_id),
+            "status": delivery.status,
+            "attempts": delivery.attempts,
+            "updated_at": delivery.updated_at.isoformat()
+        }, status=200)
+
+
+class TopErrorsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        until = parse_datetime(request.GET.get('until', '')) or timezone.now()
+        since = parse_datetime(request.GET.get('since', '')) or until - timedelta(hours=24)
+        try:
+            limit = min(int(request.GET.get('limit', 20)), 100)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+
+        return Response({
+            "since": since.isoformat(),
+            "until": until.isoformat(),
+            "errors": top_errors(since, until, limit=limit)
+        }, status=200)
+
+
+class StudentListView(APIView):
+    """
+    Staff listing of all students, ordered by register_number.
+
+    GET students/?limit=100&fields=name,phone_number&after=<register_number>
+    Follow "next" until it is null; each page is a keyset seek, so the last
+    page is as fast as the first.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            fields = select_fields(request.GET.get('fields'))
+            limit = int(request.GET.get('limit', STUDENT_PAGE_SIZE))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if not 1 <= limit <= MAX_STUDENT_PAGE_SIZE:
+            return Response({"error": f"limit must be between 1 and {MAX_STUDENT_PAGE_SIZE}"}, status=400)
+
+        after = request.GET.get('after', '').upper()
+        rows, has_more = list_students(after, limit, fields)
+
+        next_url = None
+        if has_more:
+            query = request.GET.copy()
+            query['after'] = rows[-1]['register_number']
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+        return Response({"results": rows, "next": next_url}, status=200)
+
+
+class StudentSearchView(APIView):
+    """
+    Staff typeahead search over students by name, register number or phone number.
+
+    GET students/search/?q=ravi 4321&limit=20&offset=0
+    Results are ranked best first; follow "next" for more.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            limit = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+            offset = int(request.GET.get('offset', 0))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if not 1 <= limit <= MAX_SEARCH_PAGE_SIZE:
+            return Response({"error": f"limit must be between 1 and {MAX_SEARCH_PAGE_SIZE}"}, status=400)
+        if offset < 0:
+            return Response({"error": "offset must not be negative"}, status=400)
+
+        try:
+            rows, has_more = search_students(request.GET.get('q', ''), limit, offset)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        next_url = None
+        if has_more:
+            query = request.GET.copy()
+            query['offset'] = offset + limit
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+        return Response({"results": rows, "next": next_url}, status=200)
+
+
+class StudentBatchView(APIView):
+    """
+    Staff lookup of many students in one request.
+
+    POST students/batch/ {"register_numbers": [...], "fields": ["name", ...]}
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = StudentBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        register_numbers = serializer.validated_data['register_numbers']
+        if len(register_numbers) > MAX_BATCH_LOOKUP:
+            return Response({"error": f"At most {MAX_BATCH_LOOKUP} register numbers per request"}, status=400)
+
+        try:
+            fields = select_fields(serializer.validated_data.get('fields'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        rows, missing = lookup_students(register_numbers, fields)
+        return Response({"results": rows, "missing": missing}, status=200)
+
+
+class StudentExportView(APIView):
+    """
+    Staff download of the whole roster.
+
+    GET students/export/?format=csv|xlsx&fields=name,phone_number
+    """
+    permission_classes = [IsAdminUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= names the file type here, not a DRF renderer; error bodies stay JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'csv').lower()
+        if export_format not in FORMATS:
+            return Response({"error": f"format must be one of: {', '.join(FORMATS)}"}, status=400)
+        try:
+            fields = select_fields(request.GET.get('fields'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # Under ASGI the underlying HttpRequest (which Request proxies) carries the connection scope.
+        if getattr(request, 'scope', None) is not None:
+            content = aiter_export(export_format, fields)
+        else:
+            content = iter_export(export_format, fields)
+        filename = f"students-{timezone.localdate().isoformat()}.{export_format}"
+        response = StreamingHttpResponse(content, content_type=FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class BroadcastListView(APIView):
+    """Staff start an SMS broadcast to every student matching a prefix and/or list of register numbers."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = BroadcastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            broadcast = create_broadcast(
+                data['message'],
+                {key: data[key] for key in AUDIENCE_KEYS if key in data},
+                created_by_id=request.user.pk,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        start_broadcast(broadcast)
+        return Response(broadcast_summary(broadcast), status=202)
+
+
+class BroadcastView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, broadcast_id):
+        try:
+            broadcast = Broadcast.objects.get(pk=broadcast_id)
+        except Broadcast.DoesNotExist:
+            return Response({"error": "Broadcast not found"}, status=404)
+        return Response(broadcast_summary(broadcast), status=200)
+
+    def delete(self, request, broadcast_id):
+        """Cancel the broadcast; messages already sent stay sent."""
+        if not Broadcast.objects.filter(pk=broadcast_id).exists():
+            return Response({"error": "Broadcast not found"}, status=404)
+        if not cancel_broadcast(broadcast_id):
+            return Response({"error": "Broadcast has already finished"}, status=409)
+        return Response(broadcast_summary(Broadcast.objects.get(pk=broadcast_id)), status=200)
+
+
+class PlacementDriveListView(APIView):
+    """Staff list and create placement drives, each with one or more sets of eligibility criteria."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        drives = PlacementDrive.objects.prefetch_related('criteria').order_by('-created_at')
+        return Response(PlacementDriveSerializer(drives, many=True).data, status=200)
+
+    def post(self, request):
+        serializer = PlacementDriveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        drive = serializer.save()
+        return Response(PlacementDriveSerializer(drive).data, status=201)
+
+
+class DriveEligibleView(APIView):
+    """
+    Staff listing of the students eligible for a drive, ordered by register_number.
+
+    GET drives/<id>/eligible/?limit=100&after=<register_number>
+    The first page brings the materialized list up to date, re-evaluating only
+    students changed since the last refresh; later pages read it as it is.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, drive_id):
+        try:
+            limit = int(request.GET.get('limit', STUDENT_PAGE_SIZE))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if not 1 <= limit <= MAX_STUDENT_PAGE_SIZE:
+            return Response({"error": f"limit must be between 1 and {MAX_STUDENT_PAGE_SIZE}"}, status=400)
+
+        try:
+            drive = PlacementDrive.objects.get(pk=drive_id)
+        except PlacementDrive.DoesNotExist:
+            return Response({"error": "Drive not found"}, status=404)
+
+        after = request.GET.get('after', '').upper()
+        try:
+            refresh = None if after else refresh_eligibility(drive)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        queryset = DriveEligibility.objects.filter(drive=drive).order_by('student_id')
+        if after:
+            queryset = queryset.filter(student_id__gt=after)
+        rows = list(queryset.values(
+            register_number=F('student_id'),
+            name=F('student__name'),
+            phone_number=F('student__phone_number'),
+            branch=F('student__academics__branch'),
+            batch_year=F('student__academics__batch_year'),
+            cgpa=F('student__academics__cgpa'),
+        )[:limit + 1])
+
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            query = request.GET.copy()
+            query['after'] = rows[-1]['register_number']
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+        return Response({"refresh": refresh, "results": rows, "next": next_url}, status=200)
+
@@ -8,8 +8,55 @@ POSTGRESQL_PASSWORD = os.getenv("POSTGRESQL_PASSWORD")
 SUPERUSER_PASSWORD = os.getenv("SUPERUSER_PASSWORD")
 SECRET_KEY = os.getenv('SECRET_KEY')
 DB_PORT = os.getenv("DB_PORT", '5432')
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+DB_CONN_HEALTH_CHECKS = os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True"
+DB_POOL = os.getenv("DB_POOL", "False") == "True"
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_PHONE = os.getenv("TWILIO_PHONE")
\ No newline at end of file
+TWILIO_PHONE = os.getenv("TWILIO_PHONE")
+SMS_BACKEND = os.getenv("SMS_BACKEND", "session_management.sms.TwilioBackend")
+SMS_FAILOVER_BACKENDS = [path.strip() for path in os.getenv("SMS_FAILOVER_BACKENDS", "").split(",") if path.strip()]
+SMS_TIMEOUT = float(os.getenv("SMS_TIMEOUT", "5"))
+SMS_BREAKER_THRESHOLD = int(os.getenv("SMS_BREAKER_THRESHOLD", "5"))
+SMS_BREAKER_RESET_SECONDS = float(os.getenv("SMS_BREAKER_RESET_SECONDS", "30"))
+SMS_DEFER_MAX_AGE = float(os.getenv("SMS_DEFER_MAX_AGE", "300"))
+SMS_WORKERS = int(os.getenv("SMS_WORKERS", "4"))
+SMS_MAX_RETRIES = int(os.getenv("SMS_MAX_RETRIES", "3"))
+SMS_RETRY_BACKOFF = float(os.getenv("SMS_RETRY_BACKOFF", "2"))
+SMS_RATE_LIMIT = float(os.getenv("SMS_RATE_LIMIT", "10"))
+SMS_EAGER = os.getenv("SMS_EAGER", "False") == "True"
+SMS_FILE_PATH = os.getenv("SMS_FILE_PATH", "sms_outbox.jsonl")
+SMS_STUB_LATENCY = float(os.getenv("SMS_STUB_LATENCY", "0.05"))
+SMS_STUB_FAILURE_RATE = float(os.getenv("SMS_STUB_FAILURE_RATE", "0"))
+
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "8"))
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "500"))
+
+CACHE_URL = os.getenv("CACHE_URL")
+OTP_STORE_BACKEND = os.getenv("OTP_STORE_BACKEND")
+
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "0"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+
+ERROR_LOG_ASYNC = os.getenv("ERROR_LOG_ASYNC", "True") == "True"
+ERROR_LOG_OVERFLOW_POLICY = os.getenv("ERROR_LOG_OVERFLOW_POLICY", "drop")
+
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "0"))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", "0"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "16"))
+
+AUTH_THROTTLE_BACKEND = os.getenv("AUTH_THROTTLE_BACKEND", "memory")
+
+JWT_STATELESS_USER = os.getenv("JWT_STATELESS_USER", "False") == "True"
+
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False") == "True"
+
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "False") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
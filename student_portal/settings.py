@@ -2,7 +2,6 @@ from datetime import timedelta
 from student_portal import load_env as myenv
 from pathlib import Path
 import os
-from django.conf import settings
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -32,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover everything below it; a no-op unless INSTRUMENTATION_ENABLED.
+    'session_management.instrumentation.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
 
     'django.middleware.security.SecurityMiddleware',
@@ -97,9 +98,28 @@ DATABASES = {
         'PASSWORD':myenv.POSTGRESQL_PASSWORD,      # 🔁 Replace with the password you set
         'HOST': 'localhost',
         'PORT': myenv.DB_PORT,
+        # Keep connections open between requests instead of reconnecting every
+        # time; health checks drop a connection the server has closed before
+        # it is reused.
+        'CONN_MAX_AGE': myenv.DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': myenv.DB_CONN_HEALTH_CHECKS,
     }
 }
 
+# DB_POOL=True shares a psycopg connection pool between the threads of a worker
+# instead (psycopg 3 with psycopg_pool, as in requirements.txt). Prefer it under
+# ASGI, where each request runs in a new thread and persistent connections are
+# never reused. Requests wait up to DB_POOL_TIMEOUT seconds for a free connection.
+if myenv.DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': myenv.DB_POOL_MIN_SIZE,
+            'max_size': myenv.DB_POOL_MAX_SIZE,
+            'timeout': myenv.DB_POOL_TIMEOUT,
+        },
+    }
+
 
 
 # Password validation
@@ -120,6 +140,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing. PASSWORD_HASHER picks the preferred hasher; the others stay
+# listed so existing hashes keep verifying and get upgraded on the next login.
+# A work factor of 0 means Django's default. Measure with `manage.py benchmark_hashers`.
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'session_management.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'session_management.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[myenv.PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != myenv.PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_PBKDF2_ITERATIONS = myenv.PASSWORD_PBKDF2_ITERATIONS
+PASSWORD_SCRYPT_WORK_FACTOR = myenv.PASSWORD_SCRYPT_WORK_FACTOR
+
+# Hashing runs on a per-process pool of PASSWORD_HASH_WORKERS threads with up
+# to PASSWORD_HASH_QUEUE_SIZE requests waiting; anything beyond gets a 503.
+PASSWORD_HASH_WORKERS = myenv.PASSWORD_HASH_WORKERS
+PASSWORD_HASH_QUEUE_SIZE = myenv.PASSWORD_HASH_QUEUE_SIZE
+
 
 SIMPLE_JWT = {
     'USER_ID_FIELD': 'register_number',
@@ -128,6 +168,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=10),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_BLACKLIST_SERIALIZER': 'session_management.blacklist.FilteredTokenBlacklistSerializer',
 }
 
 
@@ -135,10 +176,26 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         # 'rest_framework.authentication.SessionAuthentication',
         # 'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'session_management.authentication.CachedJWTAuthentication',
+    ),
+    # orjson-backed when installed, plain JSONRenderer otherwise.
+    'DEFAULT_RENDERER_CLASSES': (
+        'session_management.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
 }
 
+# Authenticated users are cached per process for JWT_USER_CACHE_TTL seconds.
+# JWT_STATELESS_USER builds request.user from token claims without any query.
+JWT_USER_CACHE_SIZE = 10000
+JWT_USER_CACHE_TTL = 60
+JWT_STATELESS_USER = myenv.JWT_STATELESS_USER
+
+# Serialized student profiles (session_management.profile_cache), keyed by
+# register_number and checked against Student.updated_at on every read.
+PROFILE_CACHE_ALIAS = 'default'
+PROFILE_CACHE_TTL = 15 * 60
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -155,3 +212,146 @@ STATIC_URL = 'static/'
 AUTH_USER_MODEL = 'session_management.Student'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# SMS delivery (session_management.sms)
+# OTP views enqueue messages; a per-process worker pool hands them to SMS_BACKEND.
+# SMS_RATE_LIMITS caps messages/second per backend name, SMS_RATE_LIMIT is the default.
+# Set SMS_EAGER to make the first attempt inline (handy for tests together with the
+# locmem backend); any retries still go to the worker pool.
+# Other backends: ConsoleBackend and FileBackend for development, StubBackend
+# to imitate a slow or flaky provider.
+SMS_BACKEND = myenv.SMS_BACKEND
+# Tried in order while the backends before them have an open circuit breaker or
+# fail transiently, e.g. ['session_management.sms.FileBackend'].
+SMS_FAILOVER_BACKENDS = myenv.SMS_FAILOVER_BACKENDS
+# Seconds a provider call may take before it counts as a failure.
+SMS_TIMEOUT = myenv.SMS_TIMEOUT
+# Consecutive failures that open a provider's breaker, and how long it stays open.
+SMS_BREAKER_THRESHOLD = myenv.SMS_BREAKER_THRESHOLD
+SMS_BREAKER_RESET_SECONDS = myenv.SMS_BREAKER_RESET_SECONDS
+# Seconds a queued message may wait for a provider to come back before it is
+# marked failed; the default matches OTP_TTL_SECONDS.
+SMS_DEFER_MAX_AGE = myenv.SMS_DEFER_MAX_AGE
+# Read by TwilioBackend on its first send, so they may be unset wherever SMS is not used.
+TWILIO_ACCOUNT_SID = myenv.TWILIO_ACCOUNT_SID
+TWILIO_AUTH_TOKEN = myenv.TWILIO_AUTH_TOKEN
+TWILIO_PHONE = myenv.TWILIO_PHONE
+SMS_WORKERS = myenv.SMS_WORKERS
+SMS_MAX_RETRIES = myenv.SMS_MAX_RETRIES
+SMS_RETRY_BACKOFF = myenv.SMS_RETRY_BACKOFF
+SMS_RATE_LIMIT = myenv.SMS_RATE_LIMIT
+SMS_RATE_LIMITS = {
+    'twilio': myenv.SMS_RATE_LIMIT,
+}
+SMS_EAGER = myenv.SMS_EAGER
+SMS_FILE_PATH = myenv.SMS_FILE_PATH
+# session_management.sms.StubBackend: simulated provider latency and failure rate.
+SMS_STUB_LATENCY = myenv.SMS_STUB_LATENCY
+SMS_STUB_FAILURE_RATE = myenv.SMS_STUB_FAILURE_RATE
+
+
+# Caching. Point CACHE_URL at Redis (redis://host:6379/0) to share cached state
+# between workers; without it every process keeps its own local-memory cache.
+if myenv.CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': myenv.CACHE_URL,
+        }
+    }
+
+
+# OTP storage (session_management.otp_store)
+# The cache store needs a cache shared by all workers, so the database store is
+# the default until CACHE_URL is configured.
+OTP_STORE_BACKEND = myenv.OTP_STORE_BACKEND or (
+    'session_management.otp_store.CacheOTPStore' if myenv.CACHE_URL
+    else 'session_management.otp_store.DatabaseOTPStore'
+)
+OTP_CACHE_ALIAS = 'default'
+OTP_TTL_SECONDS = 5 * 60
+OTP_COOLDOWN_SECONDS = 60
+OTP_RETENTION_SECONDS = OTP_TTL_SECONDS * 2
+
+
+# Retention (session_management.retention)
+# Set RETENTION_INTERVAL_SECONDS to prune from inside the web process;
+# otherwise schedule `manage.py prune_otps` from cron.
+RETENTION_INTERVAL_SECONDS = myenv.RETENTION_INTERVAL_SECONDS
+RETENTION_BATCH_SIZE = myenv.RETENTION_BATCH_SIZE
+RETENTION_BATCH_PAUSE = 0.05
+
+
+# Error logging (student_portal.utils.log_exception)
+# Records are buffered in memory and written by a background thread with
+# bulk_create. When the buffer is full, new records are dropped ('drop') or
+# reservoir-sampled into it ('sample'). Set ERROR_LOG_ASYNC=False to write inline.
+ERROR_LOG_ASYNC = myenv.ERROR_LOG_ASYNC
+ERROR_LOG_BUFFER_SIZE = 10000
+ERROR_LOG_BATCH_SIZE = 200
+ERROR_LOG_FLUSH_INTERVAL = 2.0
+ERROR_LOG_OVERFLOW_POLICY = myenv.ERROR_LOG_OVERFLOW_POLICY
+# Raw ErrorLogs rows expire after ERROR_LOG_RETENTION_DAYS; per-fingerprint
+# totals stay, and their hourly buckets expire after ERROR_ROLLUP_RETENTION_DAYS.
+ERROR_LOG_RETENTION_DAYS = 14
+ERROR_ROLLUP_RETENTION_DAYS = 90
+
+
+# Throttling for login/, verify-register/, verify-otp/ and forgot-password/
+# (session_management.throttling). 'memory' limits each worker on its own;
+# 'cache' shares the counters through the cache at AUTH_THROTTLE_CACHE_ALIAS.
+AUTH_THROTTLE_BACKEND = myenv.AUTH_THROTTLE_BACKEND
+AUTH_THROTTLE_CACHE_ALIAS = 'default'
+AUTH_THROTTLE_RATES = {
+    'login': {'ip': '30/min', 'register_number': '10/min'},
+    'otp_request': {'ip': '20/min', 'register_number': '5/min'},
+    'otp_verify': {'ip': '30/min', 'register_number': '10/min'},
+}
+
+
+# Refresh-token blacklist (session_management.blacklist)
+# Each worker keeps a Bloom filter of blacklisted jtis so most refreshes skip the
+# blacklist query. It picks up tokens blacklisted by other workers within
+# TOKEN_BLACKLIST_FILTER_MAX_AGE seconds; rotation itself is always checked
+# against the database. Expired tokens are removed by `manage.py prune_tokens`
+# or the retention scheduler.
+TOKEN_BLACKLIST_FILTER = True
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100000
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_FILTER_MAX_AGE = 5
+TOKEN_BLACKLIST_FILTER_REBUILD_SECONDS = 60 * 60
+
+
+# Serve the session_management endpoints with the async views in
+# session_management/async_views.py. Only worthwhile under an ASGI server
+# (uvicorn/daphne on student_portal.asgi:application); under WSGI every async
+# view would run in its own event loop.
+ASYNC_VIEWS = myenv.ASYNC_VIEWS
+
+
+# Request instrumentation (session_management.instrumentation)
+# Adds a Server-Timing header (db, hash, sms, jwt, total) to every response and
+# keeps per-view latency histograms, served in Prometheus format at
+# auth/metrics/ to staff, and to scrapers sending "Authorization: Bearer
+# <METRICS_TOKEN>" when that is set. Each worker process reports its own numbers.
+INSTRUMENTATION_ENABLED = myenv.INSTRUMENTATION_ENABLED
+METRICS_TOKEN = myenv.METRICS_TOKEN
+
+
+# SMS broadcasts (session_management.broadcast)
+# Recipients are resolved and sent BROADCAST_CHUNK_SIZE at a time by
+# BROADCAST_WORKERS sender threads, within SMS_RATE_LIMITS. A running
+# broadcast's heartbeat fires every third of BROADCAST_STALE_SECONDS; one
+# silent for longer is picked up again by `manage.py run_broadcasts`.
+BROADCAST_WORKERS = myenv.BROADCAST_WORKERS
+BROADCAST_CHUNK_SIZE = myenv.BROADCAST_CHUNK_SIZE
+BROADCAST_STALE_SECONDS = 5 * 60
+
+
+# Student search (session_management.search)
+# On PostgreSQL, search runs on pg_trgm indexes created after migrate. On other
+# databases each process keeps an in-memory index, patched on save and
+# re-synced with writes it did not see (bulk imports, other processes) at most
+# every SEARCH_INDEX_MAX_AGE seconds.
+SEARCH_INDEX_MAX_AGE = 5
@@ -0,0 +1,33 @@
+"""
+Settings for `manage.py loadtest`: the real project settings pointed at a local
+SQLite database, with SMS kept in memory and throttling off, so the whole flow
+runs offline.
+
+    DJANGO_SETTINGS_MODULE=student_portal.settings_bench python manage.py loadtest
+"""
+import os
+
+from student_portal.settings import *  # noqa: F401,F403
+
+SECRET_KEY = SECRET_KEY or 'loadtest-only-secret-key-never-used-in-production'  # noqa: F405
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('BENCH_DB_PATH', str(BASE_DIR / 'bench.sqlite3')),  # noqa: F405
+        'OPTIONS': {'timeout': 30},
+        'CONN_MAX_AGE': 60,
+    }
+}
+# The session_management app has no migrations; `migrate --run-syncdb` creates its tables.
+MIGRATION_MODULES = {'session_management': None}
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+SMS_BACKEND = 'session_management.sms.LocMemBackend'
+SMS_EAGER = True
+OTP_STORE_BACKEND = 'session_management.otp_store.LocMemOTPStore'
+AUTH_THROTTLE_RATES = {}
+ERROR_LOG_ASYNC = False
+RETENTION_INTERVAL_SECONDS = 0
@@ -1,10 +1,101 @@
+import atexit
+import logging
+import random
+import threading
 import traceback
+from collections import deque
 from datetime import datetime
 
 
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
 from rest_framework.response import Response
 from rest_framework import status
-from session_management.models import ErrorLogs
+from session_management import metrics
+from session_management.errors import fingerprint_exception, record_errors
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorLogSink:
+    """
+    Bounded buffer of pending ErrorLogs records, drained by a background thread
+    in batches through record_errors(). Once the buffer is full, new records are either dropped
+    (policy 'drop') or reservoir-sampled into the buffer (policy 'sample'), so an
+    error storm costs the request path one append and never unbounded memory.
+    """
+
+    def __init__(self, capacity=10000, batch_size=200, flush_interval=2.0, policy='drop'):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self._buffer = deque()
+        self._overflow = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def put(self, record):
+        with self._cond:
+            if len(self._buffer) < self.capacity:
+                self._buffer.append(record)
+            else:
+                self._overflow += 1
+                if self.policy == 'sample':
+                    slot = random.randrange(self.capacity + self._overflow)
+                    if slot < self.capacity:
+                        self._buffer[slot] = record
+                metrics.incr('error_log_dropped_total')
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        self._ensure_started()
+
+    def flush(self):
+        """Write everything currently buffered. Returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                    if not self._buffer:
+                        self._overflow = 0
+                if not batch:
+                    return written
+                try:
+                    record_errors(batch)
+                    written += len(batch)
+                except Exception as e:
+                    logger.error("Error logging failed, dropped %s records: %s", len(batch), e)
+                    metrics.incr('error_log_dropped_total', len(batch))
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._flush_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='error-log-flusher', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+error_log_sink = ErrorLogSink(
+    capacity=settings.ERROR_LOG_BUFFER_SIZE,
+    batch_size=settings.ERROR_LOG_BATCH_SIZE,
+    flush_interval=settings.ERROR_LOG_FLUSH_INTERVAL,
+    policy=settings.ERROR_LOG_OVERFLOW_POLICY,
+)
 
 
 def log_exception(
@@ -13,7 +104,6 @@ def log_exception(
     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, error:str = None, error_trace: str = None
 ) :
     try:
-        print(f"error {e}", e.__traceback__ if e else None)
         if e is not None:
             error_trace = traceback.format_exc()
             error_log = {
@@ -27,21 +117,29 @@ def log_exception(
                 "error_trace": f"{error_trace}",
                 "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             }
-            
-        print(f"error_log {error_log}")
 
-        ErrorLogs.objects.create(
-            error=error_log,
-            updated_at=datetime.now(),
-        )
+        logger.error("Unhandled error: %s", error_log['error'])
+
+        fingerprint, exception_type, message = fingerprint_exception(e, error)
+        error_log.update({
+            "fingerprint": fingerprint,
+            "exception_type": exception_type,
+            "message": message,
+            "occurred_at": timezone.now().isoformat(),
+        })
+
+        if settings.ERROR_LOG_ASYNC:
+            error_log_sink.put(error_log)
+        else:
+            record_errors([error_log])
 
         return Response(
             response_data,
             status=status_code,
         )
     except Exception as e:
-        print(f"Error logging failed: {e}")
+        logger.exception("Error logging failed: %s", e)
         return Response(
             {"message": "Internal Server Error"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
\ No newline at end of file
+        )